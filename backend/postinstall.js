@@ -51,6 +51,14 @@ if (fs.existsSync('requirements.txt')) {
           console.warn('⚠️  Error instalando dependencias Python:', error.message);
         } else {
           console.log('✅ Dependencias Python instaladas correctamente');
+          // Fuentes, caché de fuentes de matplotlib y bytecode listos: el primer gráfico tras el deploy no paga el arranque en frío
+          exec('python3 scripts/chart_runtime.py build', (error) => {
+            if (error) {
+              console.warn('⚠️  No se pudo preparar el runtime de gráficos:', error.message);
+            } else {
+              console.log('✅ Runtime de gráficos precompilado (chart-runtime/)');
+            }
+          });
         }
       });
     }
@@ -0,0 +1,69 @@
+"""
+Figure and canvas pooling for long-lived (warm) chart processes.
+
+A pooled figure keeps its Agg canvas, and with it the cached renderer and its
+RGBA buffer, between jobs. Figures are keyed by chart type and size, cleared
+on release and handed out again, so steady-state rendering reuses the same
+large buffers instead of allocating and freeing them for every chart.
+Pooled figures are never registered with pyplot.
+"""
+
+from collections import OrderedDict
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+
+class FigurePool:
+    """
+    Idle figures keyed by (chart, figsize), evicting the least recently used
+    key once more than max_figures are idle.
+    """
+
+    def __init__(self, max_figures=16):
+        self.max_figures = max_figures
+        self.hits = 0
+        self.misses = 0
+        self._idle = OrderedDict()
+        self._keys = {}
+
+    def acquire(self, chart, figsize):
+        key = (chart, tuple(round(float(v), 2) for v in figsize))
+        figures = self._idle.get(key)
+        if figures:
+            fig = figures.pop()
+            if not figures:
+                del self._idle[key]
+            self.hits += 1
+            self._reset(fig)
+        else:
+            fig = Figure(figsize=key[1])
+            FigureCanvasAgg(fig)
+            self.misses += 1
+        self._keys[fig] = key
+        return fig
+
+    def release(self, fig):
+        key = self._keys.pop(fig)
+        fig.clear()
+        self._idle.setdefault(key, []).append(fig)
+        self._idle.move_to_end(key)
+        while sum(len(figures) for figures in self._idle.values()) > self.max_figures:
+            _, figures = next(iter(self._idle.items()))
+            figures.pop(0)
+            if not figures:
+                self._idle.popitem(last=False)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'idle': sum(len(figures) for figures in self._idle.values())}
+
+    @staticmethod
+    def _reset(fig):
+        """Undo per-chart figure state that fig.clear() keeps (margins, background)."""
+        fig.subplots_adjust(**{name: matplotlib.rcParams[f'figure.subplot.{name}'] for name in SUBPLOT_PARAMS})
+        fig.set_facecolor(matplotlib.rcParams['figure.facecolor'])
+        fig.set_edgecolor(matplotlib.rcParams['figure.edgecolor'])
@@ -0,0 +1,122 @@
+"""
+Profiling hooks for generate_charts.py.
+
+For every profiled draw_* call the profiler writes, into one directory per job:
+  <chart>.pstats      cProfile statistics (python -m pstats / snakeviz)
+  <chart>.collapsed   sampled call stacks in collapsed format (flamegraph.pl / speedscope)
+  <chart>.alloc.txt   tracemalloc top allocations made while drawing the chart
+"""
+
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+TOP_ALLOCATIONS = 25
+
+# Allocations made by the profiler itself or by the import machinery are not the chart's.
+# Frames carry the code's file name, which is not __file__ when loaded from chart_runtime bytecode
+ALLOCATION_FILTERS = [
+    tracemalloc.Filter(False, sys._getframe().f_code.co_filename),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+]
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval and counts identical stacks."""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ChartProfiler:
+    """Collects cProfile, stack-sample and allocation data per chart into job_dir."""
+
+    def __init__(self, job_dir, interval=0.001):
+        self.job_dir = job_dir
+        self.interval = interval
+        os.makedirs(job_dir, exist_ok=True)
+
+    @contextmanager
+    def profile(self, name):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            sampler.stop()
+            elapsed = time.perf_counter() - started
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            base = os.path.join(self.job_dir, name)
+            profiler.dump_stats(base + '.pstats')
+            sampler.write_collapsed(base + '.collapsed')
+            self._write_allocations(base + '.alloc.txt', name, before, after, peak, elapsed)
+
+    def _write_allocations(self, path, name, before, after, peak, elapsed):
+        stats = (after.filter_traces(ALLOCATION_FILTERS)
+                 .compare_to(before.filter_traces(ALLOCATION_FILTERS), 'lineno'))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# {name}: {elapsed * 1000:.1f} ms, peak traced memory {peak / 1024 / 1024:.1f} MiB\n")
+            f.write(f"# Top {TOP_ALLOCATIONS} allocation sites (growth while drawing)\n")
+            for stat in stats[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+
+
+def create_profiler(profile_dir, sample_rate=1):
+    """
+    Profiler for this job, or None when profiling is off.
+    With sample_rate N > 1 only about one in N jobs is profiled, so it can stay
+    enabled in production. Each profiled job gets its own timestamped directory.
+    """
+    if not profile_dir:
+        return None
+    if sample_rate > 1 and random.randrange(sample_rate) != 0:
+        return None
+    job_dir = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    return ChartProfiler(job_dir)
@@ -0,0 +1,261 @@
+"""
+Failure and time isolation for chart rendering.
+
+Each submitted job runs in its own forked process with its own time budget, so a
+chart that raises, hangs or crashes the interpreter only loses that chart. Up to
+`jobs` charts render concurrently. Where fork is unavailable (Windows) or jobs=0,
+jobs run in-process behind a try/except boundary, without time or resource limits.
+
+ResourceLimits caps what one forked job may use through POSIX rlimits set in the
+child: memory it may allocate on top of the forked process (RLIMIT_AS), CPU seconds
+(RLIMIT_CPU) and the size of any file it writes (RLIMIT_FSIZE). A job that crosses
+one gets a MemoryError, SIGXCPU or SIGXFSZ in its own process and is reported as
+status 'limit' instead of taking memory and CPU from the rest of the host.
+"""
+
+import errno
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from collections import deque
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, and no forked jobs to apply them to
+    resource = None
+
+MB = 1024 * 1024
+
+
+class ResourceLimits:
+    """Per-job limits; None or 0 leaves that resource unlimited."""
+
+    def __init__(self, memory_mb=None, cpu_seconds=None, output_mb=None):
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.output_mb = output_mb
+
+    def __bool__(self):
+        return bool(self.memory_mb or self.cpu_seconds or self.output_mb)
+
+
+class ResourceLimitExceeded(BaseException):
+    """
+    Raised in a job that reached one of its limits ('cpu' or 'output'). A BaseException,
+    like KeyboardInterrupt, so the chart's own `except Exception` fallbacks let it through.
+    """
+
+    def __init__(self, limit):
+        super().__init__(limit)
+        self.limit = limit
+
+
+def _limit_message(limit, limits):
+    if limit == 'memory':
+        return f"Exceeded memory limit of {limits.memory_mb:g} MB"
+    if limit == 'cpu':
+        return f"Exceeded CPU time limit of {max(1, round(limits.cpu_seconds))}s"
+    return f"Exceeded output file size limit of {limits.output_mb:g} MB"
+
+
+def _address_space():
+    """Current virtual memory size of this process in bytes, or 0 where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def _raise_limit(limit):
+    def handler(signum, frame):
+        raise ResourceLimitExceeded(limit)
+    return handler
+
+
+def _apply_limits(limits):
+    if limits.memory_mb:
+        # On top of what the fork already maps (interpreter, NumPy, matplotlib), so the
+        # limit is the chart's own allowance whatever the libraries reserve up front
+        budget = _address_space() + int(limits.memory_mb * MB)
+        resource.setrlimit(resource.RLIMIT_AS, (budget, budget))
+    if limits.cpu_seconds:
+        seconds = max(1, round(limits.cpu_seconds))
+        signal.signal(signal.SIGXCPU, _raise_limit('cpu'))
+        # The hard limit (SIGKILL) only hits a job stuck in native code past the warning
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+    if limits.output_mb:
+        signal.signal(signal.SIGXFSZ, _raise_limit('output'))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (int(limits.output_mb * MB),) * 2)
+
+
+def _read_cpu_signal(signal_fd):
+    """Whether the job's process received SIGXCPU, from what it wrote to its signal pipe."""
+    try:
+        return bytes([signal.SIGXCPU]) in os.read(signal_fd, 64)
+    except BlockingIOError:
+        return False
+
+
+def _run_child(conn, fn, args, limits, signal_fd=None):
+    try:
+        if signal_fd is not None:
+            # Written by the C-level handler as the signal arrives, even while the job is
+            # stuck in native code and its Python handler cannot run before the SIGKILL
+            os.set_blocking(signal_fd, False)
+            signal.set_wakeup_fd(signal_fd, warn_on_full_buffer=False)
+        if limits and resource:
+            _apply_limits(limits)
+        conn.send(('ok', fn(*args)))
+    except ResourceLimitExceeded as e:
+        conn.send(('limit', (e.limit, _limit_message(e.limit, limits))))
+    except (MemoryError, OSError) as e:
+        # Allocations past RLIMIT_AS fail with MemoryError, writes past RLIMIT_FSIZE with EFBIG
+        if isinstance(e, MemoryError) and limits.memory_mb:
+            conn.send(('limit', ('memory', _limit_message('memory', limits))))
+        elif getattr(e, 'errno', None) == errno.EFBIG and limits.output_mb:
+            conn.send(('limit', ('output', _limit_message('output', limits))))
+        else:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+            traceback.print_exc()
+    except BaseException as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        traceback.print_exc()
+    finally:
+        conn.close()
+
+
+class ChartRunner:
+    """
+    Runs chart jobs under a per-job timeout and failure boundary.
+
+    submit(name, fn, *args) queues a job; results() yields one record per job as soon
+    as it finishes, in completion order:
+        {'name', 'status': 'ok' | 'error' | 'timeout' | 'limit', 'duration_ms', 'value' | 'error'}
+    'limit' records also name the limit reached: 'limit': 'memory' | 'cpu' | 'output'.
+    While jobs are still being submitted (e.g. as input arrives), poll() starts queued
+    jobs and yields the records of those already finished without blocking.
+    """
+
+    def __init__(self, jobs=2, timeout=60.0, limits=None):
+        self.timeout = timeout
+        self.limits = limits or ResourceLimits()
+        self.isolated = jobs > 0 and 'fork' in multiprocessing.get_all_start_methods()
+        self.jobs = max(1, jobs)
+        self._context = multiprocessing.get_context('fork') if self.isolated else None
+        self._pending = deque()
+        self._running = {}
+        # name -> read end of the job's signal pipe, with a CPU limit
+        self._signal_fds = {}
+
+    def submit(self, name, fn, *args):
+        self._pending.append((name, fn, args))
+
+    def results(self):
+        if not self.isolated:
+            while self._pending:
+                yield self._run_inline(*self._pending.popleft())
+            return
+        while self._pending or self._running:
+            self._fill()
+            yield from self._collect()
+
+    def poll(self):
+        if not self.isolated:
+            yield from self.results()
+            return
+        self._fill()
+        if self._running:
+            yield from self._collect(block=False)
+
+    def _fill(self):
+        while self._pending and len(self._running) < self.jobs:
+            self._start(*self._pending.popleft())
+
+    def _run_inline(self, name, fn, args):
+        started = time.perf_counter()
+        try:
+            value = fn(*args)
+            return self._record(name, started, 'ok', value=value)
+        except Exception as e:
+            traceback.print_exc()
+            return self._record(name, started, 'error', error=f"{type(e).__name__}: {e}")
+
+    def _start(self, name, fn, args):
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        signal_fd = None
+        if self.limits.cpu_seconds and resource:
+            self._signal_fds[name], signal_fd = os.pipe()
+        process = self._context.Process(target=_run_child, args=(child_conn, fn, args, self.limits, signal_fd),
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        if signal_fd is not None:
+            os.close(signal_fd)
+        self._running[name] = (process, parent_conn, time.perf_counter())
+
+    def _collect(self, block=True):
+        """Wait until at least one running job finishes or times out; yield its records."""
+        now = time.perf_counter()
+        next_deadline = min(started + self.timeout for _, _, started in self._running.values())
+        ready = wait([conn for _, conn, _ in self._running.values()] +
+                     [process.sentinel for process, _, _ in self._running.values()],
+                     timeout=max(0, next_deadline - now) if block else 0)
+
+        for name, (process, conn, started) in list(self._running.items()):
+            if conn in ready or process.sentinel in ready:
+                try:
+                    status, payload = conn.recv()
+                except EOFError:
+                    process.join()
+                    status, payload = self._exit_status(process.exitcode, self._cpu_signalled(name))
+                process.join()
+                conn.close()
+                self._close_signal_fd(name)
+                del self._running[name]
+                if status == 'ok':
+                    yield self._record(name, started, 'ok', value=payload)
+                elif status == 'limit':
+                    limit, error = payload
+                    yield self._record(name, started, 'limit', limit=limit, error=error)
+                else:
+                    yield self._record(name, started, 'error', error=payload)
+            elif time.perf_counter() - started >= self.timeout:
+                process.terminate()
+                process.join(1)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                conn.close()
+                self._close_signal_fd(name)
+                del self._running[name]
+                yield self._record(name, started, 'timeout',
+                                   error=f"Exceeded time budget of {self.timeout:g}s")
+
+    def _cpu_signalled(self, name):
+        return name in self._signal_fds and _read_cpu_signal(self._signal_fds[name])
+
+    def _close_signal_fd(self, name):
+        if name in self._signal_fds:
+            os.close(self._signal_fds.pop(name))
+
+    def _exit_status(self, exitcode, cpu_signalled=False):
+        """(status, payload) of a job process that died without reporting back."""
+        # SIGKILL is also the OOM killer's or an operator's: it is the hard RLIMIT_CPU kill
+        # only if the job got the SIGXCPU the kernel sends once its CPU time hits the limit
+        if self.limits.cpu_seconds and (exitcode == -signal.SIGXCPU
+                                        or exitcode == -signal.SIGKILL and cpu_signalled):
+            return 'limit', ('cpu', _limit_message('cpu', self.limits))
+        if exitcode is not None and exitcode < 0:
+            return 'error', f"Chart process was killed by {signal.Signals(-exitcode).name}"
+        return 'error', f"Chart process exited with code {exitcode}"
+
+    @staticmethod
+    def _record(name, started, status, **extra):
+        record = {'name': name, 'status': status,
+                  'duration_ms': round((time.perf_counter() - started) * 1000, 1)}
+        record.update(extra)
+        return record
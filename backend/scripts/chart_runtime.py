@@ -0,0 +1,177 @@
+"""
+Warm-start runtime for generate_charts.py on freshly deployed hosts.
+
+The first run on a new host otherwise builds matplotlib's font cache, resolves
+the serif fallback chain against whatever fonts the host has, and compiles the
+chart modules. `build` does that work once, at deploy time, into a directory
+(CHARTS_RUNTIME_DIR, default backend/chart-runtime):
+  fonts/         the bundled serif font files, drawn before the rcParams fallbacks
+  mplconfig/     MPLCONFIGDIR with the prebuilt font-manager cache
+  lib/           sourceless .pyc files of the chart_* modules
+  runtime.json   {"version", "cache_tag", "matplotlib", "fonts": [{"file", "family"}], "modules": {name: hash}}
+Nothing inside refers to the directory's own path, so it can be built in one
+place and copied or mounted anywhere.
+
+generate_charts.py calls activate() before importing matplotlib and
+register_fonts() after it. A directory built for another Python version is
+ignored; .pyc files whose sources changed since the build are skipped (the
+sources are imported as usual) while the fonts and cache are still used.
+
+Command:
+  build [--font PATH ...] [--output DIR]   -> {"path", "fonts", "modules", "seconds"}
+Without --font the DejaVu Serif files shipped with matplotlib are bundled.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import time
+
+RUNTIME_VERSION = 1
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'chart-runtime')
+MANIFEST_FILE = 'runtime.json'
+DEFAULT_FONTS = ['DejaVuSerif.ttf', 'DejaVuSerif-Bold.ttf', 'DejaVuSerif-Italic.ttf', 'DejaVuSerif-BoldItalic.ttf']
+
+# Run with MPLCONFIGDIR pointing into the new runtime: importing the font manager
+# writes its cache there; prints the matplotlib version and each font's family
+WARM_UP = """
+import json, sys
+import matplotlib
+from matplotlib import font_manager
+from matplotlib.ft2font import FT2Font
+print(json.dumps({'matplotlib': matplotlib.__version__,
+                  'families': [FT2Font(path).family_name for path in sys.argv[1:]]}))
+"""
+
+
+def runtime_dir():
+    return os.environ.get('CHARTS_RUNTIME_DIR') or DEFAULT_DIR
+
+
+def chart_modules():
+    """Module name -> source path of the modules generate_charts.py imports from this directory."""
+    return {name[:-3]: os.path.join(SCRIPTS_DIR, name) for name in sorted(os.listdir(SCRIPTS_DIR))
+            if name.startswith('chart_') and name.endswith('.py') and name != 'chart_runtime.py'}
+
+
+def source_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def activate(directory=None):
+    """
+    Use the runtime in directory (default runtime_dir()) if there is one: point
+    MPLCONFIGDIR at its font cache (unless already set) and put its bytecode first
+    on sys.path. Returns the manifest with 'path' added, or None. Must run before
+    matplotlib is imported.
+    """
+    directory = os.path.abspath(directory or runtime_dir())
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != RUNTIME_VERSION or manifest.get('cache_tag') != sys.implementation.cache_tag:
+        print(f"Chart runtime {directory} was built for {manifest.get('cache_tag')}, not "
+              f"{sys.implementation.cache_tag}: ignored", file=sys.stderr)
+        return None
+    manifest['path'] = directory
+
+    os.environ.setdefault('MPLCONFIGDIR', os.path.join(directory, 'mplconfig'))
+    modules = chart_modules()
+    if manifest.get('modules') == {name: source_hash(path) for name, path in modules.items()}:
+        sys.path.insert(0, os.path.join(directory, 'lib'))
+    else:
+        print(f"Chart runtime {directory}: chart modules changed since the build, bytecode not used",
+              file=sys.stderr)
+    return manifest
+
+
+def register_fonts(manifest):
+    """Add the bundled fonts to matplotlib and put their families first in font.serif."""
+    from matplotlib import font_manager, rcParams
+
+    families = []
+    for font in manifest['fonts']:
+        font_manager.fontManager.addfont(os.path.join(manifest['path'], 'fonts', font['file']))
+        if font['family'] not in families:
+            families.append(font['family'])
+    rcParams['font.serif'] = families + [name for name in rcParams['font.serif'] if name not in families]
+    return families
+
+
+def build(output, fonts=None):
+    """Build the runtime into output, replacing a previous build only once the new one is complete."""
+    started = time.perf_counter()
+    if not fonts:
+        import matplotlib
+        font_dir = os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf')
+        fonts = [os.path.join(font_dir, name) for name in DEFAULT_FONTS]
+
+    output = os.path.abspath(output)
+    staging = output + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.join(staging, 'fonts'))
+    os.makedirs(os.path.join(staging, 'mplconfig'))
+    os.makedirs(os.path.join(staging, 'lib'))
+
+    bundled = []
+    for path in fonts:
+        shutil.copy2(path, os.path.join(staging, 'fonts', os.path.basename(path)))
+        bundled.append(os.path.join(staging, 'fonts', os.path.basename(path)))
+    env = {**os.environ, 'MPLCONFIGDIR': os.path.join(staging, 'mplconfig')}
+    proc = subprocess.run([sys.executable, '-c', WARM_UP, *bundled], env=env,
+                          capture_output=True, text=True, check=True)
+    warmed = json.loads(proc.stdout)
+
+    modules = {}
+    for name, path in chart_modules().items():
+        # Relative dfile: tracebacks and linecache find the source on sys.path wherever it lives
+        py_compile.compile(path, cfile=os.path.join(staging, 'lib', name + '.pyc'), dfile=os.path.basename(path),
+                           doraise=True, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        modules[name] = source_hash(path)
+
+    manifest = {
+        'version': RUNTIME_VERSION,
+        'cache_tag': sys.implementation.cache_tag,
+        'matplotlib': warmed['matplotlib'],
+        'fonts': [{'file': os.path.basename(path), 'family': family}
+                  for path, family in zip(bundled, warmed['families'])],
+        'modules': modules,
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(output, ignore_errors=True)
+    os.replace(staging, output)
+    return {'path': output, 'fonts': manifest['fonts'], 'modules': sorted(modules),
+            'seconds': round(time.perf_counter() - started, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm-start runtime for generate_charts.py')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--output', default=runtime_dir(), help='Runtime directory (default: CHARTS_RUNTIME_DIR '
+                                                                 'or backend/chart-runtime)')
+    parser.add_argument('--font', action='append', default=[],
+                        help='Serif font file to bundle (.ttf/.otf); repeat for bold/italic faces')
+    args = parser.parse_args()
+
+    try:
+        result = build(args.output, args.font)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, 'stderr', None)
+        print(f"Error: chart runtime could not be built: {e}{': ' + stderr if stderr else ''}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Retained-mode drawing for charts that are regenerated with slightly different data.
+
+A Scene owns one figure whose artists are registered under stable names. Each
+draw pass declares every artist it needs: an artist seen for the first time is
+created, an existing one only gets the properties whose values changed
+(set_text, set_position, set_height, set_data, ...), and artists not declared
+in the pass are removed. A regeneration where only a few numbers changed then
+touches only those artists instead of rebuilding the whole figure.
+"""
+
+import numpy as np
+
+
+def _same(a, b):
+    if isinstance(a, (list, tuple, np.ndarray)) or isinstance(b, (list, tuple, np.ndarray)):
+        try:
+            return np.array_equal(np.asarray(a, dtype=object), np.asarray(b, dtype=object))
+        except ValueError:
+            return False
+    return a == b
+
+
+class Scene:
+    """Named artists of one persistent figure."""
+
+    def __init__(self, fig, ax):
+        self.fig = fig
+        self.ax = ax
+        self._artists = {}
+        self._seen = set()
+        self.stats = {}
+        # Content hashes of the files written from this figure by the last pass, if kept
+        self.saved = None
+
+    def begin(self):
+        self._seen = set()
+        self.stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+
+    def artist(self, name, create, rebuild_on=None, **props):
+        """
+        Artist `name`, built with create() the first time it is declared. On later passes
+        every changed value in props is applied through the matching Artist setter; a change
+        in rebuild_on (for artists without a usable setter) recreates the artist instead.
+        """
+        self._seen.add(name)
+        entry = self._artists.get(name)
+        if entry is not None and not _same(entry[1], rebuild_on):
+            entry[0].remove()
+            entry = None
+        if entry is None:
+            artist = create()
+            self._artists[name] = (artist, rebuild_on, props)
+            self.stats['created'] += 1
+            return artist
+
+        artist, _, old_props = entry
+        changed = {k: v for k, v in props.items() if k not in old_props or not _same(old_props[k], v)}
+        if changed:
+            artist.set(**changed)
+            self._artists[name] = (artist, rebuild_on, props)
+            self.stats['updated'] += 1
+        else:
+            self.stats['unchanged'] += 1
+        return artist
+
+    @property
+    def dirty(self):
+        """True when this pass created, changed or removed any artist."""
+        return bool(self.stats['created'] or self.stats['updated'] or self.stats['removed'])
+
+    def text(self, name, x, y, s, **style):
+        return self.artist(name, lambda: self.ax.text(x, y, s, **style), position=(x, y), text=s, **style)
+
+    def line(self, name, xs, ys, **style):
+        return self.artist(name, lambda: self.ax.plot(xs, ys, **style)[0], data=(list(xs), list(ys)), **style)
+
+    def finish(self):
+        """Remove artists not declared in this pass and rescale the axes to the current data."""
+        for name in [name for name in self._artists if name not in self._seen]:
+            self._artists.pop(name)[0].remove()
+            self.stats['removed'] += 1
+        if self.stats['updated'] or self.stats['removed']:
+            self.ax.relim()
+            self.ax.autoscale_view()
@@ -0,0 +1,128 @@
+"""
+Output sinks for generated charts.
+
+Charts are always rendered into the local output directory; a sink then
+publishes each chart's files as soon as that chart is finished and reports
+the final object keys:
+  LocalSink  files stay in the output directory, keys are the file names
+  S3Sink     files are uploaded to an S3-compatible bucket (AWS S3, MinIO, ...)
+             through one pooled client, concurrently with the charts still rendering
+
+create_sink('s3://bucket/prefix') or create_sink(None) picks the implementation.
+A sink lives for the whole process: flush() waits for what was published since the
+previous flush and returns its keys, shutdown() releases the sink.
+boto3 is only needed for S3Sink.
+"""
+
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Keys are stable and overwritten by every run (prefix/prisma_flow.png), so caches must
+# revalidate: S3 answers with the object's ETag and a 304 while the chart is unchanged
+CACHE_CONTROL = 'public, no-cache'
+
+
+class LocalSink:
+    """Keeps the rendered files where they are; a file's key is its name."""
+
+    def __init__(self):
+        self._keys = {}
+
+    def publish(self, chart, paths, on_done=None):
+        keys = {os.path.basename(path): os.path.basename(path) for path in paths}
+        self._keys[chart] = keys
+        if on_done:
+            on_done(chart, keys, None)
+
+    def flush(self):
+        """({chart: {filename: key}}, {chart: error}) of the charts published since the last flush."""
+        keys, self._keys = self._keys, {}
+        return keys, {}
+
+    def shutdown(self):
+        pass
+
+
+class S3Sink:
+    """
+    Uploads chart files to bucket/prefix. Uploads run on a thread pool sharing one
+    client (its connection pool is sized to the pool), and files above the multipart
+    threshold are sent as concurrent multipart uploads.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, max_workers=4,
+                 multipart_threshold=8 * 1024 * 1024):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError as e:
+            raise RuntimeError("The S3 sink requires boto3 (pip install boto3)") from e
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.session.Session().client(
+            's3', endpoint_url=endpoint_url or os.environ.get('S3_ENDPOINT_URL'),
+            region_name=region or os.environ.get('AWS_REGION'),
+            config=Config(max_pool_connections=max_workers * 2, retries={'max_attempts': 3}))
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold,
+                                              multipart_chunksize=multipart_threshold,
+                                              max_concurrency=2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+        self._keys = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def key_for(self, filename):
+        return f"{self.prefix}/{filename}" if self.prefix else filename
+
+    def publish(self, chart, paths, on_done=None):
+        self._futures.append(self._executor.submit(self._upload, chart, list(paths), on_done))
+
+    def _upload(self, chart, paths, on_done):
+        keys, error = {}, None
+        try:
+            for path in paths:
+                filename = os.path.basename(path)
+                key = self.key_for(filename)
+                self.client.upload_file(
+                    path, self.bucket, key, Config=self.transfer_config,
+                    ExtraArgs={'ContentType': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                               'CacheControl': CACHE_CONTROL})
+                keys[filename] = key
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with self._lock:
+            if error:
+                self._errors[chart] = error
+            else:
+                self._keys[chart] = keys
+        if on_done:
+            on_done(chart, keys, error)
+
+    def flush(self):
+        """Wait for pending uploads; see LocalSink.flush."""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+        with self._lock:
+            keys, self._keys = self._keys, {}
+            errors, self._errors = self._errors, {}
+        return keys, errors
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+def create_sink(url, **kwargs):
+    """Sink for --sink: None/'local' keeps files locally, 's3://bucket/prefix' uploads them."""
+    if not url or url == 'local':
+        return LocalSink()
+    parsed = urlparse(url)
+    if parsed.scheme == 's3':
+        return S3Sink(parsed.netloc, parsed.path, **kwargs)
+    raise ValueError(f"Unsupported output sink: {url}")
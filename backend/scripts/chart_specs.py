@@ -0,0 +1,225 @@
+"""
+Chart specs for client-side rendering.
+
+generate_charts.py reduces each input section to the values its chart shows
+(prepare_scree, prepare_temporal, ...). This module turns that prepared data
+into a spec a browser can render interactively, so a view does not need a
+server-rasterized PNG:
+  'json'       neutral chart spec, independent of any charting library:
+               {'version', 'chart', 'kind': 'line' | 'bar' | 'table', 'title',
+                'x', 'y', 'color', 'data', 'overlays'} ('columns' and 'rows' for tables)
+  'vega-lite'  the same chart as a Vega-Lite v5 spec (tables have no Vega-Lite
+               form and are always written as neutral specs)
+"""
+
+import json
+import math
+
+SPEC_VERSION = 1
+VEGA_LITE_SCHEMA = 'https://vega.github.io/schema/vega-lite/v5.json'
+
+# --spec value -> file extension; neutral specs always use .spec.json
+SPEC_FORMATS = {'json': '.spec.json', 'vega-lite': '.vl.json'}
+
+QUALITY_COLORS = {'Yes': '#27ae60', 'Partial': '#f39c12', 'No': '#e74c3c'}
+
+
+def _scree_spec(prepared):
+    overlays = []
+    if prepared['median'] is not None:
+        overlays.append({'type': 'rule', 'y': prepared['median'], 'color': '#666666',
+                         'label': f"Median: {prepared['median']:.1%}"})
+    elbow = prepared['elbow']
+    if elbow:
+        overlays.append({'type': 'rule', 'x': elbow['rank'], 'color': '#333333',
+                         'label': f"Cut-off point (elbow): rank {elbow['rank']}"})
+        overlays.append({'type': 'rule', 'y': elbow['score'], 'color': '#c0392b',
+                         'label': f"Confidence Threshold (score = {elbow['score']:.2f})"})
+    elbow_ci = prepared.get('elbow_ci')
+    if elbow_ci:
+        level = f"{elbow_ci['confidence']:.0%}"
+        overlays.append({'type': 'band', 'x': elbow_ci['rank'], 'color': '#333333',
+                         'label': f"Elbow {level} CI: ranks {elbow_ci['rank'][0]}-{elbow_ci['rank'][1]}"})
+        overlays.append({'type': 'band', 'y': elbow_ci['score'], 'color': '#c0392b',
+                         'label': f"Threshold {level} CI: {elbow_ci['score'][0]:.2f}-{elbow_ci['score'][1]:.2f}"})
+    for key, label in (('top10', 'Top 10%'), ('top25', 'Top 25%')):
+        if key in prepared['quantiles']:
+            value = prepared['quantiles'][key]
+            overlays.append({'type': 'rule', 'y': value, 'color': '#999999', 'label': f'{label} (>= {value:.2f})'})
+    return {
+        'kind': 'line',
+        'title': 'Priority Screening Score Distribution (Scree Plot)',
+        'x': {'field': 'rank', 'type': 'quantitative', 'title': 'Reference Rank'},
+        'y': {'field': 'score', 'type': 'quantitative', 'title': 'Relevance Score'},
+        'data': [{'rank': rank, 'score': score} for rank, score in zip(prepared['ranks'], prepared['scores'])],
+        'overlays': overlays,
+    }
+
+
+def _temporal_spec(prepared):
+    overlays = []
+    if prepared['trend']:
+        # Evaluated at every plotted year so the line shares the bars' ordinal axis
+        coefficients = prepared['trend']
+        overlays.append({'type': 'line', 'color': '#e74c3c', 'label': 'Trend', 'data': [
+            {'year': year, 'count': sum(c * year ** (len(coefficients) - 1 - i) for i, c in enumerate(coefficients))}
+            for year in prepared['years']]})
+    return {
+        'kind': 'bar',
+        'title': 'Temporal Distribution of Included Studies',
+        'x': {'field': 'year', 'type': 'ordinal', 'title': 'Publication Year'},
+        'y': {'field': 'count', 'type': 'quantitative', 'title': 'Number of Studies'},
+        'data': [{'year': year, 'count': count} for year, count in zip(prepared['years'], prepared['counts'])],
+        'overlays': overlays,
+    }
+
+
+def _quality_spec(prepared):
+    data = []
+    for i, question in enumerate(prepared['questions']):
+        for answer, key in (('Yes', 'yes'), ('Partial', 'partial'), ('No', 'no')):
+            data.append({'question': question, 'answer': answer, 'count': prepared[key][i],
+                         'share': prepared[key][i] / prepared['total'][i] if prepared['total'][i] else None})
+    return {
+        'kind': 'bar',
+        'title': 'Methodological Quality Assessment',
+        'x': {'field': 'question', 'type': 'nominal', 'title': 'Quality Criteria (Kitchenham)'},
+        'y': {'field': 'count', 'type': 'quantitative', 'title': 'Number of Studies', 'stack': True},
+        'color': {'field': 'answer', 'domain': list(QUALITY_COLORS), 'range': list(QUALITY_COLORS.values())},
+        'data': data,
+        'overlays': [],
+    }
+
+
+def _keywords_spec(prepared):
+    return {
+        'kind': 'bar',
+        'title': 'Thematic Keyword Concentration in Included Studies',
+        'x': {'field': 'count', 'type': 'quantitative', 'title': 'Frequency (number of studies)'},
+        'y': {'field': 'keyword', 'type': 'nominal', 'title': None},
+        'data': [{'keyword': keyword, 'count': count}
+                 for keyword, count in zip(prepared['keywords'], prepared['counts'])],
+        'overlays': [],
+    }
+
+
+def _synthesis_spec(prepared):
+    spec = {
+        'kind': 'table',
+        'title': ('Technical Synthesis: Performance Metrics Comparison' if prepared['mode'] == 'studies'
+                  else f"Technical Synthesis: Metrics Summary by Tool ({prepared['studies']} studies)"),
+        'mode': prepared['mode'],
+        'columns': prepared['columns'],
+        'rows': prepared['rows'],
+    }
+    if prepared['mode'] == 'aggregate':
+        spec['distributions'] = prepared['distributions']
+    return spec
+
+
+# Input section -> builder of its neutral spec from the prepared data
+SPEC_BUILDERS = {
+    'scree': _scree_spec,
+    'temporal_distribution': _temporal_spec,
+    'quality_assessment': _quality_spec,
+    'bubble_chart': _keywords_spec,
+    'technical_synthesis': _synthesis_spec,
+}
+
+
+def chart_spec(section, chart, prepared, spec_format='json'):
+    """Spec of one chart from its prepared data, in spec_format ('json' or 'vega-lite')."""
+    spec = {'version': SPEC_VERSION, 'chart': chart, **SPEC_BUILDERS[section](prepared)}
+    if spec_format == 'vega-lite' and spec['kind'] != 'table':
+        return vega_lite(spec)
+    return spec
+
+
+def spec_extension(spec):
+    return SPEC_FORMATS['vega-lite'] if '$schema' in spec else SPEC_FORMATS['json']
+
+
+def _channel(axis):
+    channel = {'field': axis['field'], 'type': axis['type'], 'title': axis['title']}
+    if axis['type'] in ('nominal', 'ordinal'):
+        # Keep the order of the prepared data (years ascending, keywords by frequency)
+        channel['sort'] = None
+    return channel
+
+
+def vega_lite(spec):
+    """Translate a neutral line/bar spec to a layered Vega-Lite spec."""
+    x, y = spec['x'], spec['y']
+    encoding = {'x': _channel(x), 'y': _channel(y)}
+    tooltip = [{'field': x['field'], 'type': x['type']}, {'field': y['field'], 'type': y['type']}]
+    if 'color' in spec:
+        color = spec['color']
+        encoding['color'] = {'field': color['field'], 'type': 'nominal', 'title': None,
+                             'scale': {'domain': color['domain'], 'range': color['range']}}
+        tooltip.insert(0, {'field': color['field'], 'type': 'nominal'})
+    if spec['kind'] == 'line':
+        mark = {'type': 'line', 'point': True, 'color': '#333333'}
+    else:
+        mark = {'type': 'bar', 'color': '#4a90e2'} if 'color' not in spec else {'type': 'bar'}
+    encoding['tooltip'] = tooltip
+    layers = [{'mark': mark, 'encoding': encoding}]
+
+    for overlay in spec['overlays']:
+        if overlay['type'] == 'rule':
+            axis = 'x' if 'x' in overlay else 'y'
+            layers.append({
+                'data': {'values': [{spec[axis]['field']: overlay[axis], 'label': overlay['label']}]},
+                'mark': {'type': 'rule', 'strokeDash': [4, 4], 'color': overlay['color']},
+                'encoding': {axis: {'field': spec[axis]['field'], 'type': spec[axis]['type']},
+                             'tooltip': [{'field': 'label', 'type': 'nominal'}]},
+            })
+        elif overlay['type'] == 'band':
+            # Interval [low, high] along one axis, spanning the whole other axis
+            axis = 'x' if 'x' in overlay else 'y'
+            field = spec[axis]['field']
+            low, high = overlay[axis]
+            layers.append({
+                'data': {'values': [{field: low, f'{field}_end': high, 'label': overlay['label']}]},
+                'mark': {'type': 'rect', 'opacity': 0.08, 'color': overlay['color']},
+                'encoding': {axis: {'field': field, 'type': spec[axis]['type']},
+                             f'{axis}2': {'field': f'{field}_end'},
+                             'tooltip': [{'field': 'label', 'type': 'nominal'}]},
+            })
+        else:
+            layers.append({
+                'data': {'values': overlay['data']},
+                'mark': {'type': 'line', 'strokeDash': [6, 4], 'color': overlay['color']},
+                'encoding': {'x': {'field': x['field'], 'type': x['type'], 'sort': None},
+                             'y': {'field': y['field'], 'type': y['type']}},
+            })
+
+    return {
+        '$schema': VEGA_LITE_SCHEMA,
+        'title': spec['title'],
+        'description': f"{spec['chart']} chart (spec version {spec['version']})",
+        'width': 'container',
+        'data': {'values': spec['data']},
+        'layer': layers,
+    }
+
+
+def _plain(value):
+    """JSON-safe value: NumPy scalars become Python numbers, NaN/inf become null."""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _sanitize(value):
+    if isinstance(value, dict):
+        return {k: _sanitize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(v) for v in value]
+    return _plain(value)
+
+
+def write_spec(path, spec):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_sanitize(spec), f, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
@@ -0,0 +1,51 @@
+"""
+Thumbnail sprite sheet for preview screens.
+
+Scales the PNG of every rendered chart down to a fixed thumbnail width and packs
+the thumbnails row by row into one image, so a preview needs a single small
+download instead of one 300-DPI PNG per chart. The coordinate map tells the
+client where each chart's thumbnail is (CSS background-position / canvas
+drawImage). Pillow is installed with matplotlib.
+"""
+
+from PIL import Image
+
+SPRITE_FILENAME = 'charts_sprite.png'
+
+
+def _thumbnail(path, width):
+    with Image.open(path) as image:
+        # reduce() is a cheap integer box downscale; the final resize then works on a small image
+        factor = max(1, image.width // (width * 2))
+        image = image.reduce(factor) if factor > 1 else image.copy()
+    height = max(1, round(image.height * width / image.width))
+    thumb = image.resize((width, height), Image.LANCZOS)
+    if thumb.mode != 'RGB':
+        background = Image.new('RGB', thumb.size, 'white')
+        background.paste(thumb, mask=thumb.convert('RGBA').getchannel('A'))
+        thumb = background
+    return thumb
+
+
+def build_sprite(charts, output_path, width=320, columns=4, gap=8):
+    """
+    Pack thumbnails of charts ({name: png path}, in order) into output_path.
+    Rows hold `columns` thumbnails and are as tall as their tallest one.
+    Returns {'width', 'height', 'charts': {name: {'x', 'y', 'width', 'height'}}}.
+    """
+    thumbs = [(name, _thumbnail(path, width)) for name, path in charts.items()]
+    rows = [thumbs[i:i + columns] for i in range(0, len(thumbs), columns)]
+    sheet_w = min(columns, len(thumbs)) * (width + gap) - gap
+    sheet_h = sum(max(thumb.height for _, thumb in row) for row in rows) + gap * (len(rows) - 1)
+
+    sheet = Image.new('RGB', (max(1, sheet_w), max(1, sheet_h)), 'white')
+    boxes = {}
+    y = 0
+    for row in rows:
+        for i, (name, thumb) in enumerate(row):
+            x = i * (width + gap)
+            sheet.paste(thumb, (x, y))
+            boxes[name] = {'x': x, 'y': y, 'width': thumb.width, 'height': thumb.height}
+        y += max(thumb.height for _, thumb in row) + gap
+    sheet.save(output_path, optimize=True)
+    return {'width': sheet.width, 'height': sheet.height, 'charts': boxes}
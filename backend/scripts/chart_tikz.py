@@ -0,0 +1,241 @@
+"""
+Native LaTeX code for the article export.
+
+Builds a tikzpicture from a chart's prepared data (see the prepare_* functions of
+generate_charts.py): a TikZ flow diagram for PRISMA and pgfplots axes for the scree,
+temporal, quality and keyword charts. The code is plain text, so producing it costs
+no rendering, and LaTeX typesets it with the document's own fonts. The including
+document needs:
+    \\usepackage{pgfplots}
+    \\pgfplotsset{compat=1.17}
+    \\usetikzlibrary{positioning,fit,arrows.meta}
+Pictures take the width of the surrounding \\linewidth (a minipage sets it).
+"""
+
+# Long scree curves are thinned to this many evenly spaced ranks (pgfplots keeps
+# every coordinate in TeX memory); median, elbow and quantiles use every score
+MAX_COORDINATES = 500
+
+LATEX_SPECIALS = {
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_',
+    '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}',
+}
+
+
+def escape(text):
+    return ''.join(LATEX_SPECIALS.get(ch, ch) for ch in str(text))
+
+
+def _num(value):
+    return f'{float(value):.6g}'
+
+
+def _coordinates(xs, ys):
+    return ' '.join(f'({_num(x)},{_num(y)})' for x, y in zip(xs, ys))
+
+
+def _colors(colors):
+    return '\n'.join(f'\\definecolor{{{name}}}{{HTML}}{{{value.lstrip("#").upper()}}}' for name, value in colors.items())
+
+
+def _labels(labels):
+    return ','.join('{' + escape(label) + '}' for label in labels)
+
+
+def _box_text(text):
+    """
+    Box text (see prepare_prisma) as node content: one row per line, indented items kept
+    indented and empty lines turned into extra space after the previous row.
+    """
+    rows = []  # [content, separator after it]
+    for line in text.strip('\n').split('\n'):
+        if not line.strip():
+            if rows:
+                rows[-1][1] = r' \\[0.8ex] '
+        elif line.startswith('  '):
+            rows.append([r'\hspace*{1em}' + escape(line.strip()), r' \\ '])
+        else:
+            rows.append([escape(line), r' \\ '])
+    return ''.join(content + separator for content, separator in rows[:-1]) + (rows[-1][0] if rows else '')
+
+
+def prisma_tikz(prepared):
+    boxes = prepared['boxes']
+    lines = [
+        _colors({'prismaheader': '#f4d03f', 'prismaphase': '#5dade2', 'prismamain': '#abebc6',
+                 'prismaexcluded': '#fadbd8', 'prismaedge': '#34495e', 'prismaarrow': '#2c3e50'}),
+        r'\begin{tikzpicture}[font=\footnotesize, node distance=6mm and 10mm,',
+        r'  box/.style={draw=prismaedge, rectangle, inner sep=4pt, text width=0.36\linewidth},',
+        r'  main/.style={box, fill=prismamain, align=center},',
+        r'  side/.style={box, fill=prismaexcluded, align=left},',
+        r'  phase/.style={draw=prismaedge, fill=prismaphase, inner sep=0pt, minimum width=6mm},',
+        r'  flow/.style={-{Stealth[length=2.5mm]}, thick, draw=prismaarrow},',
+        r'  link/.style={thick, draw=prismaarrow}]',
+        r'\node[box, fill=prismaheader, font=\footnotesize\bfseries, align=center] (header) '
+        r'{New studies via databases and registers};',
+        f"\\node[main, align=left, below=3mm of header] (identified) {{{_box_text(boxes['identified'])}}};",
+        f"\\node[side, right=of identified] (removed) {{{_box_text(boxes['removed'])}}};",
+        f"\\node[main, below=of identified] (screened) {{{_box_text(boxes['screened'])}}};",
+        f"\\node[side, right=of screened] (excluded) {{{_box_text(boxes['excluded'])}}};",
+        f"\\node[main, below=of screened] (retrieved) {{{_box_text(boxes['retrieved'])}}};",
+    ]
+    if boxes['not_retrieved']:
+        lines.append(f"\\node[side, right=of retrieved] (not_retrieved) {{{_box_text(boxes['not_retrieved'])}}};")
+    lines += [
+        f"\\node[main, below=of retrieved] (assessed) {{{_box_text(boxes['assessed'])}}};",
+        f"\\node[side, right=of assessed] (excluded_fulltext) {{{_box_text(boxes['excluded_fulltext'])}}};",
+        r'\node[main, text width=0.16\linewidth, below=of assessed.south west, anchor=north west] (included) '
+        f"{{{_box_text(boxes['included'])}}};",
+        r'\node[main, text width=0.16\linewidth, below=of assessed.south east, anchor=north east] (included_reports) '
+        f"{{{_box_text(boxes['included_reports'])}}};",
+        r'\draw[flow] (identified) -- (screened);',
+        r'\draw[flow] (screened) -- (retrieved);',
+        r'\draw[flow] (retrieved) -- (assessed);',
+        r'\draw[flow] (assessed.south) -- ++(0,-3mm) -| (included.north);',
+        r'\draw[flow] (assessed.south) -- ++(0,-3mm) -| (included_reports.north);',
+        r'\draw[link] (identified) -- (removed);',
+        r'\draw[link] (screened) -- (excluded);',
+    ]
+    if boxes['not_retrieved']:
+        lines.append(r'\draw[link] (retrieved) -- (not_retrieved);')
+    lines.append(r'\draw[link] (assessed) -- (excluded_fulltext);')
+    # Phase labels to the left of the boxes of each phase
+    for phase, first, last in (('Identification', 'header', 'identified'),
+                               ('Screening', 'screened', 'assessed'),
+                               ('Included', 'included', 'included')):
+        lines.append(f'\\node[phase, fit=({first}.north west)({last}.south west), xshift=-7mm, '
+                     f'label={{[rotate=90, font=\\footnotesize\\bfseries, text=white]center:{phase}}}] {{}};')
+    lines.append(r'\end{tikzpicture}')
+    return '\n'.join(lines) + '\n'
+
+
+def _axis(options, plots):
+    return '\n'.join([r'\begin{tikzpicture}', r'\begin{axis}[', *(f'  {option},' for option in options), ']',
+                      *plots, r'\end{axis}', r'\end{tikzpicture}']) + '\n'
+
+
+COMMON_AXIS = [r'width=\linewidth', r'height=0.62\linewidth', 'axis lines*=left', 'tick align=outside',
+               'legend style={font=\\scriptsize, draw=black!20}', 'legend cell align=left',
+               'title style={font=\\small\\bfseries}', 'label style={font=\\small}']
+
+
+def scree_pgfplots(prepared):
+    ranks, scores = prepared['ranks'], prepared['scores']
+    if len(scores) == 0:
+        return None
+    if len(ranks) > MAX_COORDINATES:
+        step = (len(ranks) - 1) / (MAX_COORDINATES - 1)
+        keep = sorted({round(i * step) for i in range(MAX_COORDINATES)})
+        ranks, scores = [ranks[i] for i in keep], [scores[i] for i in keep]
+    first, last = prepared['ranks'][0], prepared['ranks'][-1]
+    low, high = min(prepared['scores']), max(prepared['scores'])
+
+    def hline(value, style, label):
+        return [f'\\addplot[{style}] coordinates {{({first},{_num(value)}) ({last},{_num(value)})}};',
+                f'\\addlegendentry{{{escape(label)}}}']
+
+    def band(xs, ys, color, label):
+        return [f'\\addplot[draw=none, fill={color}, fill opacity=0.08, area legend] '
+                f'coordinates {{{_coordinates(xs, ys)}}} -- cycle;',
+                f'\\addlegendentry{{{escape(label)}}}']
+
+    plots = [f'\\addplot[color=black!80, mark=*, mark size=1pt, thin] coordinates {{{_coordinates(ranks, scores)}}};',
+             r'\addlegendentry{Relevance Score}']
+    if prepared['median'] is not None:
+        plots += hline(prepared['median'], 'dashed, black!60', f"Median: {prepared['median']:.1%}")
+    elbow = prepared['elbow']
+    if elbow:
+        plots += [f"\\addplot[densely dotted, thick, black!80] coordinates {{({elbow['rank']},{_num(low)}) "
+                  f"({elbow['rank']},{_num(high)})}};",
+                  f"\\addlegendentry{{Cut-off point (elbow): rank {elbow['rank']}}}"]
+        plots += hline(elbow['score'], 'dashed, thick, color=screethreshold',
+                       f"Confidence Threshold (score = {elbow['score']:.2f})")
+    elbow_ci = prepared.get('elbow_ci')
+    if elbow_ci:
+        level = f"{elbow_ci['confidence']:.0%}"
+        (rank_low, rank_high), (score_low, score_high) = elbow_ci['rank'], elbow_ci['score']
+        plots += band([rank_low, rank_high, rank_high, rank_low], [low, low, high, high], 'black',
+                      f'Elbow {level} CI: ranks {rank_low}-{rank_high}')
+        plots += band([first, last, last, first], [score_low, score_low, score_high, score_high],
+                      'screethreshold', f'Threshold {level} CI: {score_low:.2f}-{score_high:.2f}')
+    for key, label, style in (('top10', 'Top 10%', 'dashdotted, black!40'), ('top25', 'Top 25%', 'dotted, black!40')):
+        if key in prepared['quantiles']:
+            plots += hline(prepared['quantiles'][key], style, f"{label} (>= {prepared['quantiles'][key]:.2f})")
+    return _colors({'screethreshold': '#c0392b'}) + '\n' + _axis(
+        COMMON_AXIS + ['title={Priority Screening Score Distribution (Scree Plot)}', 'xlabel={Reference Rank}',
+                       'ylabel={Relevance Score}', 'ymajorgrids', 'grid style={black!10}',
+                       'legend pos=north east'], plots)
+
+
+def temporal_pgfplots(prepared):
+    years, counts = prepared['years'], prepared['counts']
+    if not years:
+        return None
+    plots = [f'\\addplot[ybar, bar width=0.6, fill=temporalbar, draw=black!80, nodes near coords, '
+             f'every node near coord/.append style={{font=\\scriptsize\\bfseries}}] '
+             f'coordinates {{{_coordinates(years, counts)}}};',
+             r'\addlegendentry{Studies}']
+    if prepared['trend']:
+        # Sampled in Python: pgf arithmetic overflows on squared years
+        coefficients = prepared['trend']
+        xs = [years[0] + (years[-1] - years[0]) * i / 49 for i in range(50)]
+        ys = [sum(c * x ** (len(coefficients) - 1 - i) for i, c in enumerate(coefficients)) for x in xs]
+        plots += [f'\\addplot[dashed, thick, color=temporaltrend, no markers, smooth] '
+                  f'coordinates {{{_coordinates(xs, ys)}}};',
+                  r'\addlegendentry{Trend}']
+    return _colors({'temporalbar': '#4a90e2', 'temporaltrend': '#e74c3c'}) + '\n' + _axis(
+        COMMON_AXIS + ['title={Temporal Distribution of Included Studies}', 'xlabel={Publication Year}',
+                       'ylabel={Number of Studies}', 'ymin=0', 'enlarge x limits=0.08',
+                       f"xtick={{{','.join(str(y) for y in years)}}}",
+                       'xticklabel style={rotate=45, anchor=north east, /pgf/number format/1000 sep={}}',
+                       'ymajorgrids', 'grid style={black!10}', 'legend pos=north west'], plots)
+
+
+def quality_pgfplots(prepared):
+    if not prepared['questions']:
+        return None
+    positions = list(range(len(prepared['questions'])))
+    plots = []
+    for key, label, color in (('yes', 'Yes', 'qualityyes'), ('partial', 'Partial', 'qualitypartial'),
+                              ('no', 'No', 'qualityno')):
+        plots += [f'\\addplot[fill={color}, draw=black!80] coordinates {{{_coordinates(positions, prepared[key])}}};',
+                  f'\\addlegendentry{{{label}}}']
+    return _colors({'qualityyes': '#27ae60', 'qualitypartial': '#f39c12', 'qualityno': '#e74c3c'}) + '\n' + _axis(
+        COMMON_AXIS + ['ybar stacked', 'bar width=0.6', 'title={Methodological Quality Assessment}',
+                       'xlabel={Quality Criteria (Kitchenham)}', 'ylabel={Number of Studies}', 'ymin=0',
+                       f"xtick={{{','.join(str(p) for p in positions)}}}",
+                       f"xticklabels={{{_labels(prepared['questions'])}}}",
+                       'enlarge x limits=0.1', 'ymajorgrids', 'grid style={black!10}',
+                       'legend columns=3', 'legend pos=north east'], plots)
+
+
+def keywords_pgfplots(prepared):
+    # Highest frequency at the top
+    keywords, counts = prepared['keywords'][::-1], prepared['counts'][::-1]
+    if not keywords:
+        return None
+    positions = list(range(len(keywords)))
+    plots = [f'\\addplot[xbar, fill=keywordbar, draw=black!80, nodes near coords, '
+             f'every node near coord/.append style={{font=\\scriptsize\\bfseries}}] '
+             f'coordinates {{{_coordinates(counts, positions)}}};']
+    return _colors({'keywordbar': '#3498db'}) + '\n' + _axis(
+        COMMON_AXIS[:1] + [f'height={max(4, len(keywords) * 0.5 + 2) / 10:.2f}\\linewidth'] + COMMON_AXIS[2:] +
+        ['bar width=0.6', 'title={Thematic Keyword Concentration in Included Studies}',
+         'xlabel={Frequency (number of studies)}', 'xmin=0', 'enlarge x limits={upper, value=0.15}',
+         f"ytick={{{','.join(str(p) for p in positions)}}}", f'yticklabels={{{_labels(keywords)}}}',
+         'y tick label style={font=\\footnotesize}', 'xmajorgrids', 'grid style={black!10, dashed}'], plots)
+
+
+# Input section -> builder of its LaTeX code from the prepared data
+TIKZ_BUILDERS = {
+    'prisma': prisma_tikz,
+    'scree': scree_pgfplots,
+    'temporal_distribution': temporal_pgfplots,
+    'quality_assessment': quality_pgfplots,
+    'bubble_chart': keywords_pgfplots,
+}
+
+
+def tikz_code(section, prepared):
+    """LaTeX code of one chart, or None when its prepared data has nothing to plot."""
+    return TIKZ_BUILDERS[section](prepared)
@@ -0,0 +1,316 @@
+"""
+Duplicate detection for the references of a project.
+
+Reads {"references": [{"id", "title", "authors", "year", "doi", "source"}, ...]}
+from stdin and writes the result of DetectDuplicatesUseCase to stdout:
+    {"duplicates": [id, ...], "groups": [...], "stats": {...}}
+
+Instead of comparing every pair of references, only candidate pairs are verified:
+  1. DOI blocking      references with the same normalized DOI
+  2. exact titles      references with the same normalized title
+  3. MinHash + LSH     MinHash signatures of the character 3-grams of each title
+                       (without 3-grams common to many titles), split into bands;
+                       references sharing a band bucket are candidates (titles with a
+                       3-gram Jaccard similarity around 0.3 or more almost always share one)
+Up to EXHAUSTIVE_MAX references every pair is a candidate instead, which gives exactly
+the Node result. Candidates are then checked with the same rule as the Node use case
+(_areDuplicates: DOI, Levenshtein title similarity, authors and year), after cheap lower
+bounds of the edit distance (character and bigram counts) discard hopeless pairs, and
+grouped the same way: in input order, each reference collects the later ones that
+duplicate it.
+"""
+
+import json
+import math
+import re
+import sys
+import unicodedata
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+SHINGLE_SIZE = 3
+BANDS = 90
+ROWS = 3  # rows per band; BANDS * ROWS MinHash permutations
+# Largest prime below 2**32: a * x + b stays below 2**64 for 32-bit shingle hashes
+PRIME = 4294967291
+SEED = 42
+COMMON_SHINGLE_SHARE = 0.1
+COMMON_SHINGLE_MIN = 20
+BIGRAM_BUCKETS = 512
+# Up to this many references every pair is a candidate (no LSH)
+EXHAUSTIVE_MAX = 500
+
+
+def normalize_title(title):
+    """Lowercase, without accents, punctuation or repeated spaces (Node _normalizeTitle)."""
+    if not title:
+        return ''
+    title = unicodedata.normalize('NFD', title.lower())
+    title = re.sub('[\u0300-\u036f]', '', title)
+    title = re.sub(r'[^a-z0-9\s]', '', title)
+    return re.sub(r'\s+', ' ', title).strip()
+
+
+def normalize_doi(doi):
+    if not doi:
+        return ''
+    return re.sub(r'https?://(dx\.)?doi\.org/', '', doi.lower(), flags=re.IGNORECASE).strip()
+
+
+def levenshtein(a, b):
+    """
+    Edit distance of a and b with the bit-parallel algorithm of Myers/Hyyrö: one column
+    of the DP table is a pair of integer bit vectors, so each character of b costs a
+    handful of integer operations instead of a loop over a.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    # a is the pattern (one bit per character), b is walked character by character
+    peq = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+def js_round(value):
+    """Math.round: halves round up."""
+    return math.floor(value + 0.5)
+
+
+def title_similarity(t1, t2, minimum=0):
+    """
+    Similarity (0-100) of two normalized titles (Node _calculateSimilarity), or None
+    when it is below minimum.
+    """
+    if t1 == t2:
+        return 100
+    longest = max(len(t1), len(t2))
+    # The distance is at least the length difference
+    if js_round((longest - abs(len(t1) - len(t2))) / longest * 100) < minimum:
+        return None
+    similarity = js_round((longest - levenshtein(t1, t2)) / longest * 100)
+    return similarity if similarity >= minimum else None
+
+
+def same_authors(authors1, authors2):
+    """At least half of the (normalized) authors match (Node _sameAuthors)."""
+    if not authors1 or not authors2:
+        return False
+    a1 = authors1 if isinstance(authors1, list) else [authors1]
+    a2 = authors2 if isinstance(authors2, list) else [authors2]
+
+    def normalize(author):
+        return re.sub(r'[^a-z\s]', '', str(author).lower()).strip()
+
+    set1, set2 = {normalize(a) for a in a1}, {normalize(a) for a in a2}
+    return len(set1 & set2) / max(len(set1), len(set2)) >= 0.5
+
+
+def doi_key(ref):
+    doi = ref.get('doi')
+    return normalize_doi(doi) if isinstance(doi, str) and doi.strip() else None
+
+
+def are_duplicates(ref1, ref2, t1, t2):
+    """Node _areDuplicates, on pre-normalized titles; returns the title similarity or None."""
+    key = doi_key(ref1)
+    if key is not None and ref2.get('doi') and key == normalize_doi(ref2['doi']):
+        return title_similarity(t1, t2)
+    similarity = title_similarity(t1, t2, minimum=75)
+    if similarity is None:
+        return None
+    if similarity >= 85:
+        return similarity
+    if similarity >= 75 and same_authors(ref1.get('authors'), ref2.get('authors')):
+        return similarity
+    if similarity >= 80 and ref1.get('year') == ref2.get('year'):
+        return similarity
+    return None
+
+
+def shingle_hashes(title):
+    """CRC32 of the distinct character 3-grams of a title (the title itself when shorter)."""
+    shingles = {title[i:i + SHINGLE_SIZE] for i in range(len(title) - SHINGLE_SIZE + 1)} or {title}
+    return [zlib.crc32(s.encode('utf-8')) for s in shingles]
+
+
+def minhash_signatures(titles):
+    """(len(titles), BANDS * ROWS) MinHash signatures, one universal hash per column."""
+    hashes = [shingle_hashes(title) for title in titles]
+    lengths = np.fromiter((len(h) for h in hashes), dtype=np.int64, count=len(hashes))
+    values = np.fromiter((v for h in hashes for v in h), dtype=np.uint64, count=int(lengths.sum()))
+
+    # 3-grams of stop words ('the', ' of', 'ing') make unrelated titles look similar and
+    # flood the buckets; shingles found in more than COMMON_SHINGLE_SHARE of the titles are
+    # left out, except for titles made only of such shingles
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    keep = counts[inverse] <= max(COMMON_SHINGLE_MIN, COMMON_SHINGLE_SHARE * len(titles))
+    owner = np.repeat(np.arange(len(titles)), lengths)
+    kept = np.bincount(owner[keep], minlength=len(titles))
+    keep |= kept[owner] == 0
+    values, lengths = values[keep], np.bincount(owner[keep], minlength=len(titles))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, PRIME, size=BANDS * ROWS, dtype=np.uint64)
+    b = rng.integers(0, PRIME, size=BANDS * ROWS, dtype=np.uint64)
+    signatures = np.empty((len(titles), BANDS * ROWS), dtype=np.uint64)
+    # One permutation at a time over every shingle: memory stays at one column of hashes
+    for k in range(BANDS * ROWS):
+        signatures[:, k] = np.minimum.reduceat((a[k] * values + b[k]) % PRIME, offsets)
+    return signatures
+
+
+def candidate_buckets(references, titles):
+    """Buckets of reference indexes that may be duplicates (DOI, exact title, LSH bands)."""
+    buckets = defaultdict(list)
+    for i, ref in enumerate(references):
+        key = doi_key(ref)
+        if key is not None:
+            buckets[('doi', key)].append(i)
+        buckets[('title', titles[i])].append(i)
+    shared = [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+    signatures = minhash_signatures(titles)
+    for band in range(BANDS):
+        # Each band row as one opaque value, so np.unique groups identical rows
+        rows = np.ascontiguousarray(signatures[:, band * ROWS:(band + 1) * ROWS])
+        _, inverse, counts = np.unique(rows.view(np.dtype((np.void, rows.itemsize * ROWS))).ravel(),
+                                       return_inverse=True, return_counts=True)
+        members = np.nonzero(counts[inverse] > 1)[0]
+        if not len(members):
+            continue
+        members = members[np.argsort(inverse[members], kind='stable')]
+        starts = np.nonzero(np.diff(inverse[members], prepend=-1))[0]
+        shared.extend(np.split(members, starts[1:]))
+    return shared
+
+
+def text_histograms(titles):
+    """
+    Character counts (128 columns, the normalized titles are ASCII) and bigram counts
+    (hashed into BIGRAM_BUCKETS columns) of every title.
+    """
+    chars = np.zeros((len(titles), 128), dtype=np.int16)
+    bigrams = np.zeros((len(titles), BIGRAM_BUCKETS), dtype=np.int16)
+    for i, title in enumerate(titles):
+        codes = np.frombuffer(title.encode('ascii'), dtype=np.uint8).astype(np.int64)
+        chars[i] = np.bincount(codes, minlength=128)
+        bigrams[i] = np.bincount((codes[:-1] * 131 + codes[1:]) % BIGRAM_BUCKETS, minlength=BIGRAM_BUCKETS)
+    return chars, bigrams
+
+
+def _count_difference(histograms, i, js):
+    diff = histograms[js] - histograms[i]
+    return np.maximum(np.maximum(diff, 0).sum(axis=1), np.maximum(-diff, 0).sum(axis=1))
+
+
+def may_be_similar(chars, bigrams, i, js, minimum=75):
+    """
+    Mask of the js whose title can still reach `minimum` similarity with title i, from
+    lower bounds of the edit distance: each character one title has more of than the
+    other needs an edit, and one edit changes at most two bigrams (hashing bigrams into
+    buckets only lowers the difference). Pairs over the bound skip the Levenshtein check.
+    """
+    bound = np.maximum(_count_difference(chars, i, js), (_count_difference(bigrams, i, js) + 1) // 2)
+    longest = np.maximum(chars[js].sum(axis=1), chars[i].sum())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        best = np.floor((longest - bound) / longest * 100 + 0.5)
+    return (best >= minimum) | (longest == 0)
+
+
+def detect_duplicates(references):
+    """Same result as DetectDuplicatesUseCase.execute, without marking anything."""
+    if len(references) < 2:
+        return {'duplicates': [], 'groups': [],
+                'stats': {'total': len(references), 'unique': len(references), 'duplicates': 0, 'duplicateGroups': 0}}
+
+    titles = [normalize_title(ref.get('title')) for ref in references]
+    if len(references) <= EXHAUSTIVE_MAX:
+        # Few enough to check every pair against the edit-distance bounds: same result as Node
+        buckets = [np.arange(len(references))]
+    else:
+        buckets = candidate_buckets(references, titles)
+    buckets_of = defaultdict(list)
+    for bucket in buckets:
+        for i in bucket:
+            buckets_of[i].append(bucket)
+
+    chars, bigrams = text_histograms(titles)
+    dois = [normalize_doi(ref['doi']) if ref.get('doi') else None for ref in references]
+
+    groups = []
+    processed = set()
+    for i, ref in enumerate(references):
+        if i in processed:
+            continue
+        # Candidates are gathered only for references not yet grouped, so a large bucket of
+        # identical titles is expanded once, by its first reference
+        candidates = np.unique(np.concatenate(buckets_of[i])) if i in buckets_of else ()
+        candidates = candidates[candidates > i] if len(candidates) else candidates
+        if not len(candidates):
+            continue
+        plausible = may_be_similar(chars, bigrams, i, candidates)
+        key = doi_key(ref)
+        duplicates = []
+        for j, similar in zip(candidates.tolist(), plausible.tolist()):
+            if j in processed or not (similar or (key is not None and dois[j] == key)):
+                continue
+            similarity = are_duplicates(ref, references[j], titles[i], titles[j])
+            if similarity is not None:
+                other = references[j]
+                duplicates.append({'id': other.get('id'), 'title': other.get('title'), 'authors': other.get('authors'),
+                                   'year': other.get('year'), 'doi': other.get('doi'),
+                                   'source': other.get('source') or other.get('database'),
+                                   'similarity': similarity})
+                processed.add(j)
+        if duplicates:
+            groups.append({'originalId': ref.get('id'), 'originalTitle': ref.get('title'),
+                           'duplicates': duplicates, 'count': len(duplicates) + 1})
+            processed.add(i)
+
+    duplicate_ids = [d['id'] for group in groups for d in group['duplicates']]
+    return {
+        'duplicates': duplicate_ids,
+        'groups': groups,
+        'stats': {'total': len(references), 'unique': len(references) - len(duplicate_ids),
+                  'duplicates': len(duplicate_ids), 'duplicateGroups': len(groups)},
+    }
+
+
+def main():
+    try:
+        payload = json.loads(sys.stdin.read())
+    except json.JSONDecodeError:
+        print("Error: Invalid JSON input", file=sys.stderr)
+        sys.exit(1)
+    references = payload.get('references', []) if isinstance(payload, dict) else payload
+    result = detect_duplicates(references)
+    print(f"{result['stats']['duplicates']} duplicates in {result['stats']['duplicateGroups']} groups "
+          f"among {len(references)} references", file=sys.stderr)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Persistent embedding store for embeddings screening.
+
+A reference's title/abstract/keywords do not change after import, so its embedding
+only needs to be computed once per model. A store is a directory with
+  vectors.bin   rows of `dim` float32 values (or float16: half the size, ~1e-4 precision),
+                append-only, read through np.memmap
+  index.json    {"model", "dim", "dtype", "rows", "ids": {id: [row, content_hash]}}
+One store per project and model (PythonEmbeddingsService.storeDir picks the directory), so the
+rows of a project are the whole matrix and screening reads them as a memmap view,
+without copying them into memory.
+
+A reference whose text changed gets a new row; the old one stays in the file as a
+dead row until `compact` rewrites the file with the live rows only (done on `put`
+once dead rows outnumber live ones). Rows are written before the index, so a crash
+leaves at most unindexed bytes at the end of vectors.bin, cut off on the next write.
+
+Commands (JSON on stdin, JSON on stdout):
+  missing --store DIR   {"model", "references": [{"id", "text"}]}  -> {"missing": [id, ...], "stored": n}
+  put --store DIR       {"model", "references": [{"id", "text", "embedding"}]} -> {"appended", "rows", "live"}
+  compact --store DIR   -> {"rows", "live"}
+Scoring from a store is done by screen_embeddings.py --store DIR.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer assumed
+    fcntl = None
+
+DEFAULT_DTYPE = 'float32'
+VECTORS_FILE = 'vectors.bin'
+INDEX_FILE = 'index.json'
+LOCK_FILE = '.lock'
+
+
+def content_hash(text):
+    """Short digest of the text an embedding was computed from."""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()[:16]
+
+
+class EmbeddingStore:
+    """
+    Embeddings of one project for one model. `ids` maps a reference id to its
+    (row, content hash); rows not in `ids` are dead and dropped by compact().
+    """
+
+    def __init__(self, path, model=None, dtype=DEFAULT_DTYPE):
+        self.path = path
+        self.vectors_path = os.path.join(path, VECTORS_FILE)
+        self.index_path = os.path.join(path, INDEX_FILE)
+        os.makedirs(path, exist_ok=True)
+        index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+        if model and index.get('model') not in (None, model):
+            # Embeddings of another model are not comparable: start over
+            index = {}
+        self.model = model or index.get('model')
+        self.dim = index.get('dim')
+        self.dtype = np.dtype(index.get('dtype', dtype))
+        self.rows = index.get('rows', 0)
+        self.ids = {ref_id: tuple(entry) for ref_id, entry in index.get('ids', {}).items()}
+
+    @property
+    def live(self):
+        return len(self.ids)
+
+    def missing(self, references):
+        """Ids of the references (dicts with id and text) with no embedding for their current text."""
+        return [ref['id'] for ref in references
+                if self.ids.get(ref['id'], (None, None))[1] != content_hash(ref.get('text'))]
+
+    def matrix(self):
+        """All rows as a read-only memmap (dead rows included); no data is read until used."""
+        if self.rows == 0:
+            return np.empty((0, self.dim or 0), dtype=self.dtype)
+        return np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(self.rows, self.dim))
+
+    def rows_of(self, ids):
+        """Row numbers of ids in the matrix; KeyError for ids not in the store."""
+        return np.fromiter((self.ids[ref_id][0] for ref_id in ids), dtype=np.intp, count=len(ids))
+
+    def vectors(self, ids):
+        """
+        Embeddings of ids. When they are consecutive rows in order (a compacted store
+        read in insertion order) this is a slice of the memmap, otherwise a copy.
+        """
+        rows = self.rows_of(ids)
+        if len(rows) and np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            return self.matrix()[rows[0]:rows[0] + len(rows)]
+        return self.matrix()[rows]
+
+    def append(self, references):
+        """Append the embeddings of references (dicts with id, text, embedding); returns the count."""
+        if not references:
+            return 0
+        block = np.array([ref['embedding'] for ref in references], dtype=self.dtype)
+        if block.ndim != 2:
+            raise ValueError("All embeddings must have the same length")
+        if self.dim is None:
+            self.dim = block.shape[1]
+        elif block.shape[1] != self.dim:
+            raise ValueError(f"Embedding size {block.shape[1]} does not match the store ({self.dim})")
+
+        with open(self.vectors_path, 'ab') as f:
+            # Drop bytes left by an interrupted write before appending
+            f.truncate(self.rows * self.dim * self.dtype.itemsize)
+            f.write(block.tobytes())
+        for offset, ref in enumerate(references):
+            self.ids[ref['id']] = (self.rows + offset, content_hash(ref.get('text')))
+        self.rows += len(references)
+        self.save()
+        return len(references)
+
+    def compact(self):
+        """Rewrite the file with the live rows only, in their current order."""
+        if self.rows == self.live:
+            return
+        order = sorted(self.ids.items(), key=lambda item: item[1][0])
+        rows = np.fromiter((row for _, (row, _) in order), dtype=np.intp, count=len(order))
+        tmp_path = self.vectors_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(self.matrix()[rows]).tobytes())
+        os.replace(tmp_path, self.vectors_path)
+        self.ids = {ref_id: (new_row, digest) for new_row, (ref_id, (_, digest)) in enumerate(order)}
+        self.rows = len(order)
+        self.save()
+
+    def save(self):
+        index = {
+            'model': self.model,
+            'dim': self.dim,
+            'dtype': self.dtype.name,
+            'rows': self.rows,
+            'ids': {ref_id: list(entry) for ref_id, entry in self.ids.items()},
+        }
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+@contextmanager
+def locked(path, shared=False):
+    """
+    Lock on the store directory: exclusive while it is changed, shared (readers
+    only, e.g. screen_embeddings.py --store) while it is only read.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent embedding store for screening')
+    parser.add_argument('command', choices=['missing', 'put', 'compact'])
+    parser.add_argument('--store', required=True, help='Store directory (one per project and model)')
+    parser.add_argument('--dtype', default=DEFAULT_DTYPE, choices=['float16', 'float32'],
+                        help='Storage type of a new store')
+    args = parser.parse_args()
+
+    payload = {}
+    if args.command != 'compact':
+        try:
+            payload = json.loads(sys.stdin.read())
+        except json.JSONDecodeError:
+            print("Error: Invalid JSON input", file=sys.stderr)
+            sys.exit(1)
+    references = payload.get('references', [])
+
+    with locked(args.store):
+        store = EmbeddingStore(args.store, payload.get('model'), args.dtype)
+        if args.command == 'missing':
+            result = {'missing': store.missing(references), 'stored': store.live}
+        elif args.command == 'put':
+            try:
+                appended = store.append(references)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            if store.rows - store.live > store.live:
+                store.compact()
+            result = {'appended': appended, 'rows': store.rows, 'live': store.live}
+        else:
+            store.compact()
+            result = {'rows': store.rows, 'live': store.live}
+
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
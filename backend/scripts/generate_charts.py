@@ -4,6 +4,12 @@ import json
 
 import os
 
+from chart_runtime import activate, register_fonts
+
+# Deploy-time build of fonts, font cache and bytecode (chart_runtime.py); must precede matplotlib
+
+CHART_RUNTIME = activate()
+
 import matplotlib
 
 matplotlib.use('Agg')
@@ -22,6 +28,44 @@ import numpy as np
 
 import argparse
 
+import hashlib
+
+import shutil
+
+import threading
+
+from collections import OrderedDict
+
+from contextlib import nullcontext
+
+from functools import lru_cache
+
+from matplotlib.backends.backend_agg import RendererAgg
+
+from matplotlib.collections import Collection
+
+from matplotlib.lines import Line2D
+
+from matplotlib.font_manager import FontProperties
+
+from chart_profiling import create_profiler
+
+from chart_pool import FigurePool
+
+from chart_db import DB_SECTIONS, DEFAULT_DB_SECTIONS, ChartDatabase
+
+from chart_runner import ChartRunner, ResourceLimits
+
+from chart_scene import Scene
+
+from chart_sinks import create_sink
+
+from chart_specs import SPEC_BUILDERS, SPEC_FORMATS, chart_spec, spec_extension, write_spec
+
+from chart_sprite import SPRITE_FILENAME, build_sprite
+
+from chart_tikz import TIKZ_BUILDERS, tikz_code
+
 
 
 # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Estilo acadÃƒÂ©mico global (similar a revistas cientÃƒÂ­ficas) Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
@@ -56,1608 +100,3928 @@ plt.rcParams.update({
 
     'lines.markersize': 5,
 
-})
+    # Fixed salt so SVG element ids are identical between runs
 
+    'svg.hashsalt': 'rsl-charts',
 
+})
 
-def ensure_dir(directory):
+if CHART_RUNTIME:
 
-    if not os.path.exists(directory):
+    # The bundled serif resolves first instead of probing the fallback chain on every host
 
-        os.makedirs(directory)
+    register_fonts(CHART_RUNTIME)
 
 
 
-def save_figure(fig, output_path, **kwargs):
+# Formats written by save_figure (PNG is always the primary output)
 
-    """
+OUTPUT_FORMATS = ['png', 'pdf']
 
-    Save figure in both PNG and PDF (vector) formats.
 
-    The PNG path is the primary output; PDF is saved alongside automatically.
 
-    """
+# Resolution of the PNG output (and of rasterized layers in vector outputs)
 
-    defaults = {'dpi': 300, 'bbox_inches': 'tight', 'facecolor': 'white', 'edgecolor': 'none'}
+RASTER_DPI = 300
 
-    defaults.update(kwargs)
 
-    # Save PNG (raster)
 
-    fig.savefig(output_path, **defaults)
+# 'tight': tight_layout + bbox_inches='tight' (two extra draw passes per format).
 
-    # Save PDF (vector) alongside
+# 'fixed': every chart applies its precomputed margins and is saved as-is.
 
-    pdf_path = os.path.splitext(output_path)[0] + '.pdf'
+LAYOUT_MODE = 'tight'
 
-    pdf_kwargs = {k: v for k, v in defaults.items() if k != 'dpi'}
 
-    pdf_kwargs['format'] = 'pdf'
 
-    try:
+# Metadata overrides that strip creation timestamps, so an unchanged chart
 
-        fig.savefig(pdf_path, **pdf_kwargs)
+# is byte-identical between runs and its content hash can be cached
 
-    except Exception as e:
+STABLE_METADATA = {
 
-        print(f"Ã¢Å¡Â Ã¯Â¸Â  Could not save PDF vector version: {e}", file=sys.stderr)
+    'png': {},
 
+    'pdf': {'CreationDate': None},
 
+    'svg': {'Date': None},
 
-def draw_prisma(data, output_path):
+}
 
-    """
 
-    PRISMA 2020 Flow Diagram Ã¢â‚¬â€ Based on Page et al., 2021 standard.
 
-    Colored header, phase labels, and detailed database breakdown.
+# Lines, collections and per-axes patch layers with more points than this are
 
-    """
+# rasterized inside vector outputs (axes, text and annotations stay vector); 0 = never
 
-    print(f"DEBUG Python - Received data keys: {data.keys()}", file=sys.stderr)
+RASTERIZE_THRESHOLD = 1000
 
-    print(f"DEBUG Python - databases value: {data.get('databases', [])}", file=sys.stderr)
 
-    print(f"DEBUG Python - identified value: {data.get('identified', 0)}", file=sys.stderr)
 
-    
+# Bump whenever the placeholder look changes (fonts, colors, sizes) so cached
 
-    fig, ax = plt.subplots(figsize=(11, 12))
+# placeholder assets are rendered again instead of reused
 
-    ax.set_xlim(0, 100)
+PLACEHOLDER_STYLE_VERSION = 1
 
-    ax.set_ylim(0, 100)
 
-    ax.axis('off')
 
+# Shared directory of prebuilt placeholder charts (set from --asset-dir)
 
+ASSET_DIR = None
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ PRISMA 2020 Color Palette Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
 
-    HEADER_COLOR = '#f4d03f'  # Yellow/gold header
 
-    PHASE_IDENTIFICATION = '#5dade2'  # Blue
+# Reusable figures for the warm worker mode (--worker); None = plain pyplot figures
 
-    PHASE_SCREENING = '#5dade2'  # Blue
+FIGURE_POOL = None
 
-    PHASE_INCLUDED = '#5dade2'  # Blue
 
-    BOX_MAIN = '#abebc6'  # Light green for main flow
 
-    BOX_EXCLUDED = '#fadbd8'  # Light pink for exclusions
+# Persistent scenes of the warm worker, (chart, output_path) -> Scene, least recently
 
-    BOX_EDGE = '#34495e'  # Dark gray edges
+# used first; None = every draw starts from a new figure
 
-    ARROW_COLOR = '#2c3e50'
+SCENES = None
 
+MAX_SCENES = 32
 
+# What the current worker job did to each kept scene (Scene.stats per chart), reported as 'scenes'
 
-    def draw_box(x, y, w, h, text, bg_color='#ffffff', fontsize=8, align='center'):
+SCENE_STATS = {}
 
-        """Draw a rectangular box with text."""
 
-        rect = FancyBboxPatch((x, y), w, h, boxstyle="square,pad=0",
 
-                              linewidth=1.0, edgecolor=BOX_EDGE, facecolor=bg_color)
+def ensure_dir(directory):
 
-        ax.add_patch(rect)
+    if not os.path.exists(directory):
 
-        # Split text by newlines and draw each line
+        os.makedirs(directory)
 
-        lines = text.split('\n')
 
-        if len(lines) == 1:
 
-            ax.text(x + w/2, y + h/2, text, ha='center', va='center',
+def chart_figure(chart, figsize):
 
-                    fontsize=fontsize, family='serif', wrap=True)
+    """New figure for `chart`, taken from FIGURE_POOL when the worker pool is active."""
 
-        else:
+    if FIGURE_POOL is not None:
 
-            # Calculate vertical spacing
+        return FIGURE_POOL.acquire(chart, figsize)
 
-            line_spacing = fontsize * 0.30  # Proper spacing based on font size
+    return plt.figure(figsize=figsize)
 
-            total_text_height = len(lines) * line_spacing
 
-            # Center the text block vertically in the box
 
-            start_y = y + h/2 + total_text_height/2 - line_spacing/2
+def chart_subplots(chart, figsize):
 
-            
+    fig = chart_figure(chart, figsize)
 
-            for i, line in enumerate(lines):
+    return fig, fig.add_subplot()
 
-                ha = 'left' if align == 'left' else 'center'
 
-                x_pos = x + 2 if align == 'left' else x + w/2
 
-                y_pos = start_y - i * line_spacing
+def close_figure(fig):
 
-                ax.text(x_pos, y_pos, line, ha=ha, va='center',
+    """Return a pooled figure to FIGURE_POOL, or close a pyplot figure."""
 
-                        fontsize=fontsize, family='serif')
+    if FIGURE_POOL is not None:
 
+        FIGURE_POOL.release(fig)
 
+    else:
 
-    def draw_header(x, y, w, h, text):
+        plt.close(fig)
 
-        """Draw yellow header bar."""
 
-        rect = FancyBboxPatch((x, y), w, h, boxstyle="square,pad=0",
 
-                              linewidth=1.2, edgecolor=BOX_EDGE, facecolor=HEADER_COLOR)
+def open_scene(chart, output_path, figsize):
 
-        ax.add_patch(rect)
+    """
 
-        ax.text(x + w/2, y + h/2, text, ha='center', va='center',
+    Scene to draw `chart` into. In the worker the figure last drawn for the same
 
-                fontsize=9, fontweight='bold', family='serif')
+    output is reused, so only the artists whose data changed are touched.
 
+    """
 
+    scene = SCENES.get((chart, output_path)) if SCENES is not None else None
 
-    def draw_phase_label(x, y, w, h, label, color):
+    if scene is not None and tuple(scene.fig.get_size_inches()) != tuple(figsize):
 
-        """Draw colored phase label on the left side."""
+        close_figure(SCENES.pop((chart, output_path)).fig)
 
-        rect = FancyBboxPatch((x, y), w, h, boxstyle="square,pad=0",
+        scene = None
 
-                              linewidth=1.0, edgecolor=BOX_EDGE, facecolor=color)
+    if scene is None:
 
-        ax.add_patch(rect)
+        scene = Scene(*chart_subplots(chart, figsize))
 
-        ax.text(x + w/2, y + h/2, label, ha='center', va='center',
+    scene.begin()
 
-                fontsize=9, fontweight='bold', family='serif',
+    return scene
 
-                rotation=90, color='white')
 
 
+def save_scene(scene, output_path):
 
-    def draw_arrow(x1, y1, x2, y2):
+    """
 
-        """Draw a downward arrow."""
+    save_figure for a scene. A kept scene whose artists did not change since it
 
-        ax.annotate("", xy=(x2, y2), xytext=(x1, y1),
+    last wrote output_path, and whose files are still intact, is not encoded again.
 
-                    arrowprops=dict(arrowstyle="-|>", color=ARROW_COLOR,
+    """
 
-                                    lw=1.5, mutation_scale=15))
+    settings = (RASTER_DPI, tuple(OUTPUT_FORMATS))
 
+    if SCENES is not None and not scene.dirty and scene.saved == (settings, output_hashes(output_path)):
 
+        return
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Data extraction Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    save_figure(scene.fig, output_path)
 
-    identified = data.get('identified', 0)
+    scene.saved = (settings, output_hashes(output_path)) if SCENES is not None else None
 
-    databases = data.get('databases', [])  # List of {name, hits}
 
-    duplicates = data.get('duplicates', 0)
 
-    screened = data.get('screened', 0)
+def close_scene(chart, output_path, scene):
 
-    excluded = data.get('excluded', 0)
+    """Keep the scene for the next regeneration (worker) or close its figure."""
 
-    retrieved = data.get('retrieved', 0)
+    if SCENES is None:
 
-    not_retrieved = data.get('not_retrieved', 0)
+        close_figure(scene.fig)
 
-    assessed = data.get('assessed', 0)
+        return
 
-    excluded_reasons = data.get('excluded_reasons', {})
+    SCENE_STATS[chart] = dict(scene.stats)
 
-    screening_exclusion_reasons = data.get('screening_exclusion_reasons', {})
+    SCENES[(chart, output_path)] = scene
 
-    protocol_exclusion_criteria = data.get('protocol_exclusion_criteria', [])
+    SCENES.move_to_end((chart, output_path))
 
-    included = data.get('included', 0)
+    while len(SCENES) > MAX_SCENES:
 
-    
+        close_figure(SCENES.popitem(last=False)[1].fig)
 
-    # Usar excluded_fulltext si está disponible, de lo contrario calcularlo (evitando negativos)
 
-    excluded_fulltext = data.get('excluded_fulltext', max(0, assessed - included))
 
-    
+def save_figure(fig, output_path, **kwargs):
 
-    print(f"[DEBUG] DEBUG draw_prisma - identified: {identified}", file=sys.stderr)
+    """
 
-    print(f"[DEBUG] DEBUG draw_prisma - databases: {databases}", file=sys.stderr)
+    Save figure in PNG plus the vector formats listed in OUTPUT_FORMATS (PDF by default).
 
-    print(f"[DEBUG] DEBUG draw_prisma - len(databases): {len(databases)}", file=sys.stderr)
+    The PNG path is the primary output; vector versions are saved alongside automatically.
 
-    print(f"[DEBUG] DEBUG draw_prisma - screened: {screened}", file=sys.stderr)
+    """
 
-    print(f"[DEBUG] DEBUG draw_prisma - excluded: {excluded}", file=sys.stderr)
+    defaults = {'dpi': RASTER_DPI, 'bbox_inches': 'tight' if LAYOUT_MODE == 'tight' else None,
 
-    print(f"[DEBUG] DEBUG draw_prisma - assessed: {assessed}", file=sys.stderr)
+                'facecolor': 'white', 'edgecolor': 'none'}
 
-    print(f"[DEBUG] DEBUG draw_prisma - excluded_fulltext: {excluded_fulltext}", file=sys.stderr)
+    defaults.update(kwargs)
 
-    print(f"[DEBUG] DEBUG draw_prisma - included: {included}", file=sys.stderr)
+    # Save PNG (raster)
 
+    detach_output(output_path)
 
+    fig.savefig(output_path, metadata=STABLE_METADATA['png'], **defaults)
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Layout constants Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    # Save vector versions alongside; dpi only applies to rasterized dense layers
 
-    PHASE_X, PHASE_W = 2, 7
+    rasterized = rasterize_dense_layers(fig)
 
-    MAIN_X, MAIN_W = 14, 34
+    vector_kwargs = {k: v for k, v in defaults.items() if k != 'dpi' or rasterized}
 
-    EXCL_X, EXCL_W = 62, 32
+    for fmt in OUTPUT_FORMATS:
 
-    CENTER = MAIN_X + MAIN_W / 2
+        if fmt == 'png':
 
-    GAP = 6
+            continue
 
+        vector_path = os.path.splitext(output_path)[0] + '.' + fmt
 
+        try:
 
-    y = 94  # Start from top
+            detach_output(vector_path)
 
+            fig.savefig(vector_path, format=fmt, metadata=STABLE_METADATA[fmt], **vector_kwargs)
 
+        except Exception as e:
 
-    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â YELLOW HEADER Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+            print(f"Could not save {fmt.upper()} vector version: {e}", file=sys.stderr)
 
-    draw_header(MAIN_X, y, MAIN_W, 3, 'New studies via databases and registers')
 
-    y -= 4
 
+def layer_size(artist):
 
+    """Number of points an artist puts in a vector file (markers, vertices)."""
 
-    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â IDENTIFICATION PHASE Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+    if isinstance(artist, Line2D):
 
-    # Calculate height based on number of databases
+        return len(artist.get_xdata())
 
-    id_box_h = max(10, 5 + len(databases) * 1.2)
+    if isinstance(artist, Collection):
 
-    draw_phase_label(PHASE_X, y - id_box_h, PHASE_W, id_box_h + 3, 'Identification', PHASE_IDENTIFICATION)
+        return max(len(artist.get_offsets()), sum(len(path.vertices) for path in artist.get_paths()))
 
-    
+    return 0
 
-    # Main identification box with database breakdown
 
-    id_text_lines = []
 
-    if databases and len(databases) > 0:
+def rasterize_dense_layers(fig):
 
-        id_text_lines.append('Records identified from:')
+    """
 
-        for db in databases:
+    Mark dense layers for rasterization in vector outputs: lines and collections above
 
-            db_name = db.get('name', 'Unknown')
+    RASTERIZE_THRESHOLD points, and the patches of axes holding more patches than that.
 
-            db_hits = db.get('hits', 0)
+    Rasterization a draw function chose itself is left alone; a layer marked here on an
 
-            id_text_lines.append(f'  {db_name} (n = {db_hits})')
+    earlier save (a pooled or retained figure) and no longer dense goes back to vector.
 
-    else:
+    Returns the number of artists that will be rasterized.
 
-        id_text_lines.append('Records identified from')
+    """
 
-        id_text_lines.append('database searches')
+    rasterized = 0
 
-    id_text_lines.append(f'\nTotal records (n = {identified})')
+    for ax in fig.axes:
 
-    
+        dense_patches = RASTERIZE_THRESHOLD > 0 and len(ax.patches) > RASTERIZE_THRESHOLD
 
-    draw_box(MAIN_X, y - id_box_h, MAIN_W, id_box_h, '\n'.join(id_text_lines), 
+        layers = [(artist, dense_patches) for artist in ax.patches]
 
-             bg_color=BOX_MAIN, fontsize=7.5, align='left')
+        layers += [(artist, RASTERIZE_THRESHOLD > 0 and layer_size(artist) > RASTERIZE_THRESHOLD)
 
-    
+                   for artist in list(ax.lines) + list(ax.collections)]
 
-    # Records removed before screening (side box)
+        for artist, dense in layers:
 
-    removed_h = 8
+            if dense:
 
-    removed_y = y - id_box_h/2 - removed_h/2
+                artist.set_rasterized(True)
 
-    removed_text = 'Records removed before screening:\n\n'
+                artist._dense_rasterized = True
 
-    removed_text += f'  Duplicate records (n = {duplicates})\n'
+            elif getattr(artist, '_dense_rasterized', False):
 
-    # removed_text += f'  Records marked as ineligible (n = 0)\n'
+                artist.set_rasterized(False)
 
-    # removed_text += f'  Other reasons (n = 0)'
+                artist._dense_rasterized = False
 
-    draw_box(EXCL_X, removed_y, EXCL_W, removed_h, removed_text, 
+            rasterized += artist.get_rasterized()
 
-             bg_color=BOX_EXCLUDED, fontsize=7, align='left')
+    return rasterized
 
-    
 
-    # Arrow from identification to removed box
 
-    ax.plot([MAIN_X + MAIN_W, EXCL_X], [y - id_box_h/2, removed_y + removed_h/2],
+def detach_output(path):
 
-            color=ARROW_COLOR, linewidth=1.2)
+    """Unlink an output hardlinked to a shared placeholder asset, so writing it cannot modify the asset."""
 
-    
+    if os.path.exists(path) and os.stat(path).st_nlink > 1:
 
-    y -= id_box_h + GAP
+        os.remove(path)
 
-    draw_arrow(CENTER, y + GAP - 1, CENTER, y + 1)
 
 
+def save_placeholder(output_path, message, figsize, color='#666666'):
 
-    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â SCREENING PHASE Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+    """
 
-    scr_h = 8
+    Save an empty-state chart showing only `message`.
 
-    draw_phase_label(PHASE_X, y - scr_h, PHASE_W, scr_h + 3, 'Screening', PHASE_SCREENING)
+    Each distinct placeholder is rendered once per style version into ASSET_DIR and then
 
-    
+    hardlinked (or copied, across filesystems) to output_path, so empty states cost a
 
-    scr_text = f'Records screened\n(title and abstract)\n(n = {screened})'
+    few filesystem calls instead of a 300-DPI render per format.
 
-    draw_box(MAIN_X, y - scr_h, MAIN_W, scr_h, scr_text, bg_color=BOX_MAIN, fontsize=8)
+    """
 
-    
+    if ASSET_DIR is None:
 
-    # Excluded records (side) with breakdown by reasons
+        render_placeholder(output_path, message, figsize, color)
 
-    exc_scr_h = 6
+        return
 
-    exc_scr_y = y - scr_h/2 - exc_scr_h/2
+    key = json.dumps([PLACEHOLDER_STYLE_VERSION, matplotlib.__version__, LAYOUT_MODE, RASTER_DPI, message, figsize, color])
 
-    
+    asset_base = os.path.join(ASSET_DIR, 'placeholder-' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:16])
 
-    if screening_exclusion_reasons and len(screening_exclusion_reasons) > 0:
+    missing = [fmt for fmt in OUTPUT_FORMATS if not os.path.exists(f"{asset_base}.{fmt}")]
 
-        exc_lines = [f'Records excluded (n = {excluded})']
+    if missing:
 
-        exc_lines.append('')
+        # Render under a per-process name and rename into place: concurrent chart
 
-        for reason, count in screening_exclusion_reasons.items():
+        # processes never see a half-written asset
 
-            exc_lines.append(f'  {reason} (n = {count})')
+        ensure_dir(ASSET_DIR)
 
-        exc_scr_h = max(6, len(exc_lines) * 1.3 + 3)
+        tmp_base = f"{asset_base}.{os.getpid()}.tmp"
 
-        exc_scr_y = y - scr_h/2 - exc_scr_h/2
+        render_placeholder(tmp_base + '.png', message, figsize, color)
 
-        draw_box(EXCL_X, exc_scr_y, EXCL_W, exc_scr_h, '\n'.join(exc_lines),
+        for fmt in missing:
 
-                 bg_color=BOX_EXCLUDED, fontsize=7, align='left')
+            if os.path.exists(f"{tmp_base}.{fmt}"):
 
-    else:
+                os.replace(f"{tmp_base}.{fmt}", f"{asset_base}.{fmt}")
 
-        exc_text = f'Records excluded\n(n = {excluded})'
+        for fmt in OUTPUT_FORMATS:
 
-        draw_box(EXCL_X, exc_scr_y, EXCL_W, exc_scr_h, exc_text, 
+            if os.path.exists(f"{tmp_base}.{fmt}"):
 
-                 bg_color=BOX_EXCLUDED, fontsize=7.5)
+                os.remove(f"{tmp_base}.{fmt}")
 
-    ax.plot([MAIN_X + MAIN_W, EXCL_X], [y - scr_h/2, exc_scr_y + exc_scr_h/2],
+    base = os.path.splitext(output_path)[0]
 
-            color=ARROW_COLOR, linewidth=1.2)
+    for fmt in OUTPUT_FORMATS:
 
-    
+        if not os.path.exists(f"{asset_base}.{fmt}"):
 
-    y -= scr_h + GAP
+            continue
 
-    draw_arrow(CENTER, y + GAP - 1, CENTER, y + 1)
+        target = f"{base}.{fmt}"
 
+        if os.path.exists(target):
 
+            os.remove(target)
 
-    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â REPORTS SOUGHT FOR RETRIEVAL Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+        try:
 
-    retr_h = 7
+            os.link(f"{asset_base}.{fmt}", target)
 
-    retr_text = f'Reports sought for retrieval\n(n = {retrieved})'
+        except OSError:
 
-    draw_box(MAIN_X, y - retr_h, MAIN_W, retr_h, retr_text, bg_color=BOX_MAIN, fontsize=8)
+            shutil.copyfile(f"{asset_base}.{fmt}", target)
 
-    
 
-    # Not retrieved (side)
 
-    if not_retrieved > 0:
+def render_placeholder(output_path, message, figsize, color='#666666'):
 
-        nr_h = 5
+    fig, ax = chart_subplots('placeholder', figsize)
 
-        nr_y = y - retr_h/2 - nr_h/2
+    ax.text(0.5, 0.5, message,
 
-        nr_text = f'Reports not retrieved\n(n = {not_retrieved})'
+            ha='center', va='center', fontsize=12, color=color, family='serif')
 
-        draw_box(EXCL_X, nr_y, EXCL_W, nr_h, nr_text, 
+    ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
 
-                 bg_color=BOX_EXCLUDED, fontsize=7.5)
+    save_figure(fig, output_path)
 
-        ax.plot([MAIN_X + MAIN_W, EXCL_X], [y - retr_h/2, nr_y + nr_h/2],
+    close_figure(fig)
 
-                color=ARROW_COLOR, linewidth=1.2)
 
-    
 
-    y -= retr_h + GAP
+# --- Text metrics ---
 
-    draw_arrow(CENTER, y + GAP - 1, CENTER, y + 1)
+# Strings are measured once per (text, size, family, weight) on a private 72-dpi
 
+# Agg renderer, so extents come out in points, and kept in an LRU cache. Box
 
+# heights, line wrapping and table column widths are derived from these values.
 
-    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â ELIGIBILITY (Reports assessed) Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+_measure_renderer = None
 
-    assess_h = 7
 
-    assess_text = f'Reports assessed for eligibility\n(n = {assessed})'
 
-    draw_box(MAIN_X, y - assess_h, MAIN_W, assess_h, assess_text, bg_color=BOX_MAIN, fontsize=8)
+@lru_cache(maxsize=8192)
 
-    
+def text_extent(text, fontsize, family='serif', weight='normal'):
 
-    # Excluded with reasons (side) - usar excluded_fulltext ya calculado
+    """(width, height, descent) of a single line of text, in points."""
 
-    total_exc = excluded_fulltext
+    global _measure_renderer
 
-    exc_reasons_lines = []
+    if _measure_renderer is None:
 
-    
+        _measure_renderer = RendererAgg(1, 1, 72)
 
-    if excluded_reasons and len(excluded_reasons) > 0:
+    prop = FontProperties(family=family, size=fontsize, weight=weight)
 
-        # Format: Excluded (n=X) then list reasons
+    return _measure_renderer.get_text_width_height_descent(text, prop, ismath=False)
 
-        exc_reasons_lines.append(f'Reports excluded (n = {total_exc})')
 
-        exc_reasons_lines.append('')  # blank line
 
-        for reason, count in excluded_reasons.items():
+def text_width(text, fontsize, family='serif', weight='normal'):
 
-            exc_reasons_lines.append(f'  {reason} (n = {count})')
+    return text_extent(text, fontsize, family, weight)[0]
 
-    elif protocol_exclusion_criteria and len(protocol_exclusion_criteria) > 0:
 
-        # Show protocol criteria with n=0 each
 
-        exc_reasons_lines.append(f'Reports excluded (n = {total_exc})')
+def line_height(fontsize, family='serif', weight='normal', spacing=1.2):
 
-        exc_reasons_lines.append('')
+    """Baseline-to-baseline distance in points."""
 
-        for criteria in protocol_exclusion_criteria:
+    return text_extent('Ag', fontsize, family, weight)[1] * spacing
 
-            exc_reasons_lines.append(f'  {criteria} (n = 0)')
 
-    else:
 
-        if total_exc > 0:
+def wrap_text(text, max_width, fontsize, family='serif', weight='normal'):
 
-            exc_reasons_lines.append(f'Reports excluded\n(n = {total_exc})')
+    """
 
-        else:
+    Greedy word wrap of every line of text to max_width points.
 
-            exc_reasons_lines.append(f'Reports excluded (n = 0)')
+    Words are measured individually through the cache; leading indentation is kept.
 
-            exc_reasons_lines.append('')
+    Returns the list of output lines.
 
-            exc_reasons_lines.append('  No reports excluded at this stage')
+    """
 
-    
+    space = text_width('a a', fontsize, family, weight) - text_width('aa', fontsize, family, weight)
 
-    exc_ft_h = max(7, len(exc_reasons_lines) * 1.3 + 3)
+    lines = []
 
-    exc_ft_y = y - assess_h/2 - exc_ft_h/2
+    for paragraph in text.split('\n'):
 
-    draw_box(EXCL_X, exc_ft_y, EXCL_W, exc_ft_h, '\n'.join(exc_reasons_lines),
+        words = paragraph.split()
 
-             bg_color=BOX_EXCLUDED, fontsize=7, align='left')
+        if not words:
 
-    ax.plot([MAIN_X + MAIN_W, EXCL_X], [y - assess_h/2, exc_ft_y + exc_ft_h/2],
+            lines.append('')
 
-            color=ARROW_COLOR, linewidth=1.2)
+            continue
 
-    
+        indent = paragraph[:len(paragraph) - len(paragraph.lstrip(' '))]
 
-    y -= assess_h + GAP
+        current = indent + words[0]
 
-    draw_arrow(CENTER, y + GAP - 1, CENTER, y + 1)
+        width = text_width(current, fontsize, family, weight)
 
+        for word in words[1:]:
 
+            word_w = text_width(word, fontsize, family, weight)
 
-    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â INCLUDED Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+            if width + space + word_w <= max_width:
 
-    inc_h = 8
+                current += ' ' + word
 
-    draw_phase_label(PHASE_X, y - inc_h, PHASE_W, inc_h + 3, 'Included', PHASE_INCLUDED)
+                width += space + word_w
 
-    
+            else:
 
-    # Two boxes side by side for included studies
+                lines.append(current)
 
-    inc_left_w = MAIN_W / 2 - 1
+                current = indent + word
 
-    inc1_text = f'New studies included\nin review\n(n = {included})'
+                width = text_width(current, fontsize, family, weight)
 
-    draw_box(MAIN_X, y - inc_h, inc_left_w, inc_h, inc1_text, bg_color=BOX_MAIN, fontsize=8)
+        lines.append(current)
 
-    
+    return lines
 
-    inc2_text = f'Reports of new\nincluded studies\n(n = {included})'
 
-    draw_box(MAIN_X + inc_left_w + 2, y - inc_h, inc_left_w, inc_h, inc2_text, 
 
-             bg_color=BOX_MAIN, fontsize=8)
+def fit_column_widths(rows, fontsize, total_width, flexible=(), pad=12, family='serif'):
 
+    """
 
+    Column widths from the widest measured line in each column (rows[0] is the
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Adjust visible area Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    bold header row). Columns in `flexible` share whatever width the others leave
 
-    ax.set_ylim(y - inc_h - 3, 98)
+    over; widths are scaled so they sum to total_width.
 
+    """
 
+    widths = []
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Title Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    for col in range(len(rows[0])):
 
-    plt.suptitle('PRISMA 2020 Flow Diagram', fontsize=13, fontweight='bold',
+        widest = max(text_width(line, fontsize, family, 'bold' if i == 0 else 'normal')
 
-                 family='serif', y=0.98)
+                     for i, row in enumerate(rows) for line in str(row[col]).split('\n'))
 
-    plt.figtext(0.5, 0.96, 'Study selection process according to Page et al. (2021)',
+        widths.append(widest + pad)
 
-                ha='center', fontsize=8, fontstyle='italic', family='serif', color='#555555')
+    if flexible:
 
+        used = sum(w for col, w in enumerate(widths) if col not in flexible)
 
+        share = max(total_width * 0.3, total_width - used) / len(flexible)
 
-    plt.tight_layout(rect=[0, 0.01, 1, 0.95])
+        for col in flexible:
 
-    save_figure(fig, output_path)
+            widths[col] = share
 
-    plt.close()
+    scale = total_width / sum(widths)
 
+    return [w * scale for w in widths]
 
 
-def draw_scree(data, output_path):
+
+def finalize_layout(fig, margins, hspace=None, wspace=None, **tight_kwargs):
 
     """
 
-    Priority Screening Score Distribution (Scree/Elbow Plot).
+    Lay out a finished chart.
 
-    Academic journal style: serif fonts, clean axes, minimal colors.
+    In 'fixed' mode the chart's precomputed margins (left, right, bottom, top; inches,
 
-    """
+    derived by each draw_* function from its inputs) are applied directly, skipping
 
-    scores = sorted(data.get('scores', []), reverse=True)
+    the tight_layout pass. Otherwise tight_layout(**tight_kwargs) runs as before.
 
+    """
 
+    if LAYOUT_MODE == 'fixed':
 
-    if not scores:
+        width, height = fig.get_size_inches()
 
-        print("Ã¢Å¡Â Ã¯Â¸Â  No scores available for scree plot generation", file=sys.stderr)
+        left, right, bottom, top = margins
 
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig.subplots_adjust(left=left / width, right=1 - right / width,
 
-        ax.text(0.5, 0.5, 'No relevance data available',
+                            bottom=bottom / height, top=1 - top / height,
 
-                ha='center', va='center', fontsize=12, color='#666666', family='serif')
+                            hspace=hspace, wspace=wspace)
 
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
+    else:
 
-        save_figure(fig, output_path)
+        fig.tight_layout(**tight_kwargs)
 
-        plt.close()
 
-        return
 
+def file_sha256(path):
 
+    """SHA-256 of a file's content, read in chunks."""
 
-    if len(scores) < 3:
+    digest = hashlib.sha256()
 
-        print(f"Ã¢Å¡Â Ã¯Â¸Â  Insufficient scores ({len(scores)})", file=sys.stderr)
+    with open(path, 'rb') as f:
 
-        fig, ax = plt.subplots(figsize=(8, 5))
+        for chunk in iter(lambda: f.read(65536), b''):
 
-        ax.text(0.5, 0.5, f'Insufficient data ({len(scores)} points)\nSe requieren al menos 3 referencias',
+            digest.update(chunk)
 
-                ha='center', va='center', fontsize=12, color='#996600', family='serif')
+    return digest.hexdigest()
 
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
 
-        save_figure(fig, output_path)
 
-        plt.close()
+def output_hashes(output_path):
 
-        return
+    """Content hash of every file save_figure wrote for a chart, keyed by filename."""
 
+    base = os.path.splitext(output_path)[0]
 
+    hashes = {}
 
-    df = pd.DataFrame({'Rank': list(range(1, len(scores) + 1)), 'Score': scores})
+    for fmt in OUTPUT_FORMATS:
 
+        path = base + '.' + fmt
 
+        if os.path.exists(path):
 
-    fig, ax = plt.subplots(figsize=(8, 5))
+            hashes[os.path.basename(path)] = file_sha256(path)
 
+    return hashes
 
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Main line plot Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
 
-    ax.plot(df['Rank'], df['Score'], 'o-', color='#333333', markersize=4,
+def prepare_prisma(data):
 
-            markerfacecolor='#333333', markeredgecolor='#333333', linewidth=1.2,
+    """
 
-            label='Relevance Score', zorder=3)
+    PRISMA 2020 counts and the text of every flow box, keyed by box name (identified,
 
+    removed, screened, excluded, retrieved, not_retrieved, assessed, excluded_fulltext,
 
+    included, included_reports). not_retrieved is None when no report was missing.
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Fill under curve (very subtle) Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    Indented lines are breakdown items; an empty line separates a box title from them.
 
-    ax.fill_between(df['Rank'], df['Score'], color='#cccccc', alpha=0.3, zorder=1)
+    """
 
+    identified = data.get('identified', 0)
 
+    databases = data.get('databases', [])  # List of {name, hits}
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Median Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    duplicates = data.get('duplicates', 0)
 
-    median_score = float(df['Score'].median())
+    screened = data.get('screened', 0)
 
-    ax.axhline(y=median_score, color='#666666', linestyle='--', linewidth=0.8,
+    excluded = data.get('excluded', 0)
 
-               alpha=0.8, label=f'Median: {median_score:.1%}', zorder=2)
+    retrieved = data.get('retrieved', 0)
 
+    not_retrieved = data.get('not_retrieved', 0)
 
+    assessed = data.get('assessed', 0)
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Elbow (Knee) detection Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    excluded_reasons = data.get('excluded_reasons', {})
 
-    x1, y1 = 1, scores[0]
+    screening_exclusion_reasons = data.get('screening_exclusion_reasons', {})
 
-    x2, y2 = len(scores), scores[-1]
+    protocol_exclusion_criteria = data.get('protocol_exclusion_criteria', [])
 
-    A = y1 - y2
+    included = data.get('included', 0)
+
+    
+
+    # Usar excluded_fulltext si está disponible, de lo contrario calcularlo (evitando negativos)
+
+    excluded_fulltext = data.get('excluded_fulltext', max(0, assessed - included))
+
+    boxes = {}
+
+
+
+    # Main identification box with database breakdown
+
+    id_text_lines = []
+
+    if databases and len(databases) > 0:
+
+        id_text_lines.append('Records identified from:')
+
+        for db in databases:
+
+            db_name = db.get('name', 'Unknown')
+
+            db_hits = db.get('hits', 0)
+
+            id_text_lines.append(f'  {db_name} (n = {db_hits})')
+
+    else:
+
+        id_text_lines.append('Records identified from')
+
+        id_text_lines.append('database searches')
+
+    id_text_lines.append(f'\nTotal records (n = {identified})')
+
+    boxes['identified'] = '\n'.join(id_text_lines)
+
+    
+
+    # Records removed before screening (side box)
+
+    removed_text = 'Records removed before screening:\n\n'
+
+    removed_text += f'  Duplicate records (n = {duplicates})\n'
+
+    # removed_text += f'  Records marked as ineligible (n = 0)\n'
+
+    # removed_text += f'  Other reasons (n = 0)'
+
+    boxes['removed'] = removed_text
+
+
+
+    boxes['screened'] = f'Records screened\n(title and abstract)\n(n = {screened})'
+
+    
+
+    # Excluded records (side) with breakdown by reasons
+
+    if screening_exclusion_reasons and len(screening_exclusion_reasons) > 0:
+
+        exc_lines = [f'Records excluded (n = {excluded})']
+
+        exc_lines.append('')
+
+        for reason, count in screening_exclusion_reasons.items():
+
+            exc_lines.append(f'  {reason} (n = {count})')
+
+        boxes['excluded'] = '\n'.join(exc_lines)
+
+    else:
+
+        boxes['excluded'] = f'Records excluded\n(n = {excluded})'
+
+
+
+    boxes['retrieved'] = f'Reports sought for retrieval\n(n = {retrieved})'
+
+    boxes['not_retrieved'] = f'Reports not retrieved\n(n = {not_retrieved})' if not_retrieved > 0 else None
+
+    boxes['assessed'] = f'Reports assessed for eligibility\n(n = {assessed})'
+
+    
+
+    # Excluded with reasons (side) - usar excluded_fulltext ya calculado
+
+    total_exc = excluded_fulltext
+
+    exc_reasons_lines = []
+
+    
+
+    if excluded_reasons and len(excluded_reasons) > 0:
+
+        # Format: Excluded (n=X) then list reasons
+
+        exc_reasons_lines.append(f'Reports excluded (n = {total_exc})')
+
+        exc_reasons_lines.append('')  # blank line
+
+        for reason, count in excluded_reasons.items():
+
+            exc_reasons_lines.append(f'  {reason} (n = {count})')
+
+    elif protocol_exclusion_criteria and len(protocol_exclusion_criteria) > 0:
+
+        # Show protocol criteria with n=0 each
+
+        exc_reasons_lines.append(f'Reports excluded (n = {total_exc})')
+
+        exc_reasons_lines.append('')
+
+        for criteria in protocol_exclusion_criteria:
+
+            exc_reasons_lines.append(f'  {criteria} (n = 0)')
+
+    else:
+
+        if total_exc > 0:
+
+            exc_reasons_lines.append(f'Reports excluded\n(n = {total_exc})')
+
+        else:
+
+            exc_reasons_lines.append(f'Reports excluded (n = 0)')
+
+            exc_reasons_lines.append('')
+
+            exc_reasons_lines.append('  No reports excluded at this stage')
+
+    boxes['excluded_fulltext'] = '\n'.join(exc_reasons_lines)
+
+
+
+    boxes['included'] = f'New studies included\nin review\n(n = {included})'
+
+    boxes['included_reports'] = f'Reports of new\nincluded studies\n(n = {included})'
+
+
+
+    counts = {'identified': identified, 'duplicates': duplicates, 'screened': screened, 'excluded': excluded,
+
+              'retrieved': retrieved, 'not_retrieved': not_retrieved, 'assessed': assessed,
+
+              'excluded_fulltext': excluded_fulltext, 'included': included}
+
+    return {'counts': counts, 'boxes': boxes}
+
+
+
+def draw_prisma(data, output_path):
+
+    """
+
+    PRISMA 2020 Flow Diagram Ã¢â‚¬â€ Based on Page et al., 2021 standard.
+
+    Colored header, phase labels, and detailed database breakdown.
+
+    """
+
+    print(f"DEBUG Python - Received data keys: {data.keys()}", file=sys.stderr)
+
+    print(f"DEBUG Python - databases value: {data.get('databases', [])}", file=sys.stderr)
+
+    print(f"DEBUG Python - identified value: {data.get('identified', 0)}", file=sys.stderr)
+
+    
+
+    scene = open_scene('prisma', output_path, (11, 12))
+
+    fig, ax = scene.fig, scene.ax
+
+    ax.set_xlim(0, 100)
+
+    ax.set_ylim(0, 100)
+
+    ax.axis('off')
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ PRISMA 2020 Color Palette Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    HEADER_COLOR = '#f4d03f'  # Yellow/gold header
+
+    PHASE_IDENTIFICATION = '#5dade2'  # Blue
+
+    PHASE_SCREENING = '#5dade2'  # Blue
+
+    PHASE_INCLUDED = '#5dade2'  # Blue
+
+    BOX_MAIN = '#abebc6'  # Light green for main flow
+
+    BOX_EXCLUDED = '#fadbd8'  # Light pink for exclusions
+
+    BOX_EDGE = '#34495e'  # Dark gray edges
+
+    ARROW_COLOR = '#2c3e50'
+
+
+
+    # Data units per point: the axes spans the figure minus the layout pad, and its
+
+    # y range is at most 100 units (it is only narrowed at the end)
+
+    X_PER_PT = 100 / (11 * 72 - 22)
+
+    Y_PER_PT = 100 / (12 * 72 * 0.94 - 22)
+
+    BOX_HPAD, BOX_VPAD = 2, 1.5
+
+    LINE_SPACING = 1.5
+
+
+
+    def box_lines(text, w, fontsize):
+
+        """Text lines wrapped to the inner width of a box, from cached text metrics."""
+
+        return wrap_text(text.rstrip('\n'), (w - 2 * BOX_HPAD) / X_PER_PT, fontsize)
+
+
+
+    def fit_height(text, w, fontsize, min_h):
+
+        """Smallest box height (data units, at least min_h) that fits the wrapped text."""
+
+        n_lines = len(box_lines(text, w, fontsize))
+
+        return max(min_h, n_lines * line_height(fontsize, spacing=LINE_SPACING) * Y_PER_PT + 2 * BOX_VPAD)
+
+
+
+    def draw_box(name, x, y, w, h, text, bg_color='#ffffff', fontsize=8, align='center'):
+
+        """Draw a rectangular box with text wrapped and spaced from measured extents."""
+
+        scene.artist(name, lambda: ax.add_patch(FancyBboxPatch((x, y), w, h, boxstyle="square,pad=0",
+
+                                                               linewidth=1.0, edgecolor=BOX_EDGE, facecolor=bg_color)),
+
+                     x=x, y=y, width=w, height=h, facecolor=bg_color)
+
+        lines = box_lines(text, w, fontsize)
+
+        line_spacing = line_height(fontsize, spacing=LINE_SPACING) * Y_PER_PT
+
+        total_text_height = len(lines) * line_spacing
+
+        # Center the text block vertically in the box
+
+        start_y = y + h/2 + total_text_height/2 - line_spacing/2
+
+        
+
+        for i, line in enumerate(lines):
+
+            ha = 'left' if align == 'left' else 'center'
+
+            x_pos = x + BOX_HPAD if align == 'left' else x + w/2
+
+            y_pos = start_y - i * line_spacing
+
+            scene.text(f'{name}:{i}', x_pos, y_pos, line, ha=ha, va='center',
+
+                       fontsize=fontsize, family='serif')
+
+
+
+    def draw_header(x, y, w, h, text):
+
+        """Draw yellow header bar."""
+
+        scene.artist('header', lambda: ax.add_patch(FancyBboxPatch((x, y), w, h, boxstyle="square,pad=0",
+
+                                                                   linewidth=1.2, edgecolor=BOX_EDGE, facecolor=HEADER_COLOR)),
+
+                     x=x, y=y, width=w, height=h)
+
+        scene.text('header:text', x + w/2, y + h/2, text, ha='center', va='center',
+
+                   fontsize=9, fontweight='bold', family='serif')
+
+
+
+    def draw_phase_label(x, y, w, h, label, color):
+
+        """Draw colored phase label on the left side."""
+
+        scene.artist(f'phase:{label}', lambda: ax.add_patch(FancyBboxPatch((x, y), w, h, boxstyle="square,pad=0",
+
+                                                                           linewidth=1.0, edgecolor=BOX_EDGE, facecolor=color)),
+
+                     x=x, y=y, width=w, height=h, facecolor=color)
+
+        scene.text(f'phase:{label}:text', x + w/2, y + h/2, label, ha='center', va='center',
+
+                   fontsize=9, fontweight='bold', family='serif',
+
+                   rotation=90, color='white')
+
+
+
+    def draw_arrow(name, x1, y1, x2, y2):
+
+        """Draw a downward arrow."""
+
+        scene.artist(name, lambda: ax.annotate("", xy=(x2, y2), xytext=(x1, y1),
+
+                                               arrowprops=dict(arrowstyle="-|>", color=ARROW_COLOR,
+
+                                                               lw=1.5, mutation_scale=15)),
+
+                     rebuild_on=(x1, y1, x2, y2))
+
+
+
+    def draw_connector(name, x1, y1, x2, y2):
+
+        """Draw the line from a main box to its side box."""
+
+        scene.line(name, [x1, x2], [y1, y2], color=ARROW_COLOR, linewidth=1.2)
+
+
+
+    # Box texts and counts, see prepare_prisma
+
+    prepared = prepare_prisma(data)
+
+    boxes = prepared['boxes']
+
+    identified, screened, excluded, assessed, excluded_fulltext, included = (
+
+        prepared['counts'][key] for key in ('identified', 'screened', 'excluded', 'assessed',
+
+                                            'excluded_fulltext', 'included'))
+
+    databases = data.get('databases', [])  # List of {name, hits}
+
+    screening_exclusion_reasons = data.get('screening_exclusion_reasons', {})
+
+    
+
+    print(f"[DEBUG] DEBUG draw_prisma - identified: {identified}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - databases: {databases}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - len(databases): {len(databases)}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - screened: {screened}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - excluded: {excluded}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - assessed: {assessed}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - excluded_fulltext: {excluded_fulltext}", file=sys.stderr)
+
+    print(f"[DEBUG] DEBUG draw_prisma - included: {included}", file=sys.stderr)
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Layout constants Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    PHASE_X, PHASE_W = 2, 7
+
+    MAIN_X, MAIN_W = 14, 34
+
+    EXCL_X, EXCL_W = 62, 32
+
+    CENTER = MAIN_X + MAIN_W / 2
+
+    GAP = 6
+
+
+
+    y = 94  # Start from top
+
+
+
+    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â YELLOW HEADER Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+
+    draw_header(MAIN_X, y, MAIN_W, 3, 'New studies via databases and registers')
+
+    y -= 4
+
+
+
+    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â IDENTIFICATION PHASE Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+
+    # Main identification box with database breakdown
+
+    id_text = boxes['identified']
+
+    
+
+    # Height from the measured text (grows with the number of databases)
+
+    id_box_h = fit_height(id_text, MAIN_W, 7.5, min_h=10)
+
+    draw_phase_label(PHASE_X, y - id_box_h, PHASE_W, id_box_h + 3, 'Identification', PHASE_IDENTIFICATION)
+
+    draw_box('identified', MAIN_X, y - id_box_h, MAIN_W, id_box_h, id_text,
+
+             bg_color=BOX_MAIN, fontsize=7.5, align='left')
+
+    
+
+    # Records removed before screening (side box)
+
+    removed_text = boxes['removed']
+
+    removed_h = fit_height(removed_text, EXCL_W, 7, min_h=8)
+
+    removed_y = y - id_box_h/2 - removed_h/2
+
+    draw_box('removed', EXCL_X, removed_y, EXCL_W, removed_h, removed_text,
+
+             bg_color=BOX_EXCLUDED, fontsize=7, align='left')
+
+    
+
+    # Arrow from identification to removed box
+
+    draw_connector('removed:link', MAIN_X + MAIN_W, y - id_box_h/2, EXCL_X, removed_y + removed_h/2)
+
+    
+
+    y -= id_box_h + GAP
+
+    draw_arrow('arrow:screening', CENTER, y + GAP - 1, CENTER, y + 1)
+
+
+
+    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â SCREENING PHASE Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+
+    scr_h = 8
+
+    draw_phase_label(PHASE_X, y - scr_h, PHASE_W, scr_h + 3, 'Screening', PHASE_SCREENING)
+
+    
+
+    scr_text = boxes['screened']
+
+    draw_box('screened', MAIN_X, y - scr_h, MAIN_W, scr_h, scr_text, bg_color=BOX_MAIN, fontsize=8)
+
+    
+
+    # Excluded records (side) with breakdown by reasons
+
+    exc_scr_h = 6
+
+    exc_scr_y = y - scr_h/2 - exc_scr_h/2
+
+    
+
+    if screening_exclusion_reasons and len(screening_exclusion_reasons) > 0:
+
+        exc_scr_h = fit_height(boxes['excluded'], EXCL_W, 7, min_h=6)
+
+        exc_scr_y = y - scr_h/2 - exc_scr_h/2
+
+        draw_box('excluded', EXCL_X, exc_scr_y, EXCL_W, exc_scr_h, boxes['excluded'],
+
+                 bg_color=BOX_EXCLUDED, fontsize=7, align='left')
+
+    else:
+
+        exc_text = boxes['excluded']
+
+        draw_box('excluded', EXCL_X, exc_scr_y, EXCL_W, exc_scr_h, exc_text,
+
+                 bg_color=BOX_EXCLUDED, fontsize=7.5)
+
+    draw_connector('excluded:link', MAIN_X + MAIN_W, y - scr_h/2, EXCL_X, exc_scr_y + exc_scr_h/2)
+
+    
+
+    y -= scr_h + GAP
+
+    draw_arrow('arrow:retrieval', CENTER, y + GAP - 1, CENTER, y + 1)
+
+
+
+    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â REPORTS SOUGHT FOR RETRIEVAL Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+
+    retr_h = 7
+
+    retr_text = boxes['retrieved']
+
+    draw_box('retrieved', MAIN_X, y - retr_h, MAIN_W, retr_h, retr_text, bg_color=BOX_MAIN, fontsize=8)
+
+    
+
+    # Not retrieved (side)
+
+    if boxes['not_retrieved']:
+
+        nr_h = 5
+
+        nr_y = y - retr_h/2 - nr_h/2
+
+        nr_text = boxes['not_retrieved']
+
+        draw_box('not_retrieved', EXCL_X, nr_y, EXCL_W, nr_h, nr_text,
+
+                 bg_color=BOX_EXCLUDED, fontsize=7.5)
+
+        draw_connector('not_retrieved:link', MAIN_X + MAIN_W, y - retr_h/2, EXCL_X, nr_y + nr_h/2)
+
+    
+
+    y -= retr_h + GAP
+
+    draw_arrow('arrow:eligibility', CENTER, y + GAP - 1, CENTER, y + 1)
+
+
+
+    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â ELIGIBILITY (Reports assessed) Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+
+    assess_h = 7
+
+    assess_text = boxes['assessed']
+
+    draw_box('assessed', MAIN_X, y - assess_h, MAIN_W, assess_h, assess_text, bg_color=BOX_MAIN, fontsize=8)
+
+    
+
+    # Excluded with reasons (side)
+
+    exc_ft_h = fit_height(boxes['excluded_fulltext'], EXCL_W, 7, min_h=7)
+
+    exc_ft_y = y - assess_h/2 - exc_ft_h/2
+
+    draw_box('excluded_fulltext', EXCL_X, exc_ft_y, EXCL_W, exc_ft_h, boxes['excluded_fulltext'],
+
+             bg_color=BOX_EXCLUDED, fontsize=7, align='left')
+
+    draw_connector('excluded_fulltext:link', MAIN_X + MAIN_W, y - assess_h/2, EXCL_X, exc_ft_y + exc_ft_h/2)
+
+    
+
+    y -= assess_h + GAP
+
+    draw_arrow('arrow:included', CENTER, y + GAP - 1, CENTER, y + 1)
+
+
+
+    # Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â INCLUDED Ã¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢ÂÃ¢â€¢Â
+
+    inc_h = 8
+
+    draw_phase_label(PHASE_X, y - inc_h, PHASE_W, inc_h + 3, 'Included', PHASE_INCLUDED)
+
+    
+
+    # Two boxes side by side for included studies
+
+    inc_left_w = MAIN_W / 2 - 1
+
+    inc1_text = boxes['included']
+
+    draw_box('included', MAIN_X, y - inc_h, inc_left_w, inc_h, inc1_text, bg_color=BOX_MAIN, fontsize=8)
+
+    
+
+    inc2_text = boxes['included_reports']
+
+    draw_box('included_reports', MAIN_X + inc_left_w + 2, y - inc_h, inc_left_w, inc_h, inc2_text,
+
+             bg_color=BOX_MAIN, fontsize=8)
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Adjust visible area Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    ax.set_ylim(y - inc_h - 3, 98)
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Title Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    fig.suptitle('PRISMA 2020 Flow Diagram', fontsize=13, fontweight='bold',
+
+                 family='serif', y=0.98)
+
+    scene.artist('subtitle', lambda: fig.text(0.5, 0.96, 'Study selection process according to Page et al. (2021)',
+
+                                              ha='center', fontsize=8, fontstyle='italic', family='serif', color='#555555'))
+
+    scene.finish()
+
+
+
+    finalize_layout(fig, margins=(0.15, 0.15, 0.12, 0.6), rect=[0, 0.01, 1, 0.95])
+
+    save_scene(scene, output_path)
+
+    close_scene('prisma', output_path, scene)
+
+
+
+# Bootstrap of the scree elbow: resamples, interval confidence, fixed seed (same data,
+
+# same band, same chart hash), value groups the scores are reduced to and cells per batch
+
+BOOTSTRAP_RESAMPLES = 2000
+
+BOOTSTRAP_CONFIDENCE = 0.95
+
+BOOTSTRAP_SEED = 42
+
+BOOTSTRAP_GROUPS = 1024
+
+BOOTSTRAP_TAIL = 64
+
+BOOTSTRAP_BATCH_CELLS = 2_000_000
+
+
+
+def bootstrap_elbow(scores, resamples=BOOTSTRAP_RESAMPLES, confidence=BOOTSTRAP_CONFIDENCE, seed=BOOTSTRAP_SEED):
+
+    """
+
+    Bootstrap confidence interval of the elbow of descending scores:
+
+    {'rank': [low, high], 'score': [low, high], 'confidence', 'resamples'}, or None.
+
+
+
+    A resample with replacement of sorted scores is fully described by how many times
+
+    each distinct value is drawn (a multinomial draw), and along a run of equal values
+
+    the distance to the first-last line is linear in the rank, so the farthest point
+
+    is one of the run's two ends. Each resample therefore costs O(distinct values)
+
+    instead of a sort of n scores, and whole batches are drawn and scored as 2-D
+
+    arrays. More than BOOTSTRAP_GROUPS distinct values are reduced to that many
+
+    equal-count groups (their means), which limits the rank resolution to n / groups;
+
+    the BOOTSTRAP_TAIL highest and lowest scores stay single, since a resample's
+
+    extremes fix the line the elbow is measured from.
+
+    """
+
+    n = len(scores)
+
+    values, counts = np.unique(scores, return_counts=True)
+
+    if len(values) < 2:
+
+        return None
+
+    if len(values) > BOOTSTRAP_GROUPS:
+
+        ascending = scores[::-1]
+
+        inner = np.linspace(BOOTSTRAP_TAIL, n - BOOTSTRAP_TAIL, BOOTSTRAP_GROUPS - 2 * BOOTSTRAP_TAIL + 1)
+
+        edges = np.concatenate([np.arange(BOOTSTRAP_TAIL), inner[:-1].round().astype(int),
+
+                                np.arange(n - BOOTSTRAP_TAIL, n)])
+
+        counts = np.diff(np.append(edges, n))
+
+        values = np.add.reduceat(ascending, edges) / counts
+
+    # Highest value first, as the scree is drawn
+
+    values, probabilities = values[::-1], counts[::-1] / n
+
+
+
+    rng = np.random.default_rng(seed)
+
+    batch = max(1, BOOTSTRAP_BATCH_CELLS // len(values))
+
+    ranks, elbow_scores = [], []
+
+    for start in range(0, resamples, batch):
+
+        drawn = rng.multinomial(n, probabilities, size=min(batch, resamples - start))
+
+        last = np.cumsum(drawn, axis=1)
+
+        first = last - drawn + 1
+
+        present = drawn > 0
+
+        # First and last points of each resample: its highest and lowest drawn values
+
+        y1 = values[np.argmax(present, axis=1)]
+
+        y2 = values[len(values) - 1 - np.argmax(present[:, ::-1], axis=1)]
+
+        A = (y1 - y2)[:, None]
+
+        B = n - 1
+
+        C = (y2 - n * y1)[:, None]
+
+        # Distance at both ends of every run, in rank order; empty runs never win
+
+        ends = np.stack([first, last], axis=2)
+
+        distances = np.abs(A[..., None] * ends + B * values[None, :, None] + C[..., None])
+
+        distances[~present] = -1
+
+        best = np.argmax(distances.reshape(len(drawn), -1), axis=1)
+
+        rows = np.arange(len(drawn))
+
+        ranks.append(ends.reshape(len(drawn), -1)[rows, best])
+
+        elbow_scores.append(values[best // 2])
+
+    ranks, elbow_scores = np.concatenate(ranks), np.concatenate(elbow_scores)
+
+
+
+    tail = (1 - confidence) / 2 * 100
+
+    rank_low, rank_high = np.percentile(ranks, [tail, 100 - tail])
+
+    score_low, score_high = np.percentile(elbow_scores, [tail, 100 - tail])
+
+    return {'rank': [int(np.floor(rank_low)), int(np.ceil(rank_high))],
+
+            'score': [float(score_low), float(score_high)],
+
+            'confidence': confidence, 'resamples': resamples}
+
+
+
+def finite_scores(values):
+
+    """The finite numbers of values as a float array, in order; anything else is dropped."""
+
+    if not isinstance(values, (list, tuple, np.ndarray)):
+
+        values = []
+
+    try:
+
+        scores = np.asarray(values, dtype=float)
+
+    except (TypeError, ValueError):
+
+        # Mixed input: convert one by one, unconvertible entries become NaN
+
+        scores = np.asarray([_to_float(value) for value in values], dtype=float)
+
+    if scores.ndim != 1:
+
+        scores = np.asarray([_to_float(value) for value in values], dtype=float)
+
+    finite = np.isfinite(scores)
+
+    if not finite.all():
+
+        print(f"Scree: {int((~finite).sum())} non-numeric score(s) dropped", file=sys.stderr)
+
+    return scores[finite]
+
+
+
+def _to_float(value):
+
+    try:
+
+        return float(value)
+
+    except (TypeError, ValueError):
+
+        return np.nan
+
+
+
+@lru_cache(maxsize=2)
+
+def _elbow_ci(score_bytes):
+
+    # The cut-off, the spec export and the drawing of one chart job prepare the same scores:
+
+    # bootstrap them once
+
+    return bootstrap_elbow(np.frombuffer(score_bytes))
+
+
+
+def prepare_scree(data):
+
+    """
+
+    Scree data: scores sorted descending with their ranks, the median, the elbow
+
+    ({'rank', 'score'}: the score farthest from the line joining the first and last
+
+    score), its bootstrap confidence interval ('elbow_ci', see bootstrap_elbow) and the
+
+    top 10% / 25% score thresholds. Elbow, median and quantiles are None / empty with
+
+    fewer than 3 scores. Ranks and scores are NumPy arrays; data['presorted'] (scores
+
+    read from the database already ordered) skips the sort. Scores that are not finite
+
+    numbers (null, "abc", NaN) are dropped.
+
+    """
+
+    scores = finite_scores(data.get('scores', []))
+
+    if not data.get('presorted'):
+
+        scores = np.sort(scores)[::-1]
+
+    prepared = {'ranks': np.arange(1, len(scores) + 1), 'scores': scores,
+
+                'median': None, 'elbow': None, 'elbow_ci': None, 'quantiles': {}}
+
+    if len(scores) < 3:
+
+        return prepared
+
+
+
+    prepared['median'] = float(np.median(scores))
+
+
+
+    x1, y1 = 1, scores[0]
+
+    x2, y2 = len(scores), scores[-1]
+
+    A = y1 - y2
 
     B = x2 - x1
 
-    C = x1 * y2 - x2 * y1
+    C = x1 * y2 - x2 * y1
+
+    denominator = (A*A + B*B) ** 0.5
+
+
+
+    elbow_idx = -1
+
+    if denominator != 0:
+
+        # argmax keeps the first of equally distant ranks
+
+        distances = np.abs(A*prepared['ranks'] + B*scores + C) / denominator
+
+        elbow_idx = int(np.argmax(distances)) + 1
+
+    if elbow_idx != -1:
+
+        prepared['elbow'] = {'rank': elbow_idx, 'score': scores[elbow_idx - 1]}
+
+        prepared['elbow_ci'] = _elbow_ci(np.ascontiguousarray(scores).tobytes())
+
+
+
+    top_10_idx = max(1, int(len(scores) * 0.1))
+
+    top_25_idx = max(1, int(len(scores) * 0.25))
+
+    prepared['quantiles'] = {'top10': scores[top_10_idx - 1], 'top25': scores[top_25_idx - 1]}
+
+    return prepared
+
+
+
+def draw_scree(data, output_path):
+
+    """
+
+    Priority Screening Score Distribution (Scree/Elbow Plot).
+
+    Academic journal style: serif fonts, clean axes, minimal colors.
+
+    """
+
+    prepared = prepare_scree(data)
+
+    scores = prepared['scores']
+
+
+
+    if len(scores) == 0:
+
+        print("Ã¢Å¡Â Ã¯Â¸Â  No scores available for scree plot generation", file=sys.stderr)
+
+        save_placeholder(output_path, 'No relevance data available', figsize=(8, 5))
+
+        return
+
+
+
+    if len(scores) < 3:
+
+        print(f"Ã¢Å¡Â Ã¯Â¸Â  Insufficient scores ({len(scores)})", file=sys.stderr)
+
+        save_placeholder(output_path, f'Insufficient data ({len(scores)} points)\nSe requieren al menos 3 referencias',
+
+                         figsize=(8, 5), color='#996600')
+
+        return
+
+
+
+    df = pd.DataFrame({'Rank': prepared['ranks'], 'Score': scores})
+
+
+
+    scene = open_scene('scree', output_path, (8, 5))
+
+    fig, ax = scene.fig, scene.ax
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Main line plot Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    # With data['max_points'] (latency budget) only evenly spaced ranks are drawn;
+
+    # median, elbow and quantiles are still computed from every score
+
+    plotted = df
+
+    max_points = data.get('max_points')
+
+    if max_points and len(df) > max_points:
+
+        plotted = df.iloc[np.unique(np.linspace(0, len(df) - 1, max_points).round().astype(int))]
+
+
+
+    scene.line('scores', plotted['Rank'], plotted['Score'], marker='o', linestyle='-', color='#333333', markersize=4,
+
+               markerfacecolor='#333333', markeredgecolor='#333333', linewidth=1.2,
+
+               label='Relevance Score', zorder=3)
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Fill under curve (very subtle) Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    scene.artist('fill', lambda: ax.fill_between(plotted['Rank'], plotted['Score'], color='#cccccc', alpha=0.3, zorder=1),
+
+                 rebuild_on=list(plotted['Score']))
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Median Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    median_score = prepared['median']
+
+    scene.artist('median', lambda: ax.axhline(y=median_score, color='#666666', linestyle='--', linewidth=0.8,
+
+                                              alpha=0.8, label=f'Median: {median_score:.1%}', zorder=2),
+
+                 ydata=[median_score, median_score], label=f'Median: {median_score:.1%}')
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Elbow (Knee) detection Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    if prepared['elbow']:
+
+        elbow_idx = prepared['elbow']['rank']
+
+        scene.artist('elbow', lambda: ax.axvline(x=elbow_idx, color='#333333', linestyle=':', linewidth=1.0,
+
+                                                 alpha=0.7, label=f'Cut-off point (elbow): rank {elbow_idx}', zorder=2),
+
+                     xdata=[elbow_idx, elbow_idx], label=f'Cut-off point (elbow): rank {elbow_idx}')
+
+        # Annotation arrow
+
+        elbow_score = prepared['elbow']['score']
+
+        scene.artist('elbow:note', lambda: ax.annotate(f'Elbow\n(rank = {elbow_idx})',
+
+                                                       xy=(elbow_idx, elbow_score),
+
+                                                       xytext=(elbow_idx + max(1, len(scores)*0.08), elbow_score + 0.05),
+
+                                                       fontsize=8, family='serif', fontstyle='italic',
+
+                                                       arrowprops=dict(arrowstyle='->', color='#333333', lw=0.8),
+
+                                                       ha='left', va='bottom'),
+
+                     rebuild_on=(elbow_idx, elbow_score, len(scores)))
+
+
+
+        # --- Confidence Threshold horizontal line at elbow score ---
+
+        scene.artist('threshold', lambda: ax.axhline(y=elbow_score, color='#c0392b', linestyle='--', linewidth=1.2,
+
+                                                     alpha=0.75, label=f'Confidence Threshold (score = {elbow_score:.2f})', zorder=2),
+
+                     ydata=[elbow_score, elbow_score], label=f'Confidence Threshold (score = {elbow_score:.2f})')
+
+        scene.artist('threshold:note', lambda: ax.annotate(f'Confidence Threshold = {elbow_score:.2f}',
+
+                                                           xy=(len(scores) * 0.6, elbow_score),
+
+                                                           xytext=(len(scores) * 0.6, elbow_score + 0.04),
+
+                                                           fontsize=8, family='serif', fontstyle='italic', color='#c0392b',
+
+                                                           ha='center', va='bottom'),
+
+                     rebuild_on=(elbow_score, len(scores)))
+
+
+
+        # --- Bootstrap confidence band of the cut-off: rank (vertical) and threshold (horizontal) ---
+
+        # Below the fill (zorder 1), which is recreated on every update and would otherwise change places
+
+        elbow_ci = prepared['elbow_ci']
+
+        if elbow_ci:
+
+            level = f"{elbow_ci['confidence']:.0%}"
+
+            (rank_low, rank_high), (score_low, score_high) = elbow_ci['rank'], elbow_ci['score']
+
+            scene.artist('elbow:ci', lambda: ax.axvspan(rank_low, rank_high, color='#333333', alpha=0.08, linewidth=0,
+
+                                                        label=f'Elbow {level} CI: ranks {rank_low}-{rank_high}', zorder=0.5),
+
+                         x=rank_low, width=rank_high - rank_low, label=f'Elbow {level} CI: ranks {rank_low}-{rank_high}')
+
+            scene.artist('threshold:ci', lambda: ax.axhspan(score_low, score_high, color='#c0392b', alpha=0.08, linewidth=0,
+
+                                                            label=f'Threshold {level} CI: {score_low:.2f}-{score_high:.2f}', zorder=0.5),
+
+                         y=score_low, height=score_high - score_low,
+
+                         label=f'Threshold {level} CI: {score_low:.2f}-{score_high:.2f}')
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Quantile lines Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    if 'top10' in prepared['quantiles']:
+
+        s10 = prepared['quantiles']['top10']
+
+        scene.artist('top10', lambda: ax.axhline(y=s10, color='#999999', linestyle='-.', linewidth=0.7,
+
+                                                 alpha=0.6, label=f'Top 10% (>= {s10:.2f})'),
+
+                     ydata=[s10, s10], label=f'Top 10% (>= {s10:.2f})')
+
+
+
+    if 'top25' in prepared['quantiles']:
+
+        s25 = prepared['quantiles']['top25']
+
+        scene.artist('top25', lambda: ax.axhline(y=s25, color='#999999', linestyle=':', linewidth=0.7,
+
+                                                 alpha=0.6, label=f'Top 25% (>= {s25:.2f})'),
+
+                     ydata=[s25, s25], label=f'Top 25% (>= {s25:.2f})')
+
+    scene.finish()
+
+
+
+    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Axes formatting Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+
+    ax.set_xlabel('Reference Rank', fontsize=11, family='serif')
+
+    ax.set_ylabel('Relevance Score', fontsize=11, family='serif')
+
+    ax.set_title('Priority Screening Score Distribution (Scree Plot)',
+
+                 fontsize=12, fontweight='bold', family='serif', pad=12)
+
+
+
+    # Academic grid style
+
+    ax.grid(True, linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
+
+    ax.set_axisbelow(True)
+
+
+
+    # Clean spines
+
+    ax.spines['top'].set_visible(False)
+
+    ax.spines['right'].set_visible(False)
+
+    ax.spines['left'].set_linewidth(0.8)
+
+    ax.spines['bottom'].set_linewidth(0.8)
+
+
+
+    # Legend
+
+    ax.legend(loc='upper right', frameon=True, framealpha=0.9,
+
+              edgecolor='#cccccc', fontsize=8, fancybox=False)
+
+
+
+    finalize_layout(fig, margins=(0.75, 0.15, 0.6, 0.5))
+
+    save_scene(scene, output_path)
+
+    close_scene('scree', output_path, scene)
+
+    
+
+def draw_search_table(data, output_path):
+
+    """
+
+    Search Strategy Table Ã¢â‚¬â€ Academic style with serif fonts and clean borders.
+
+    """
+
+    if not data:
+
+        return
+
+
+
+    FONT_SIZE = 9
+
+    TABLE_W = 10 * 72 - 40  # points: figure width minus layout pad
+
+    TITLE_H = 70            # points reserved for the title and padding
+
+    CELL_VPAD = 8
+
+
+
+    table_data = []
+
+    col_labels = ['Source', 'Results', 'Search String']
+
+
+
+    for item in data:
+
+        name = item.get('name', 'Unknown')
+
+        hits = item.get('hits', 0)
+
+        query = item.get('searchString', '') or 'N/A'
+
+        table_data.append([name, hits, query])
+
+
+
+    if not table_data:
+
+        return
+
+
+
+    # Column widths and query wrapping from cached text metrics; the query column
+
+    # takes the remaining width, minus a fixed CELL_HPAD inset on each side
+
+    CELL_HPAD = 6
+
+    col_widths = fit_column_widths([col_labels] + table_data, FONT_SIZE, TABLE_W,
+
+                                   flexible=[2], pad=2 * CELL_HPAD)
+
+    for row in table_data:
+
+        row[2] = '\n'.join(wrap_text(row[2], col_widths[2] - 2 * CELL_HPAD, FONT_SIZE))
+
+    row_heights = [line_height(FONT_SIZE) + CELL_VPAD]
+
+    row_heights += [row[2].count('\n') * line_height(FONT_SIZE) + line_height(FONT_SIZE) + CELL_VPAD
+
+                    for row in table_data]
+
+
+
+    fig_height = max(3, (sum(row_heights) + TITLE_H) / 72)
+
+    table_h = fig_height * 72 - TITLE_H
+
+    fig, ax = chart_subplots('search_strategy', (10, fig_height))
+
+    ax.axis('off')
+
+    ax.axis('tight')
+
+
+
+    ax.set_title("Table 1. Data Sources and Search Strategy Results",
+
+                 fontsize=11, fontweight='bold', family='serif', pad=15)
+
+
+
+    table = ax.table(cellText=table_data, colLabels=col_labels,
+
+                     loc='center', cellLoc='left', colLoc='left')
+
+
+
+    table.auto_set_font_size(False)
+
+    table.set_fontsize(FONT_SIZE)
+
+
+
+    for key, cell in table.get_celld().items():
+
+        row, col = key
+
+        cell.set_edgecolor('#333333')
+
+        cell.set_linewidth(0.5)
+
+        if col >= 0:
+
+            cell.set_width(col_widths[col] / TABLE_W)
+
+            cell.PAD = CELL_HPAD / col_widths[col]
+
+        cell.set_height(row_heights[row] / table_h)
+
+        if row == 0:
+
+            cell.set_text_props(weight='bold', family='serif')
+
+            cell.set_facecolor('#e8e8e8')
+
+        else:
+
+            cell.set_text_props(family='serif')
+
+            cell.set_facecolor('#ffffff' if row % 2 == 1 else '#f5f5f5')
+
+
+
+    finalize_layout(fig, margins=(20 / 72, 20 / 72, 15 / 72, (TITLE_H - 15) / 72))
+
+    save_figure(fig, output_path)
+
+    close_figure(fig)
+
+
+
+def prepare_temporal(data):
+
+    """
+
+    Year histogram: sorted years, studies per year and, with 3+ years, the coefficients
+
+    (highest power first) of the quadratic trend fitted to the counts.
+
+    """
+
+    years_data = data.get('years', {})  # { '2019': 2, '2020': 5, '2021': 8, ... }
+
+    years = sorted([int(y) for y in years_data.keys()])
+
+    counts = [years_data[str(y)] for y in years]
+
+    trend = None
+
+    if len(years) >= 3:
+
+        trend = np.polyfit(years, counts, min(2, len(years)-1)).tolist()
+
+    return {'years': years, 'counts': counts, 'trend': trend}
+
+
+
+def draw_temporal_distribution(data, output_path):
+
+    """
+
+    Temporal Distribution (Bar Chart / Line Plot).
+
+    Shows publication years and identifies trends and peaks.
+
+    Academic journal style with serif fonts and clean presentation.
+
+    """
+
+    prepared = prepare_temporal(data)
+
+    
+
+    if not prepared['years']:
+
+        print("Ã¢Å¡Â Ã¯Â¸Â  No temporal data available", file=sys.stderr)
+
+        save_placeholder(output_path, 'No temporal distribution data available', figsize=(10, 5))
+
+        return
+
+    
+
+    years, counts = prepared['years'], prepared['counts']
+
+    
+
+    scene = open_scene('temporal_distribution', output_path, (10, 6))
+
+    fig, ax = scene.fig, scene.ax
+
+    
+
+    # Bar chart, one named bar per year so a changed count only updates its height
+
+    for year, count in zip(years, counts):
+
+        bar = scene.artist(f'bar:{year}', lambda: ax.bar(year, count, color='#4a90e2', alpha=0.8,
+
+                                                         edgecolor='#333333', linewidth=0.8)[0],
+
+                           height=count)
+
+        # Value label on top of the bar
+
+        height = bar.get_height()
+
+        scene.text(f'label:{year}', bar.get_x() + bar.get_width()/2., height + 0.2,
+
+                   f'{int(height)}',
+
+                   ha='center', va='bottom', fontsize=9, family='serif', fontweight='bold')
+
+    
+
+    # Trend line (polynomial fit if enough data points)
+
+    if prepared['trend']:
+
+        p = np.poly1d(prepared['trend'])
+
+        years_smooth = np.linspace(min(years), max(years), 100)
+
+        scene.line('trend', years_smooth, p(years_smooth), linestyle='--', color='#e74c3c', linewidth=2,
+
+                   alpha=0.7, label='Trend')
+
+    scene.finish()
+
+    
+
+    ax.set_xlabel('Publication Year', fontsize=11, family='serif')
+
+    ax.set_ylabel('Number of Studies', fontsize=11, family='serif')
+
+    ax.set_title('Temporal Distribution of Included Studies',
+
+                 fontsize=12, fontweight='bold', family='serif', pad=12)
+
+    
+
+    # Format x-axis to show all years
+
+    ax.set_xticks(years)
+
+    ax.set_xticklabels([str(y) for y in years], rotation=45, ha='right')
+
+    
+
+    # Grid
+
+    ax.grid(True, axis='y', linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
+
+    ax.set_axisbelow(True)
+
+    
+
+    # Clean spines
+
+    ax.spines['top'].set_visible(False)
+
+    ax.spines['right'].set_visible(False)
+
+    ax.spines['left'].set_linewidth(0.8)
+
+    ax.spines['bottom'].set_linewidth(0.8)
+
+    
+
+    # Legend if trend line exists
+
+    if prepared['trend']:
+
+        ax.legend(loc='upper left', frameon=True, framealpha=0.9,
+
+                  edgecolor='#cccccc', fontsize=9, fancybox=False)
+
+    
+
+    # Bottom margin fits the 45-degree rotated year labels
+
+    year_label_h = (text_width('0000', 10) + line_height(10)) * 0.71 / 72
+
+    finalize_layout(fig, margins=(0.75, 0.2, 0.5 + year_label_h, 0.5))
+
+    save_scene(scene, output_path)
+
+    close_scene('temporal_distribution', output_path, scene)
+
+
+
+def prepare_quality(data):
+
+    """
+
+    Yes / partial / no counts per quality question, with the total and the share
+
+    of 'yes' answers in percent (None for questions without answers).
+
+    """
+
+    questions = data.get('questions', [])  # ['Q1', 'Q2', ...]
+
+    yes_counts = data.get('yes', [])
+
+    no_counts = data.get('no', [])
+
+    partial_counts = data.get('partial', [])
+
+    total = [yes_counts[i] + partial_counts[i] + no_counts[i] for i in range(len(questions))]
+
+    yes_pct = [(yes_counts[i] / total[i]) * 100 if total[i] > 0 else None for i in range(len(questions))]
+
+    return {'questions': questions, 'yes': yes_counts, 'partial': partial_counts, 'no': no_counts,
+
+            'total': total, 'yes_pct': yes_pct}
+
+
+
+def draw_quality_assessment(data, output_path):
+
+    """
+
+    Quality Assessment (Stacked Bar Chart).
+
+    Shows compliance with Kitchenham criteria (Yes/No/Partial).
+
+    Uses Plotly-like colors but with Matplotlib for consistency.
+
+    """
+
+    if not data.get('questions'):
+
+        print("WARNING: No quality assessment data available", file=sys.stderr)
+
+        save_placeholder(output_path, 'No quality assessment data available', figsize=(10, 5))
+
+        return
+
+    prepared = prepare_quality(data)
+
+    questions = prepared['questions']
+
+    yes_counts, partial_counts, no_counts = prepared['yes'], prepared['partial'], prepared['no']
+
+    
+
+    fig, ax = chart_subplots('quality_assessment', (12, 6))
+
+    
+
+    x = np.arange(len(questions))
+
+    width = 0.6
+
+    
+
+    # Stacked bars
+
+    p1 = ax.bar(x, yes_counts, width, label='Yes', color='#27ae60', alpha=0.9, edgecolor='#333333', linewidth=0.5)
+
+    p2 = ax.bar(x, partial_counts, width, bottom=yes_counts, label='Partial', 
+
+                color='#f39c12', alpha=0.9, edgecolor='#333333', linewidth=0.5)
+
+    
+
+    # Calculate bottom for 'No' bars
+
+    bottom_no = [yes_counts[i] + partial_counts[i] for i in range(len(questions))]
+
+    p3 = ax.bar(x, no_counts, width, bottom=bottom_no, label='No', 
+
+                color='#e74c3c', alpha=0.9, edgecolor='#333333', linewidth=0.5)
+
+    
+
+    # Add percentage labels
+
+    for i in range(len(questions)):
+
+        yes_pct = prepared['yes_pct'][i]
+
+        if yes_pct is not None:
+
+            if yes_pct >= 10:  # Only show if big enough
+
+                ax.text(i, yes_counts[i]/2, f'{yes_pct:.0f}%', 
+
+                        ha='center', va='center', fontsize=8, family='serif', 
+
+                        color='white', fontweight='bold')
+
+    
+
+    ax.set_xlabel('Quality Criteria (Kitchenham)', fontsize=11, family='serif')
+
+    ax.set_ylabel('Number of Studies', fontsize=11, family='serif')
+
+    ax.set_title('Methodological Quality Assessment',
+
+                 fontsize=12, fontweight='bold', family='serif', pad=12)
+
+    ax.set_xticks(x)
+
+    ax.set_xticklabels(questions, rotation=0, ha='center', fontsize=9)
+
+    
+
+    # Grid
+
+    ax.grid(True, axis='y', linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
+
+    ax.set_axisbelow(True)
+
+    
+
+    # Clean spines
+
+    ax.spines['top'].set_visible(False)
+
+    ax.spines['right'].set_visible(False)
+
+    ax.spines['left'].set_linewidth(0.8)
+
+    ax.spines['bottom'].set_linewidth(0.8)
+
+    
+
+    # Legend
+
+    ax.legend(loc='upper right', frameon=True, framealpha=0.9,
+
+              edgecolor='#cccccc', fontsize=9, ncol=3, fancybox=False)
+
+    
+
+    finalize_layout(fig, margins=(0.75, 0.2, 0.65, 0.5))
+
+    save_figure(fig, output_path)
+
+    close_figure(fig)
+
+
+
+def prepare_keywords(data, top=15):
+
+    """The `top` most frequent keywords (title case) and their study counts, most frequent first."""
+
+    entries = sorted(data.get('entries', []), key=lambda e: e.get('count', 0), reverse=True)[:top]
+
+    return {'keywords': [e.get('keyword', 'Unknown').title() for e in entries],
+
+            'counts': [e.get('count', 0) for e in entries]}
+
+
+
+def draw_bubble_chart(data, output_path):
+
+    """
+    Thematic Keyword Concentration Chart.
+    Horizontal bar chart showing frequency of key terms across included studies.
+    Data comes from author-provided keywords in included references.
+    Identifies covered research areas and thematic gaps.
+    """
+    entries = data.get('entries', [])
+
+    if not entries or len(entries) == 0:
+        print("WARNING: No keyword data available for thematic chart", file=sys.stderr)
+        save_placeholder(output_path, 'No thematic keyword data available', figsize=(10, 6))
+        return
+
+    # Top 15 by count, descending
+
+    prepared = prepare_keywords(data)
+
+    if not prepared['keywords']:
+
+        print("WARNING: No valid keyword entries for thematic chart", file=sys.stderr)
+        save_placeholder(output_path, 'Insufficient keyword data for thematic mapping', figsize=(10, 6))
+        return
+
+    # Reverse for horizontal bar chart (highest at top)
+
+    keywords = prepared['keywords'][::-1]
+
+    counts = prepared['counts'][::-1]
+
+    max_count = max(counts) if counts else 1
+
+    # Dynamic figure height based on number of keywords
+    fig_height = max(4, len(keywords) * 0.5 + 2)
+    fig, ax = chart_subplots('bubble_chart', (10, fig_height))
+
+    # Color gradient: lighter bars for low frequency, darker for high frequency
+    base_color = np.array([0.204, 0.596, 0.859])  # #3498db
+    colors = [np.clip(base_color * (0.4 + 0.6 * (c / max_count)), 0, 1) for c in counts]
+
+    bars = ax.barh(range(len(keywords)), counts, color=colors, edgecolor='#333333',
+                   linewidth=0.8, height=0.65)
+
+    # Add count labels at end of each bar
+    for i, (bar, count) in enumerate(zip(bars, counts)):
+        ax.text(bar.get_width() + max_count * 0.02, bar.get_y() + bar.get_height() / 2,
+                str(count), ha='left', va='center', fontsize=9, family='serif',
+                fontweight='bold', color='#333333')
+
+    ax.set_yticks(range(len(keywords)))
+    ax.set_yticklabels(keywords, fontsize=9, family='serif')
+    ax.set_xlabel('Frequency (number of studies)', fontsize=11, family='serif')
+    ax.set_title('Thematic Keyword Concentration in Included Studies',
+                 fontsize=12, fontweight='bold', family='serif', pad=12)
+
+    # Set x limits with padding for labels
+    ax.set_xlim(0, max_count * 1.15)
+
+    # Only integer ticks
+    ax.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+
+    # Grid on x-axis only
+    ax.grid(True, axis='x', linestyle='--', linewidth=0.3, alpha=0.3, color='#cccccc')
+    ax.set_axisbelow(True)
+
+    # Clean spines
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_linewidth(0.8)
+    ax.spines['bottom'].set_linewidth(0.8)
+
+    # Left margin fits the longest keyword label
+    label_w = max(text_width(k, 9) for k in keywords) / 72
+    finalize_layout(fig, margins=(label_w + 0.25, 0.2, 0.65, 0.5))
+    save_figure(fig, output_path)
+    close_figure(fig)
+
+
+# Above this many studies the synthesis is summarised per tool instead of one row per study
+
+SYNTHESIS_AGGREGATE_THRESHOLD = 40
+
+
+
+def prepare_synthesis(data):
+
+    """
+
+    Synthesis table as {'mode', 'columns', 'rows'}.
+
+    'studies': one row per study with Study, Tool and every metric column that has a value.
+
+    'aggregate' (data['mode'] == 'aggregate', or 'auto' and more than
+
+    SYNTHESIS_AGGREGATE_THRESHOLD studies): see prepare_synthesis_aggregated.
+
+    None when the study or tool column is missing.
+
+    """
+
+    df = pd.DataFrame(data.get('studies', []))
+
+    
+
+    # Ensure required columns exist
+
+    required_cols = ['study', 'tool']
+
+    if not all(col in df.columns for col in required_cols):
+
+        print("WARNING: Required columns missing in technical data", file=sys.stderr)
+
+        return None
+
+    
+
+    # DYNAMIC: Select ALL columns from data (except study and tool which are first)
+
+    metric_cols = [col for col in df.columns if col not in ['study', 'tool']]
+
+    
+
+    # Filter out columns that are all null/empty (single vectorized pass over every metric)
+
+    metrics = df[metric_cols]
+
+    has_value = (metrics.notna() & (metrics != '')).any()
+
+    metric_cols = [col for col in metric_cols if has_value[col]]
+
+
+
+    mode = data.get('mode', 'auto')
+
+    if mode == 'aggregate' or (mode == 'auto' and len(df) > SYNTHESIS_AGGREGATE_THRESHOLD):
+
+        return prepare_synthesis_aggregated(df, metric_cols)
+
+    
+
+    display_cols = ['study', 'tool'] + metric_cols
+
+    
+
+    # DYNAMIC: Format column names generically
+
+    col_labels = []
+
+    for col in display_cols:
+
+        if col == 'study':
+
+            col_labels.append('Study')
+
+        elif col == 'tool':
+
+            col_labels.append('Tool')
+
+        else:
+
+            # Generic formatting: capitalize and replace underscores
+
+            formatted = col.replace('_', ' ').title()
+
+            col_labels.append(formatted)
+
+    return {'mode': 'studies', 'columns': col_labels, 'rows': df[display_cols].values.tolist()}
+
+
+
+def draw_technical_synthesis(data, output_path):
+
+    """
+
+    Technical Synthesis Table with Pandas - DYNAMIC VERSION.
+
+    Comparative table of metrics extracted from studies.
+
+    Automatically adapts to ANY metrics present in the data.
+
+    Format: Study | Tool | [Dynamic Metrics columns]
+
+    In aggregate mode (see prepare_synthesis) renders per-tool statistics instead,
+
+    see draw_technical_synthesis_aggregated.
+
+    """
+
+    studies_data = data.get('studies', [])
+
+    
+
+    if not studies_data or len(studies_data) == 0:
+
+        print("WARNING: No technical synthesis data available", file=sys.stderr)
+
+        save_placeholder(output_path, 'No technical synthesis data available', figsize=(12, 4))
+
+        return
+
+    
+
+    prepared = prepare_synthesis(data)
+
+    if prepared is None:
+
+        return
+
+    if prepared['mode'] == 'aggregate':
+
+        draw_technical_synthesis_aggregated(prepared, output_path)
+
+        return
+
+    col_labels, table_data = prepared['columns'], prepared['rows']
+
+    
+
+    # Create figure
+
+    fig_height = max(4, len(table_data) * 0.6 + 2)
+
+    fig, ax = chart_subplots('technical_synthesis', (14, fig_height))
+
+    ax.axis('off')
+
+    ax.axis('tight')
+
+    
+
+    ax.set_title("Technical Synthesis: Performance Metrics Comparison",
+
+                 fontsize=12, fontweight='bold', family='serif', pad=15)
+
+    
+
+    table = ax.table(cellText=table_data, colLabels=col_labels,
+
+                     loc='center', cellLoc='center', colLoc='center')
+
+    
+
+    table.auto_set_font_size(False)
+
+    table.set_fontsize(8)
+
+    table.scale(1, 1.6)
+
+    
+
+    # Column widths proportional to the widest measured cell (cached text metrics)
+
+    col_widths = fit_column_widths([col_labels] + table_data, 8, 1.0)
+
+    
+
+    # Style table
+
+    for key, cell in table.get_celld().items():
+
+        row, col = key
+
+        cell.set_edgecolor('#333333')
+
+        cell.set_linewidth(0.5)
+
+        cell.set_width(col_widths[col])
+
+        if row == 0:
+
+            cell.set_text_props(weight='bold', family='serif', fontsize=8)
+
+            cell.set_facecolor('#34495e')
+
+            cell.set_text_props(color='white')
+
+        else:
+
+            cell.set_text_props(family='serif', fontsize=8)
+
+            # Alternate row colors
+
+            if row % 2 == 1:
+
+                cell.set_facecolor('#ffffff')
+
+            else:
+
+                cell.set_facecolor('#ecf0f1')
+
+    
+
+    finalize_layout(fig, margins=(0.2, 0.2, 0.2, 0.6))
+
+    save_figure(fig, output_path)
+
+    close_figure(fig)
+
+
+
+# (input key, result key, output filename, draw function), in render order
+
+CHARTS = [
+
+    ('prisma', 'prisma', 'prisma_flow.png', draw_prisma),
+
+    ('scree', 'scree', 'scree_plot.png', draw_scree),
+
+    ('search_strategy', 'chart1', 'chart1_search.png', draw_search_table),
+
+    ('temporal_distribution', 'temporal_distribution', 'temporal_distribution.png', draw_temporal_distribution),
+
+    ('quality_assessment', 'quality_assessment', 'quality_assessment.png', draw_quality_assessment),
+
+    ('bubble_chart', 'bubble_chart', 'bubble_chart.png', draw_bubble_chart),
+
+    ('technical_synthesis', 'technical_synthesis', 'technical_synthesis.png', draw_technical_synthesis),
+
+]
+
+
+
+# Data-preparation stage of the charts that can also be exported as specs or LaTeX code (--spec)
+
+PREPARE = {
+
+    'prisma': prepare_prisma,
+
+    'scree': prepare_scree,
+
+    'temporal_distribution': prepare_temporal,
+
+    'quality_assessment': prepare_quality,
+
+    'bubble_chart': prepare_keywords,
+
+    'technical_synthesis': prepare_synthesis,
+
+}
+
+
+
+# --spec values: chart specs (chart_specs) and native LaTeX code (chart_tikz)
+
+SPEC_CHOICES = sorted(SPEC_FORMATS) + ['tikz']
+
+
+
+def parse_spec_formats(value):
+
+    """'vega-lite,tikz' -> ['vega-lite', 'tikz']; lists are validated as they are."""
+
+    formats = [f.strip() for f in value.split(',') if f.strip()] if isinstance(value, str) else list(value or [])
+
+    unknown = [f for f in formats if f not in SPEC_CHOICES]
+
+    if unknown:
+
+        raise argparse.ArgumentTypeError(f"unknown spec format(s) {', '.join(unknown)} "
+
+                                         f"(choose from {', '.join(SPEC_CHOICES)})")
+
+    return formats
+
+
+
+def export_spec(input_key, data, chart_path, name, spec_format):
+
+    """
+
+    Write the chart in spec_format next to its image and return the file's path:
+
+    'vega-lite' / 'json' specs (scree_plot.vl.json, technical_synthesis.spec.json) or
+
+    'tikz' LaTeX code (prisma_flow.tex). None for charts without that export or without data.
+
+    """
+
+    builders = TIKZ_BUILDERS if spec_format == 'tikz' else SPEC_BUILDERS
+
+    if input_key not in PREPARE or input_key not in builders:
+
+        return None
+
+    try:
+
+        prepared = PREPARE[input_key](data)
+
+        if prepared is None:
+
+            return None
+
+        base = os.path.splitext(chart_path)[0]
+
+        if spec_format == 'tikz':
+
+            code = tikz_code(input_key, prepared)
+
+            if code is None:
+
+                return None
+
+            path = base + '.tex'
+
+            with open(path, 'w', encoding='utf-8') as f:
+
+                f.write(code)
+
+        else:
+
+            spec = chart_spec(input_key, name, prepared, spec_format)
+
+            path = base + spec_extension(spec)
+
+            write_spec(path, spec)
+
+    except Exception as e:
+
+        print(f"{name} spec failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+        return None
+
+    return path
+
+
+
+# --- Latency budget ---
+
+# Cost model per input section: (fixed ms, ms per input item, item count), fitted to
+
+# --jobs 0 timings at 300 DPI with PNG + PDF. Items are databases and exclusion reasons,
+
+# scores, query rows, years, questions, plotted keywords and studies.
+
+CHART_COST_MODEL = {
+
+    'prisma': (800, 20, lambda d: len(d.get('databases', [])) + len(d.get('excluded_reasons', {}))
+
+               + len(d.get('screening_exclusion_reasons', {}))),
+
+    'scree': (400, 0.02, lambda d: len(d.get('scores', [])) if not d.get('max_points')
+
+              else min(len(d.get('scores', [])), d['max_points'])),
+
+    'search_strategy': (200, 20, lambda d: len(d) if isinstance(d, list) else 0),
+
+    'temporal_distribution': (400, 12, lambda d: len(d.get('years', {}))),
+
+    'quality_assessment': (450, 13, lambda d: len(d.get('questions', []))),
+
+    'bubble_chart': (300, 24, lambda d: min(15, len(d.get('entries', [])))),
+
+    'technical_synthesis': (300, 38, lambda d: len(d.get('studies', []))),
+
+}
+
+SYNTHESIS_AGGREGATED_COST = (700, 0.4)
+
 
-    denominator = (A*A + B*B) ** 0.5
 
+# Share of a chart's cost spent rasterizing/encoding the PNG (scales with DPI squared)
 
+# and writing the PDF; the rest is building the figure
 
-    elbow_idx = -1
+RASTER_COST_SHARE = 0.45
 
-    if denominator != 0:
+VECTOR_COST_SHARE = 0.30
 
-        max_dist = -1
 
-        for i, score in enumerate(scores):
 
-            dist = abs(A*(i+1) + B*score + C) / denominator
+# Fidelity levels, from full quality to cheapest. Level 2 and up decimate the scree
 
-            if dist > max_dist:
+# line to max_points and summarize the synthesis table per tool.
 
-                max_dist = dist
+FIDELITY_LEVELS = [
 
-                elbow_idx = i + 1
+    {'dpi': 300, 'vector': True, 'max_points': None, 'aggregate': False},
 
+    {'dpi': 200, 'vector': True, 'max_points': None, 'aggregate': False},
 
+    {'dpi': 150, 'vector': True, 'max_points': 2000, 'aggregate': True},
 
-    if elbow_idx != -1:
+    {'dpi': 150, 'vector': False, 'max_points': 500, 'aggregate': True},
 
-        ax.axvline(x=elbow_idx, color='#333333', linestyle=':', linewidth=1.0,
+]
 
-                   alpha=0.7, label=f'Cut-off point (elbow): rank {elbow_idx}', zorder=2)
 
-        # Annotation arrow
 
-        elbow_score = scores[elbow_idx - 1]
+def apply_fidelity(input_key, data, level):
 
-        ax.annotate(f'Elbow\n(rank = {elbow_idx})',
+    """Input for the chart at a fidelity level (scree decimation, per-tool synthesis)."""
 
-                    xy=(elbow_idx, elbow_score),
+    fidelity = FIDELITY_LEVELS[level]
 
-                    xytext=(elbow_idx + max(1, len(scores)*0.08), elbow_score + 0.05),
+    if input_key == 'scree' and fidelity['max_points'] and isinstance(data, dict):
 
-                    fontsize=8, family='serif', fontstyle='italic',
+        return {**data, 'max_points': fidelity['max_points']}
 
-                    arrowprops=dict(arrowstyle='->', color='#333333', lw=0.8),
+    if input_key == 'technical_synthesis' and fidelity['aggregate'] and isinstance(data, dict):
 
-                    ha='left', va='bottom')
+        return {**data, 'mode': 'aggregate'}
 
+    return data
 
-        # --- Confidence Threshold horizontal line at elbow score ---
 
-        ax.axhline(y=elbow_score, color='#c0392b', linestyle='--', linewidth=1.2,
 
-                   alpha=0.75, label=f'Confidence Threshold (score = {elbow_score:.2f})', zorder=2)
+def estimate_cost(input_key, data, level=0):
 
-        ax.annotate(f'Confidence Threshold = {elbow_score:.2f}',
+    """Estimated render time (ms) of one chart at a fidelity level; only counts input items."""
 
-                    xy=(len(scores) * 0.6, elbow_score),
+    fixed, per_item, items = CHART_COST_MODEL[input_key]
 
-                    xytext=(len(scores) * 0.6, elbow_score + 0.04),
+    data = apply_fidelity(input_key, data, level)
 
-                    fontsize=8, family='serif', fontstyle='italic', color='#c0392b',
+    try:
 
-                    ha='center', va='bottom')
+        n = items(data)
 
+    except (AttributeError, TypeError):
 
+        n = 0
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Quantile lines Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    # A malformed section (not an object) keeps the default cost; its chart fails on its own
 
-    top_10_idx = max(1, int(len(scores) * 0.1))
+    if input_key == 'technical_synthesis' and isinstance(data, dict) and (
 
-    top_25_idx = max(1, int(len(scores) * 0.25))
+            data.get('mode') == 'aggregate' or n > SYNTHESIS_AGGREGATE_THRESHOLD):
 
+        fixed, per_item = SYNTHESIS_AGGREGATED_COST
 
+    fidelity = FIDELITY_LEVELS[level]
 
-    if top_10_idx <= len(scores):
+    scale = (1 - RASTER_COST_SHARE - VECTOR_COST_SHARE
 
-        s10 = scores[top_10_idx - 1]
+             + RASTER_COST_SHARE * (fidelity['dpi'] / 300) ** 2
 
-        ax.axhline(y=s10, color='#999999', linestyle='-.', linewidth=0.7,
+             + (VECTOR_COST_SHARE if fidelity['vector'] and len(OUTPUT_FORMATS) > 1 else 0))
 
-                   alpha=0.6, label=f'Top 10% (>= {s10:.2f})')
+    return (fixed + per_item * n) * scale
 
 
 
-    if top_25_idx <= len(scores):
+def plan_fidelity(sections, budget_ms, jobs=1):
 
-        s25 = scores[top_25_idx - 1]
+    """
 
-        ax.axhline(y=s25, color='#999999', linestyle=':', linewidth=0.7,
+    Pick a fidelity level per section so the estimated wall time fits budget_ms.
 
-                   alpha=0.6, label=f'Top 25% (>= {s25:.2f})')
+    Charts render `jobs` at a time, so the estimate is the larger of the slowest chart
 
+    and the total divided by jobs. While over budget the currently most expensive chart
 
+    drops one level. Returns {input_key: level}, and the final estimate in ms.
 
-    # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬ Axes formatting Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
+    """
 
-    ax.set_xlabel('Reference Rank', fontsize=11, family='serif')
+    levels = {key: 0 for key in sections}
 
-    ax.set_ylabel('Relevance Score', fontsize=11, family='serif')
+    costs = {key: estimate_cost(key, data) for key, data in sections.items()}
 
-    ax.set_title('Priority Screening Score Distribution (Scree Plot)',
 
-                 fontsize=12, fontweight='bold', family='serif', pad=12)
 
+    def wall_time():
 
+        return max(max(costs.values(), default=0), sum(costs.values()) / max(1, jobs))
 
-    # Academic grid style
 
-    ax.grid(True, linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
 
-    ax.set_axisbelow(True)
+    while wall_time() > budget_ms:
 
+        candidates = [key for key in levels if levels[key] < len(FIDELITY_LEVELS) - 1]
 
+        if not candidates:
 
-    # Clean spines
+            break
 
-    ax.spines['top'].set_visible(False)
+        key = max(candidates, key=costs.get)
 
-    ax.spines['right'].set_visible(False)
+        levels[key] += 1
 
-    ax.spines['left'].set_linewidth(0.8)
+        costs[key] = estimate_cost(key, sections[key], levels[key])
 
-    ax.spines['bottom'].set_linewidth(0.8)
+    return levels, wall_time()
 
 
 
-    # Legend
+def aggregate_synthesis_metrics(df, metric_cols):
 
-    ax.legend(loc='upper right', frameon=True, framealpha=0.9,
+    """
 
-              edgecolor='#cccccc', fontsize=8, fancybox=False)
+    Per-tool count/mean/median/IQR of every numeric metric.
 
+    Metric columns are coerced to numeric in one vectorized pass ('91%' -> 91,
 
+    non-numeric labels -> NaN) and all statistics come from a single groupby.
 
-    plt.tight_layout()
+    Returns (numeric frame with a 'tool' column, summary indexed by tool with
 
-    save_figure(fig, output_path)
+    (metric, stat) columns, studies per tool).
+
+    """
 
-    plt.close()
+    numeric = (df[metric_cols]
 
-    
+               .replace(r'^\s*([-+]?[0-9]*\.?[0-9]+)\s*%\s*$', r'\1', regex=True)
 
-def draw_search_table(data, output_path):
+               .apply(pd.to_numeric, errors='coerce'))
+
+    numeric = numeric.loc[:, numeric.notna().any()]
+
+    numeric['tool'] = df['tool'].fillna('N/A').astype(str)
+
+
+
+    grouped = numeric.groupby('tool', sort=False)
+
+    studies_per_tool = grouped.size().sort_values(ascending=False)
+
+    metric_names = [col for col in numeric.columns if col != 'tool']
+
+    if not metric_names:
+
+        return numeric, pd.DataFrame(index=studies_per_tool.index), studies_per_tool
+
+
+
+    stats = grouped[metric_names].agg(['count', 'mean', 'median'])
+
+    quartiles = grouped[metric_names].quantile([0.25, 0.75]).unstack()
+
+    for col in metric_names:
+
+        stats[(col, 'iqr')] = quartiles[(col, 0.75)] - quartiles[(col, 0.25)]
+
+    summary = stats.sort_index(axis=1).loc[studies_per_tool.index]
+
+    return numeric, summary, studies_per_tool
+
+
+
+def prepare_synthesis_aggregated(df, metric_cols):
 
     """
 
-    Search Strategy Table Ã¢â‚¬â€ Academic style with serif fonts and clean borders.
+    Per-tool synthesis table: one row per tool with its study count and the
+
+    mean / median (IQR) of each numeric metric. 'distributions' holds the values
+
+    per tool (at most 8, most studies first) of the first 4 metrics, for box plots.
 
     """
 
-    if not data:
+    numeric, summary, studies_per_tool = aggregate_synthesis_metrics(df, metric_cols)
 
-        return
+    metric_names = [col for col in numeric.columns if col != 'tool']
 
+    tools = list(studies_per_tool.index)
 
 
-    import textwrap
 
+    col_labels = ['Tool', 'Studies'] + [col.replace('_', ' ').title() for col in metric_names]
 
+    # Whole columns at a time: summary rows are already in `tools` order
 
-    table_data = []
+    cells = []
 
-    col_labels = ['Source', 'Results', 'Search String']
+    for col in metric_names:
 
+        cells.append(['N/A' if count == 0 else f"{mean:.2f} / {median:.2f} ({iqr:.2f})"
 
+                      for count, mean, median, iqr in zip(*(summary[(col, stat)].to_numpy()
 
-    for item in data:
+                                                            for stat in ('count', 'mean', 'median', 'iqr')))])
 
-        name = item.get('name', 'Unknown')
+    table_data = [[tool, int(n), *row]
 
-        hits = item.get('hits', 0)
+                  for tool, n, *row in zip(tools, studies_per_tool.to_numpy(), *cells)]
 
-        query = item.get('searchString', '') or 'N/A'
 
-        wrapped_query = textwrap.fill(query, width=55)
 
-        table_data.append([name, hits, wrapped_query])
+    distributions = {}
 
+    for col in metric_names[:4]:
 
+        groups = numeric[['tool', col]].dropna().groupby('tool', sort=False)[col]
 
-    if not table_data:
+        box_tools = [tool for tool in tools if tool in groups.groups][:8]
 
-        return
+        distributions[col.replace('_', ' ').title()] = {
 
+            tool: groups.get_group(tool).tolist() for tool in box_tools}
 
+    return {'mode': 'aggregate', 'studies': len(df), 'columns': col_labels, 'rows': table_data,
 
-    fig_height = max(3, len(table_data) * 1.2 + 2)
+            'distributions': distributions}
 
-    fig, ax = plt.subplots(figsize=(10, fig_height))
 
-    ax.axis('off')
 
-    ax.axis('tight')
+def draw_technical_synthesis_aggregated(prepared, output_path):
 
+    """
 
+    Technical Synthesis - aggregated view for large study sets.
 
-    ax.set_title("Table 1. Data Sources and Search Strategy Results",
+    Compact per-tool summary table (mean / median (IQR) of each numeric metric)
 
-                 fontsize=11, fontweight='bold', family='serif', pad=15)
+    plus one box plot per metric. Render cost scales with tools, not studies.
 
+    """
 
+    col_labels, table_data = prepared['columns'], prepared['rows']
 
-    table = ax.table(cellText=table_data, colLabels=col_labels,
+    tools = [row[0] for row in table_data]
 
-                     loc='center', cellLoc='left', colLoc='left')
 
 
+    # Box plots: at most 4 metrics, tools with the most studies first
 
-    table.auto_set_font_size(False)
+    plot_metrics = list(prepared['distributions'])
 
-    table.set_fontsize(9)
+    table_h = max(2.5, len(tools) * 0.35 + 1.5)
 
-    table.scale(1, 1.4)
+    plot_h = 3.5 if plot_metrics else 0
 
+    fig = chart_figure('technical_synthesis_aggregated', (14, table_h + plot_h))
 
+    grid = fig.add_gridspec(2 if plot_metrics else 1, max(1, len(plot_metrics)),
 
-    col_widths = [0.15, 0.1, 0.75]
+                            height_ratios=[table_h, plot_h] if plot_metrics else [1])
 
-    for key, cell in table.get_celld().items():
 
-        row, col = key
 
-        cell.set_edgecolor('#333333')
+    ax = fig.add_subplot(grid[0, :])
 
-        cell.set_linewidth(0.5)
+    ax.axis('off')
 
-        if col >= 0:
+    ax.set_title(f"Technical Synthesis: Metrics Summary by Tool ({prepared['studies']} studies)",
+
+                 fontsize=12, fontweight='bold', family='serif', pad=15)
+
+    table = ax.table(cellText=table_data, colLabels=col_labels,
+
+                     loc='center', cellLoc='center', colLoc='center')
+
+    table.auto_set_font_size(False)
+
+    table.set_fontsize(8)
+
+    table.scale(1, 1.6)
+
+    for (row, col), cell in table.get_celld().items():
 
-            cell.set_width(col_widths[col])
+        cell.set_edgecolor('#333333')
+
+        cell.set_linewidth(0.5)
 
         if row == 0:
 
-            cell.set_text_props(weight='bold', family='serif')
+            cell.set_text_props(weight='bold', family='serif', fontsize=8, color='white')
 
-            cell.set_facecolor('#e8e8e8')
+            cell.set_facecolor('#34495e')
 
         else:
 
-            cell.set_text_props(family='serif')
+            cell.set_text_props(family='serif', fontsize=8)
 
-            cell.set_facecolor('#ffffff' if row % 2 == 1 else '#f5f5f5')
+            cell.set_facecolor('#ffffff' if row % 2 == 1 else '#ecf0f1')
+
+    ax.text(0.5, 0.0, 'Metric cells: mean / median (IQR)', transform=ax.transAxes,
+
+            ha='center', va='top', fontsize=8, fontstyle='italic', family='serif', color='#555555')
+
+
+
+    for i, metric in enumerate(plot_metrics):
+
+        bax = fig.add_subplot(grid[1, i])
+
+        box_tools = list(prepared['distributions'][metric])
+
+        groups = list(prepared['distributions'][metric].values())
+
+        if groups:
+
+            bax.boxplot(groups, widths=0.6, patch_artist=True,
+
+                        boxprops=dict(facecolor='#ecf0f1', edgecolor='#333333', linewidth=0.8),
+
+                        medianprops=dict(color='#c0392b', linewidth=1.2),
+
+                        whiskerprops=dict(color='#333333', linewidth=0.8),
+
+                        capprops=dict(color='#333333', linewidth=0.8),
+
+                        flierprops=dict(marker='o', markersize=3, markerfacecolor='#999999',
+
+                                        markeredgecolor='#999999'))
+
+            bax.set_xticks(range(1, len(box_tools) + 1))
+
+            bax.set_xticklabels(box_tools)
+
+        bax.set_title(metric, fontsize=10, family='serif')
+
+        bax.tick_params(axis='x', labelrotation=45, labelsize=8)
+
+        bax.grid(True, axis='y', linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
+
+        bax.set_axisbelow(True)
+
+        bax.spines['top'].set_visible(False)
 
+        bax.spines['right'].set_visible(False)
 
 
-    plt.tight_layout()
+
+    finalize_layout(fig, margins=(0.6, 0.2, 1.2 if plot_metrics else 0.3, 0.6), hspace=0.3, wspace=0.25)
 
     save_figure(fig, output_path)
 
-    plt.close()
+    close_figure(fig)
 
 
 
-def draw_temporal_distribution(data, output_path):
+def emit_record(record):
+
+    """Write one NDJSON record to stdout and flush it so the caller sees it immediately."""
+
+    # Upload callbacks emit from sink threads
+
+    with _emit_lock:
+
+        sys.stdout.write(json.dumps(finite_json(record), allow_nan=False) + '\n')
+
+        sys.stdout.flush()
+
+
+
+_emit_lock = threading.Lock()
+
+
+
+def finite_json(value):
+
+    """value with NaN and infinities replaced by None: Node's JSON.parse rejects them."""
+
+    if isinstance(value, float):
+
+        return value if np.isfinite(value) else None
+
+    if isinstance(value, dict):
+
+        return {k: finite_json(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+
+        return [finite_json(v) for v in value]
+
+    return value
+
+
+
+def read_sections(stream, input_format='json'):
+
+    """
+
+    Yield (section, data) pairs from the input stream.
+
+    'json':   one JSON object with every section, parsed once stdin is closed.
+
+    'framed': one {"section": ..., "data": ...} object per line, yielded as soon as
+
+              each line arrives so that chart can start rendering while the rest
+
+              of the payload is still being written.
+
+    """
+
+    if input_format == 'json':
+
+        yield from json.loads(stream.read()).items()
+
+        return
+
+    for line in stream:
+
+        if not line.strip():
+
+            continue
+
+        try:
+
+            frame = json.loads(line)
+
+            yield frame['section'], frame['data']
+
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+
+            print(f"Error: invalid input frame ({type(e).__name__}: {e})", file=sys.stderr)
+
+
+
+def parse_db_sections(value):
+
+    """'scree,bubble_chart' -> ['scree', 'bubble_chart'], restricted to chart_db.DB_SECTIONS."""
+
+    names = [n.strip() for n in value.split(',') if n.strip()] if isinstance(value, str) else list(value or [])
+
+    unknown = [n for n in names if n not in DB_SECTIONS]
+
+    if unknown:
+
+        raise argparse.ArgumentTypeError(f"section(s) {', '.join(unknown)} cannot be read from the database "
+
+                                         f"(choose from {', '.join(DB_SECTIONS)})")
+
+    return names
+
+
+
+def read_db_sections(db, project_id, names):
+
+    """
+
+    Yield (section, data) for the sections read from the database (chart_db.ChartDatabase).
+
+    A section whose query fails is reported and skipped, so the payload's copy is used.
+
+    """
+
+    for name in names:
+
+        try:
+
+            data = db.section(name, project_id)
+
+        except Exception as e:
+
+            print(f"Error: section '{name}' could not be read from the database ({type(e).__name__}: {e})",
+
+                  file=sys.stderr)
+
+            continue
+
+        print(f"Section '{name}' read from the database", file=sys.stderr)
+
+        yield name, data
+
+
+
+def merge_sections(first, rest):
+
+    """The sections of `first`, then those of `rest` that `first` did not provide."""
+
+    seen = set()
+
+    for key, data in first:
+
+        seen.add(key)
+
+        yield key, data
+
+    for key, data in rest:
+
+        if key not in seen:
+
+            yield key, data
+
+
+
+def log_section(key, data):
+
+    print(f"Python received section '{key}'", file=sys.stderr)
+
+    # A malformed section is only logged; its chart fails on its own
+
+    if key == 'scree' and isinstance(data, dict):
+
+        scores = data.get('scores')
+
+        scores_count = len(scores) if isinstance(scores, (list, np.ndarray)) else 0
+
+        print(f"   - Scores en scree: {scores_count}", file=sys.stderr)
+
+        if scores_count > 0:
+
+            print(f"   - Primer score: {scores[0]}", file=sys.stderr)
+
+
+
+def render_chart(draw, data, chart_path, name, profiler=None, level=0):
+
+    """Draw one chart at a fidelity level and return the content hashes of the files it wrote."""
+
+    global RASTER_DPI, OUTPUT_FORMATS
+
+    saved = RASTER_DPI, OUTPUT_FORMATS
+
+    RASTER_DPI = FIDELITY_LEVELS[level]['dpi']
+
+    if not FIDELITY_LEVELS[level]['vector']:
+
+        OUTPUT_FORMATS = ['png']
+
+    try:
+
+        with profiler.profile(name) if profiler else nullcontext():
+
+            draw(data, chart_path)
+
+    finally:
+
+        RASTER_DPI, OUTPUT_FORMATS = saved
+
+    return output_hashes(chart_path)
+
+
+
+def chart_job(input_key, draw, data, chart_path, name, profiler=None, level=0, spec_formats=(), spec_only=False):
+
+    """
+
+    One runner job per chart: its spec files (see export_spec) from the section data and,
+
+    unless spec_only, the chart itself at its fidelity level (see render_chart), so the
+
+    exports get the same timeout, limits and parallelism as the image.
+
+    Returns {'specs': {format: filename}, 'hashes': {...}} ('hashes' only when drawn),
+
+    plus 'analysis' (scree_analysis) for the scree chart.
 
     """
 
-    Temporal Distribution (Bar Chart / Line Plot).
+    value = {'specs': {}}
+
+    if input_key == 'scree':
+
+        # The only bootstrap of the job: the spec export and the drawing hit _elbow_ci's cache
+
+        value['analysis'] = scree_analysis(data)
+
+    for spec_format in spec_formats:
+
+        spec_path = export_spec(input_key, data, chart_path, name, spec_format)
+
+        if spec_path:
+
+            value['specs'][spec_format] = os.path.basename(spec_path)
 
-    Shows publication years and identifies trends and peaks.
+    if not spec_only:
 
-    Academic journal style with serif fonts and clean presentation.
+        value['hashes'] = render_chart(draw, apply_fidelity(input_key, data, level), chart_path, name, profiler, level)
 
-    """
+    return value
 
-    years_data = data.get('years', {})  # { '2019': 2, '2020': 5, '2021': 8, ... }
 
-    
 
-    if not years_data or len(years_data) == 0:
+def scree_analysis(data):
 
-        print("Ã¢Å¡Â Ã¯Â¸Â  No temporal data available", file=sys.stderr)
+    """Cut-off of the scree section for the result: {'elbow': {'rank', 'score'}, 'elbow_ci'} or None."""
 
-        fig, ax = plt.subplots(figsize=(10, 5))
+    prepared = prepare_scree(data)
 
-        ax.text(0.5, 0.5, 'No temporal distribution data available',
+    if not prepared['elbow']:
 
-                ha='center', va='center', fontsize=12, color='#666666', family='serif')
+        return None
 
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
+    elbow = prepared['elbow']
 
-        save_figure(fig, output_path)
+    return {'elbow': {'rank': elbow['rank'], 'score': float(elbow['score'])}, 'elbow_ci': prepared['elbow_ci']}
 
-        plt.close()
 
-        return
 
-    
+def render_job(sections, output_dir, runner, profiler=None, stream=False, poll=False, sink=None, budget_ms=None,
 
-    # Convert to sorted lists
+               spec_formats=(), spec_only=False, sprite_width=0):
 
-    years = sorted([int(y) for y in years_data.keys()])
+    """
 
-    counts = [years_data[str(y)] for y in years]
+    Submit one chart per known section to runner and collect the outcome.
 
-    
+    Returns the result object: {result_key: filename, ..., 'hashes': {...}, 'charts': {...}}.
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    With poll=True charts already submitted are collected while sections are still being read.
 
-    
+    With a sink every finished chart is published right away, while the others keep
 
-    # Bar chart
+    rendering, and the result gets 'keys': {result_key: {filename: object key}}.
 
-    bars = ax.bar(years, counts, color='#4a90e2', alpha=0.8, edgecolor='#333333', linewidth=0.8)
+    With budget_ms every section is read first and given a fidelity level by
 
-    
+    plan_fidelity; the result gets 'fidelity' (per chart) and 'budget' with the decisions.
 
-    # Add value labels on top of bars
+    With spec_formats ('json', 'vega-lite', 'tikz') every chart with a data-preparation stage
 
-    for bar in bars:
+    also gets a spec file per format (see export_spec), written in the chart's job, listed
 
-        height = bar.get_height()
+    under 'specs': {result_key: {format: filename}} and published together with the chart.
 
-        ax.text(bar.get_x() + bar.get_width()/2., height + 0.2,
+    spec_only=True writes only the specs.
 
-                f'{int(height)}',
+    With sprite_width the PNGs of the rendered charts are also scaled to that width and
 
-                ha='center', va='bottom', fontsize=9, family='serif', fontweight='bold')
+    packed into one sprite sheet, described under 'sprite' (see compose_sprite).
 
-    
+    A scree chart also adds 'analysis': {'scree': scree_analysis(...)}, the elbow
 
-    # Trend line (polynomial fit if enough data points)
+    cut-off with its bootstrap confidence interval. Like every PREPARE stage it only runs
 
-    if len(years) >= 3:
+    inside the chart's job (so under the runner's timeout and limits), never in this
 
-        z = np.polyfit(years, counts, min(2, len(years)-1))
+    process, and is lost with the job if it fails.
 
-        p = np.poly1d(z)
+    """
 
-        years_smooth = np.linspace(min(years), max(years), 100)
+    results = {}
 
-        ax.plot(years_smooth, p(years_smooth), '--', color='#e74c3c', linewidth=2, 
+    # Content hashes per chart, usable as ETag / cache-busting version
 
-                alpha=0.7, label='Trend')
+    hashes = {}
 
-    
+    # Status and duration of every requested chart, including failed ones
 
-    ax.set_xlabel('Publication Year', fontsize=11, family='serif')
+    charts = {}
 
-    ax.set_ylabel('Number of Studies', fontsize=11, family='serif')
+    filenames = {}
 
-    ax.set_title('Temporal Distribution of Included Studies',
+    specs = {}
 
-                 fontsize=12, fontweight='bold', family='serif', pad=12)
+    charts_by_section = {input_key: (result_key, filename, draw) for input_key, result_key, filename, draw in CHARTS}
 
-    
 
-    # Format x-axis to show all years
 
-    ax.set_xticks(years)
+    def uploaded(name, keys, error):
 
-    ax.set_xticklabels([str(y) for y in years], rotation=45, ha='right')
+        if stream:
 
-    
+            emit_record({'type': 'upload', 'name': name, 'keys': keys, 'error': error})
 
-    # Grid
 
-    ax.grid(True, axis='y', linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
 
-    ax.set_axisbelow(True)
+    def collect(record):
 
-    
+        name = record['name']
 
-    # Clean spines
+        charts[name] = {k: v for k, v in record.items() if k not in ('name', 'value')}
 
-    ax.spines['top'].set_visible(False)
+        if record['status'] == 'ok':
 
-    ax.spines['right'].set_visible(False)
+            value = record['value']
 
-    ax.spines['left'].set_linewidth(0.8)
+            if value['specs']:
 
-    ax.spines['bottom'].set_linewidth(0.8)
+                specs[name] = value['specs']
 
-    
+            if 'hashes' in value:
 
-    # Legend if trend line exists
+                results[name] = filenames[name]
 
-    if len(years) >= 3:
+                hashes[name] = value['hashes']
 
-        ax.legend(loc='upper left', frameon=True, framealpha=0.9,
+                print(f"{name} chart generated ({record['duration_ms']:.0f} ms)", file=sys.stderr)
 
-                  edgecolor='#cccccc', fontsize=9, fancybox=False)
+            if 'analysis' in value:
 
-    
+                results.setdefault('analysis', {})[name] = value['analysis']
 
-    plt.tight_layout()
+            paths = [os.path.join(output_dir, f) for f in [*hashes.get(name, {}), *value['specs'].values()]]
 
-    save_figure(fig, output_path)
+            if sink and paths:
 
-    plt.close()
+                sink.publish(name, paths, uploaded)
 
+        else:
 
+            print(f"{name} chart failed: {record['status']} - {record['error']}", file=sys.stderr)
 
-def draw_quality_assessment(data, output_path):
+        if stream:
 
-    """
+            analysis = {'analysis': results['analysis'][name]} if name in results.get('analysis', {}) else {}
 
-    Quality Assessment (Stacked Bar Chart).
+            emit_record({'type': 'chart', 'name': name, 'file': results.get(name),
 
-    Shows compliance with Kitchenham criteria (Yes/No/Partial).
+                         'hashes': hashes.get(name, {}), **analysis, **charts[name]})
 
-    Uses Plotly-like colors but with Matplotlib for consistency.
 
-    """
 
-    questions = data.get('questions', [])  # ['Q1', 'Q2', ...]
+    levels = {}
 
-    yes_counts = data.get('yes', [])
+    if budget_ms is not None:
 
-    no_counts = data.get('no', [])
+        sections = [(key, data) for key, data in sections]
 
-    partial_counts = data.get('partial', [])
+        levels, estimated = plan_fidelity({key: data for key, data in sections if key in charts_by_section},
 
-    
+                                          budget_ms, runner.jobs if runner.isolated else 1)
 
-    if not questions or len(questions) == 0:
+        results['budget'] = {'budget_ms': budget_ms, 'estimated_ms': round(estimated)}
 
-        print("WARNING: No quality assessment data available", file=sys.stderr)
+        results['fidelity'] = {}
 
-        fig, ax = plt.subplots(figsize=(10, 5))
 
-        ax.text(0.5, 0.5, 'No quality assessment data available',
 
-                ha='center', va='center', fontsize=12, color='#666666', family='serif')
+    # Each section is submitted as soon as it has been read; in framed mode the charts
 
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
+    # already submitted render (and are reported) while later sections are still arriving
 
-        save_figure(fig, output_path)
+    for input_key, data in sections:
 
-        plt.close()
+        log_section(input_key, data)
 
-        return
+        if input_key not in charts_by_section:
 
-    
+            continue
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+        if spec_only and input_key not in PREPARE:
 
-    
+            continue
 
-    x = np.arange(len(questions))
+        result_key, filename, draw = charts_by_section[input_key]
 
-    width = 0.6
+        filenames[result_key] = filename
 
-    
+        chart_path = os.path.join(output_dir, filename)
 
-    # Stacked bars
+        level = levels.get(input_key, 0)
 
-    p1 = ax.bar(x, yes_counts, width, label='Yes', color='#27ae60', alpha=0.9, edgecolor='#333333', linewidth=0.5)
+        if budget_ms is not None and not spec_only:
 
-    p2 = ax.bar(x, partial_counts, width, bottom=yes_counts, label='Partial', 
+            fidelity = FIDELITY_LEVELS[level]
 
-                color='#f39c12', alpha=0.9, edgecolor='#333333', linewidth=0.5)
+            results['fidelity'][result_key] = {
 
-    
+                'level': level, 'dpi': fidelity['dpi'],
 
-    # Calculate bottom for 'No' bars
+                'formats': OUTPUT_FORMATS if fidelity['vector'] else ['png'],
 
-    bottom_no = [yes_counts[i] + partial_counts[i] for i in range(len(questions))]
+                'max_points': fidelity['max_points'] if input_key == 'scree' else None,
 
-    p3 = ax.bar(x, no_counts, width, bottom=bottom_no, label='No', 
+                'aggregate': fidelity['aggregate'] if input_key == 'technical_synthesis' else None,
 
-                color='#e74c3c', alpha=0.9, edgecolor='#333333', linewidth=0.5)
+                'estimated_ms': round(estimate_cost(input_key, data, level)),
 
-    
+            }
 
-    # Add percentage labels
+        runner.submit(result_key, chart_job, input_key, draw, data, chart_path, result_key, profiler, level,
 
-    total = [yes_counts[i] + partial_counts[i] + no_counts[i] for i in range(len(questions))]
+                      spec_formats, spec_only)
 
-    for i in range(len(questions)):
+        if poll:
 
-        if total[i] > 0:
+            for record in runner.poll():
 
-            yes_pct = (yes_counts[i] / total[i]) * 100
+                collect(record)
 
-            if yes_pct >= 10:  # Only show if big enough
 
-                ax.text(i, yes_counts[i]/2, f'{yes_pct:.0f}%', 
 
-                        ha='center', va='center', fontsize=8, family='serif', 
+    for record in runner.results():
 
-                        color='white', fontweight='bold')
+        collect(record)
 
-    
 
-    ax.set_xlabel('Quality Criteria (Kitchenham)', fontsize=11, family='serif')
 
-    ax.set_ylabel('Number of Studies', fontsize=11, family='serif')
+    if sprite_width and hashes:
 
-    ax.set_title('Methodological Quality Assessment',
+        results['sprite'] = compose_sprite(output_dir, {name: filenames[name] for _, name, _, _ in CHARTS
 
-                 fontsize=12, fontweight='bold', family='serif', pad=12)
+                                                        if name in hashes}, sprite_width, sink, uploaded)
 
-    ax.set_xticks(x)
 
-    ax.set_xticklabels(questions, rotation=0, ha='center', fontsize=9)
 
-    
+    results['hashes'] = hashes
 
-    # Grid
+    results['charts'] = charts
 
-    ax.grid(True, axis='y', linestyle='-', linewidth=0.3, alpha=0.4, color='#cccccc')
+    if spec_formats:
 
-    ax.set_axisbelow(True)
+        results['specs'] = specs
 
-    
+    if sink:
 
-    # Clean spines
+        results['keys'], upload_errors = sink.flush()
 
-    ax.spines['top'].set_visible(False)
+        for name, error in upload_errors.items():
 
-    ax.spines['right'].set_visible(False)
+            charts[name]['upload_error'] = error
 
-    ax.spines['left'].set_linewidth(0.8)
+            print(f"{name} chart upload failed: {error}", file=sys.stderr)
 
-    ax.spines['bottom'].set_linewidth(0.8)
+    if profiler:
 
-    
+        results['profile'] = profiler.job_dir
 
-    # Legend
+        print(f"Profiling reports written to {profiler.job_dir}", file=sys.stderr)
 
-    ax.legend(loc='upper right', frameon=True, framealpha=0.9,
+    return results
 
-              edgecolor='#cccccc', fontsize=9, ncol=3, fancybox=False)
 
-    
 
-    plt.tight_layout()
+def compose_sprite(output_dir, pngs, width, sink=None, on_done=None):
 
-    save_figure(fig, output_path)
+    """
 
-    plt.close()
+    Thumbnails of the rendered charts ({result_key: png filename}) in one sprite sheet:
 
+    {'file', 'hash', 'width', 'height', 'charts': {result_key: {'x', 'y', 'width', 'height'}}}.
 
+    A failure only loses the sprite: {'error': ...}.
 
-def draw_bubble_chart(data, output_path):
-    """
-    Thematic Keyword Concentration Chart.
-    Horizontal bar chart showing frequency of key terms across included studies.
-    Data comes from author-provided keywords in included references.
-    Identifies covered research areas and thematic gaps.
     """
-    entries = data.get('entries', [])
 
-    if not entries or len(entries) == 0:
-        print("WARNING: No keyword data available for thematic chart", file=sys.stderr)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.text(0.5, 0.5, 'No thematic keyword data available',
-                ha='center', va='center', fontsize=12, color='#666666', family='serif')
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
-        save_figure(fig, output_path)
-        plt.close()
-        return
+    path = os.path.join(output_dir, SPRITE_FILENAME)
 
-    # Sort entries by count descending, take top 15
-    sorted_entries = sorted(entries, key=lambda e: e.get('count', 0), reverse=True)[:15]
+    try:
 
-    if not sorted_entries:
-        print("WARNING: No valid keyword entries for thematic chart", file=sys.stderr)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.text(0.5, 0.5, 'Insufficient keyword data for thematic mapping',
-                ha='center', va='center', fontsize=12, color='#666666', family='serif')
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
-        save_figure(fig, output_path)
-        plt.close()
-        return
+        sprite = build_sprite({name: os.path.join(output_dir, f) for name, f in pngs.items()}, path, width)
 
-    # Reverse for horizontal bar chart (highest at top)
-    sorted_entries = sorted_entries[::-1]
-    keywords = [e.get('keyword', 'Unknown').title() for e in sorted_entries]
-    counts = [e.get('count', 0) for e in sorted_entries]
-    max_count = max(counts) if counts else 1
+    except Exception as e:
 
-    # Dynamic figure height based on number of keywords
-    fig_height = max(4, len(keywords) * 0.5 + 2)
-    fig, ax = plt.subplots(figsize=(10, fig_height))
+        print(f"Sprite sheet failed: {type(e).__name__}: {e}", file=sys.stderr)
 
-    # Color gradient: lighter bars for low frequency, darker for high frequency
-    base_color = np.array([0.204, 0.596, 0.859])  # #3498db
-    colors = [np.clip(base_color * (0.4 + 0.6 * (c / max_count)), 0, 1) for c in counts]
+        return {'error': f"{type(e).__name__}: {e}"}
 
-    bars = ax.barh(range(len(keywords)), counts, color=colors, edgecolor='#333333',
-                   linewidth=0.8, height=0.65)
+    if sink:
 
-    # Add count labels at end of each bar
-    for i, (bar, count) in enumerate(zip(bars, counts)):
-        ax.text(bar.get_width() + max_count * 0.02, bar.get_y() + bar.get_height() / 2,
-                str(count), ha='left', va='center', fontsize=9, family='serif',
-                fontweight='bold', color='#333333')
+        sink.publish('sprite', [path], on_done)
 
-    ax.set_yticks(range(len(keywords)))
-    ax.set_yticklabels(keywords, fontsize=9, family='serif')
-    ax.set_xlabel('Frequency (number of studies)', fontsize=11, family='serif')
-    ax.set_title('Thematic Keyword Concentration in Included Studies',
-                 fontsize=12, fontweight='bold', family='serif', pad=12)
+    return {'file': SPRITE_FILENAME, 'hash': file_sha256(path), **sprite}
 
-    # Set x limits with padding for labels
-    ax.set_xlim(0, max_count * 1.15)
 
-    # Only integer ticks
-    ax.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
 
-    # Grid on x-axis only
-    ax.grid(True, axis='x', linestyle='--', linewidth=0.3, alpha=0.3, color='#cccccc')
-    ax.set_axisbelow(True)
+def serve_worker(args):
 
-    # Clean spines
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_linewidth(0.8)
-    ax.spines['bottom'].set_linewidth(0.8)
+    """
 
-    plt.tight_layout()
-    save_figure(fig, output_path)
-    plt.close()
+    Warm mode: one NDJSON job per stdin line,
 
+        {"id": ..., "output_dir": ..., "data": {"prisma": {...}, "scree": {...}, ...}}
 
-def draw_technical_synthesis(data, output_path):
+    answered by one {"type": "job", "id": ..., <result object>} line per job.
 
-    """
+    Charts render in this process with pooled figures, so fonts, text metrics and
 
-    Technical Synthesis Table with Pandas - DYNAMIC VERSION.
+    canvas buffers stay warm across jobs (per-chart timeouts and resource limits are
 
-    Comparative table of metrics extracted from studies.
+    not enforced here).
 
-    Automatically adapts to ANY metrics present in the data.
+    PRISMA, scree and temporal charts keep their figure per output path and on the
 
-    Format: Study | Tool | [Dynamic Metrics columns]
+    next job only update the artists whose data changed; the job's result lists what
+
+    changed under 'scenes': {chart: {'created', 'updated', 'unchanged', 'removed'}}.
 
     """
 
-    studies_data = data.get('studies', [])
+    global FIGURE_POOL, SCENES, ASSET_DIR
 
-    
+    FIGURE_POOL = FigurePool()
 
-    if not studies_data or len(studies_data) == 0:
+    SCENES = OrderedDict()
 
-        print("WARNING: No technical synthesis data available", file=sys.stderr)
+    runner = ChartRunner(jobs=0)
 
-        fig, ax = plt.subplots(figsize=(12, 4))
+    sink = create_sink(args.sink, endpoint_url=args.s3_endpoint)
 
-        ax.text(0.5, 0.5, 'No technical synthesis data available',
+    db = ChartDatabase(args.db_url) if args.db_url else None
 
-                ha='center', va='center', fontsize=12, color='#666666', family='serif')
+    for line in sys.stdin:
 
-        ax.set_xlim(0, 1); ax.set_ylim(0, 1); ax.axis('off')
+        if not line.strip():
 
-        save_figure(fig, output_path)
+            continue
 
-        plt.close()
+        try:
 
-        return
+            job = json.loads(line)
 
-    
+        except json.JSONDecodeError as e:
 
-    # Convert to DataFrame
+            emit_record({'type': 'job', 'id': None, 'error': f"Invalid job: {e}"})
 
-    df = pd.DataFrame(studies_data)
+            continue
 
-    
+        if not isinstance(job, dict) or not isinstance(job.get('data', {}), dict):
 
-    # Ensure required columns exist
+            emit_record({'type': 'job', 'id': job.get('id') if isinstance(job, dict) else None,
 
-    required_cols = ['study', 'tool']
+                         'error': "Invalid job: expected an object with 'data': {section: ...}"})
 
-    if not all(col in df.columns for col in required_cols):
+            continue
 
-        'Required columns missing in technical data',
+        try:
 
-        return
+            spec_formats = parse_spec_formats(job.get('spec', args.spec))
 
-    
+        except argparse.ArgumentTypeError as e:
 
-    # DYNAMIC: Select ALL columns from data (except study and tool which are first)
+            emit_record({'type': 'job', 'id': job.get('id'), 'error': f"Invalid job: {e}"})
 
-    display_cols = ['study', 'tool']
+            continue
 
-    metric_cols = [col for col in df.columns if col not in ['study', 'tool']]
+        # A job that fails is answered with its error; the worker, its pool and scenes stay up
 
-    display_cols.extend(metric_cols)
+        try:
 
-    
+            output_dir = job.get('output_dir') or args.output_dir
 
-    # Filter out columns that are all null/empty
+            ensure_dir(output_dir)
 
-    non_empty_cols = ['study', 'tool']
+            ASSET_DIR = args.asset_dir or os.path.join(output_dir, '_assets')
 
-    for col in metric_cols:
+            profiler = create_profiler(args.profile, args.profile_sample)
 
-        if df[col].notna().any() and not (df[col] == '').all():
+            SCENE_STATS.clear()
 
-            non_empty_cols.append(col)
+            sections = job.get('data', {}).items()
 
-    
+            if db and job.get('project_id'):
 
-    display_cols = non_empty_cols
+                sections = merge_sections(read_db_sections(db, job['project_id'], args.db_sections), sections)
 
-    df_display = df[display_cols].copy()
+            results = render_job(sections, output_dir, runner, profiler, sink=sink,
 
-    
+                                 budget_ms=job.get('budget_ms', args.budget_ms),
 
-    # DYNAMIC: Format column names generically
+                                 spec_formats=spec_formats, spec_only=job.get('spec_only', args.spec_only),
 
-    col_labels = []
+                                 sprite_width=job.get('sprite_width', args.sprite_width))
 
-    for col in display_cols:
+        except Exception as e:
 
-        if col == 'study':
+            print(f"Error: job {job.get('id')} failed ({type(e).__name__}: {e})", file=sys.stderr)
 
-            col_labels.append('Study')
+            emit_record({'type': 'job', 'id': job.get('id'), 'error': f"Job failed: {type(e).__name__}: {e}"})
 
-        elif col == 'tool':
+            continue
 
-            col_labels.append('Tool')
+        results['pool'] = FIGURE_POOL.stats()
 
-        else:
+        results['scenes'] = dict(SCENE_STATS)
 
-            # Generic formatting: capitalize and replace underscores
+        emit_record({'type': 'job', 'id': job.get('id'), **results})
 
-            formatted = col.replace('_', ' ').title()
+    sink.shutdown()
 
-            col_labels.append(formatted)
+    if db:
 
-    
+        db.close()
 
-    # Create figure
 
-    fig_height = max(4, len(df_display) * 0.6 + 2)
 
-    fig, ax = plt.subplots(figsize=(14, fig_height))
+def main():
 
-    ax.axis('off')
+    global OUTPUT_FORMATS, LAYOUT_MODE, ASSET_DIR, RASTERIZE_THRESHOLD
 
-    ax.axis('tight')
+    parser = argparse.ArgumentParser()
 
-    
+    parser.add_argument('--output-dir', required=True, help='Directory to save charts')
 
-    ax.set_title("Technical Synthesis: Performance Metrics Comparison",
+    parser.add_argument('--formats', default='png,pdf',
 
-                 fontsize=12, fontweight='bold', family='serif', pad=15)
+                        help='Comma-separated output formats (png is always written): png,pdf,svg')
 
-    
+    parser.add_argument('--layout', choices=['tight', 'fixed'], default='tight',
 
-    # Convert DataFrame to list of lists
+                        help="'fixed' uses precomputed margins instead of tight layout passes")
 
-    table_data = df_display.values.tolist()
+    parser.add_argument('--rasterize-threshold', type=int,
 
-    
+                        default=int(os.environ.get('CHART_RASTERIZE_THRESHOLD', RASTERIZE_THRESHOLD)),
 
-    table = ax.table(cellText=table_data, colLabels=col_labels,
+                        help='Rasterize layers with more points than this in PDF/SVG output (0 = keep everything vector)')
 
-                     loc='center', cellLoc='center', colLoc='center')
+    parser.add_argument('--asset-dir', default=os.environ.get('CHART_ASSET_DIR'),
 
-    
+                        help='Shared directory for prebuilt placeholder charts (default: <output-dir>/_assets)')
 
-    table.auto_set_font_size(False)
+    parser.add_argument('--profile', default=os.environ.get('CHART_PROFILE_DIR'),
 
-    table.set_fontsize(8)
+                        help='Write per-chart cProfile, collapsed-stack and allocation reports here')
 
-    table.scale(1, 1.6)
+    parser.add_argument('--profile-sample', type=int, default=int(os.environ.get('CHART_PROFILE_SAMPLE', 1)),
 
-    
+                        help='Profile only one in N jobs (default: every job)')
 
-    # Style table
+    parser.add_argument('--chart-timeout', type=float, default=float(os.environ.get('CHART_TIMEOUT', 60)),
 
-    for key, cell in table.get_celld().items():
+                        help='Time budget per chart in seconds; slower charts are reported as timeouts')
 
-        row, col = key
+    parser.add_argument('--chart-memory-mb', type=float, default=float(os.environ.get('CHART_MEMORY_MB', 0)),
 
-        cell.set_edgecolor('#333333')
+                        help='Memory a chart process may allocate, in MB (0 = unlimited; isolated charts only)')
 
-        cell.set_linewidth(0.5)
+    parser.add_argument('--chart-cpu-seconds', type=float, default=float(os.environ.get('CHART_CPU_SECONDS', 0)),
 
-        if row == 0:
+                        help='CPU time per chart process in seconds (0 = unlimited; isolated charts only)')
 
-            cell.set_text_props(weight='bold', family='serif', fontsize=8)
+    parser.add_argument('--chart-output-mb', type=float, default=float(os.environ.get('CHART_OUTPUT_MB', 0)),
 
-            cell.set_facecolor('#34495e')
+                        help='Largest file a chart may write, in MB (0 = unlimited; isolated charts only)')
 
-            cell.set_text_props(color='white')
+    parser.add_argument('--jobs', type=int, default=min(4, os.cpu_count() or 1),
 
-        else:
+                        help='Charts rendered concurrently, each in its own process (0 = in-process)')
 
-            cell.set_text_props(family='serif', fontsize=8)
+    parser.add_argument('--stream', action='store_true',
 
-            # Alternate row colors
+                        help='Emit one NDJSON record per chart as soon as it is saved, then a summary record')
 
-            if row % 2 == 1:
+    parser.add_argument('--input-format', choices=['json', 'framed'], default='json',
 
-                cell.set_facecolor('#ffffff')
+                        help="'framed': one {\"section\": ..., \"data\": ...} object per line, each chart starts as its section arrives")
 
-            else:
+    parser.add_argument('--worker', action='store_true',
 
-                cell.set_facecolor('#ecf0f1')
+                        help='Stay alive and render one NDJSON job per stdin line, reusing pooled figures')
 
-    
+    parser.add_argument('--budget-ms', type=float, default=os.environ.get('CHART_BUDGET_MS'),
 
-    plt.tight_layout()
+                        help='Latency target for the whole set: lower DPI, decimate, summarize or skip PDF '
 
-    save_figure(fig, output_path)
+                             'per chart to fit it (waits for the whole input before rendering)')
 
-    plt.close()
+    parser.add_argument('--sink', default=os.environ.get('CHART_SINK'),
 
+                        help="Where finished charts are published: 'local' (default) or s3://bucket/prefix")
 
+    parser.add_argument('--s3-endpoint', default=os.environ.get('S3_ENDPOINT_URL'),
 
-def main():
+                        help='Endpoint of an S3-compatible store such as MinIO (default: AWS)')
 
-    parser = argparse.ArgumentParser()
+    parser.add_argument('--spec', type=parse_spec_formats, default=os.environ.get('CHART_SPEC', ''),
 
-    parser.add_argument('--output-dir', required=True, help='Directory to save charts')
+                        help="Comma-separated exports of each chart's prepared data: 'vega-lite' or 'json' "
 
-    args = parser.parse_args()
+                             "(neutral chart spec) for client-side rendering, 'tikz' (TikZ/pgfplots .tex) for LaTeX")
 
+    parser.add_argument('--spec-only', action='store_true',
 
+                        help='Only write the specs (with --spec), without rasterizing any chart')
 
-    ensure_dir(args.output_dir)
+    parser.add_argument('--sprite-width', type=int, default=int(os.environ.get('CHART_SPRITE_WIDTH', 0)),
 
+                        help='Also pack thumbnails of every rendered chart, this many pixels wide, into '
 
+                             f'{SPRITE_FILENAME} with a coordinate map in the result (0 = no sprite sheet)')
 
-    # Read data from stdin
+    parser.add_argument('--db-url', default=os.environ.get('CHART_DB_URL'),
 
-    try:
+                        help='Read the --db-sections straight from this database (postgresql://... or '
 
-        input_data = json.loads(sys.stdin.read())
+                             'sqlite:///path) instead of the payload; prefer CHART_DB_URL so the '
 
-        print("Python received data:", file=sys.stderr)
+                             'credentials stay out of the process list')
 
-        print(f"   - Tiene 'prisma': {'prisma' in input_data}", file=sys.stderr)
+    parser.add_argument('--project-id', default=os.environ.get('CHART_PROJECT_ID'),
 
-        print(f"   - Tiene 'scree': {'scree' in input_data}", file=sys.stderr)
+                        help='Project whose data is read with --db-url')
 
-        if 'scree' in input_data:
+    parser.add_argument('--db-sections', type=parse_db_sections, default=','.join(DEFAULT_DB_SECTIONS),
 
-            scores_count = len(input_data['scree'].get('scores', []))
+                        help=f"Comma-separated sections read from the database, from {', '.join(DB_SECTIONS)} "
 
-            print(f"   - Scores en scree: {scores_count}", file=sys.stderr)
+                             f"(default: {','.join(DEFAULT_DB_SECTIONS)}; the others ignore the PRISMA cap)")
 
-            if scores_count > 0:
+    args = parser.parse_args()
 
-                print(f"   - Primer score: {input_data['scree']['scores'][0]}", file=sys.stderr)
+    if args.spec_only and not args.spec:
 
-        print(f"   - Tiene 'search_strategy': {'search_strategy' in input_data}", file=sys.stderr)
+        parser.error('--spec-only requires --spec')
 
-    except json.JSONDecodeError:
+    if args.db_url and not args.project_id and not args.worker:
 
-        print("Error: Invalid JSON input", file=sys.stderr)
+        parser.error('--db-url requires --project-id')
 
-        sys.exit(1)
 
 
+    OUTPUT_FORMATS = ['png'] + [f for f in args.formats.split(',') if f in ('pdf', 'svg')]
 
-    results = {}
+    LAYOUT_MODE = args.layout
+
+    RASTERIZE_THRESHOLD = args.rasterize_threshold
+
+    ensure_dir(args.output_dir)
 
+    ASSET_DIR = args.asset_dir or os.path.join(args.output_dir, '_assets')
 
 
-    if 'prisma' in input_data:
 
-        prisma_path = os.path.join(args.output_dir, 'prisma_flow.png')
+    if args.worker:
 
-        draw_prisma(input_data['prisma'], prisma_path)
+        serve_worker(args)
 
-        results['prisma'] = 'prisma_flow.png'
+        return
 
 
 
-    if 'scree' in input_data:
+    profiler = create_profiler(args.profile, args.profile_sample)
 
-        scree_path = os.path.join(args.output_dir, 'scree_plot.png')
+    # Every chart gets its own failure boundary, time budget and resource limits: charts
 
-        draw_scree(input_data['scree'], scree_path)
+    # that finish are returned even when another one raises, hangs or outgrows its limits
 
-        results['scree'] = 'scree_plot.png'
+    limits = ResourceLimits(args.chart_memory_mb, args.chart_cpu_seconds, args.chart_output_mb)
 
+    runner = ChartRunner(jobs=args.jobs, timeout=args.chart_timeout, limits=limits)
 
+    try:
 
-    if 'search_strategy' in input_data:
+        sink = create_sink(args.sink, endpoint_url=args.s3_endpoint)
 
-        chart1_path = os.path.join(args.output_dir, 'chart1_search.png')
+    except (ValueError, RuntimeError) as e:
 
-        draw_search_table(input_data['search_strategy'], chart1_path)
+        print(f"Error: {e}", file=sys.stderr)
 
-        results['chart1'] = 'chart1_search.png'
+        sys.exit(1)
 
-    
+    try:
 
-    # New charts
+        db = ChartDatabase(args.db_url) if args.db_url else None
 
-    if 'temporal_distribution' in input_data:
+    except (ValueError, RuntimeError) as e:
 
-        temporal_path = os.path.join(args.output_dir, 'temporal_distribution.png')
+        print(f"Error: {e}", file=sys.stderr)
 
-        draw_temporal_distribution(input_data['temporal_distribution'], temporal_path)
+        sys.exit(1)
 
-        results['temporal_distribution'] = 'temporal_distribution.png'
+    sections = read_sections(sys.stdin, args.input_format)
 
-        print("Temporal distribution chart generated", file=sys.stderr)
+    if db:
 
-    
+        # Database sections first: they start rendering while the payload is still read
 
-    if 'quality_assessment' in input_data:
+        sections = merge_sections(read_db_sections(db, args.project_id, args.db_sections), sections)
 
-        quality_path = os.path.join(args.output_dir, 'quality_assessment.png')
+    try:
 
-        draw_quality_assessment(input_data['quality_assessment'], quality_path)
+        results = render_job(sections, args.output_dir, runner, profiler,
 
-        results['quality_assessment'] = 'quality_assessment.png'
+                             stream=args.stream, poll=args.input_format == 'framed', sink=sink,
 
-        print("Quality assessment chart generated", file=sys.stderr)
+                             budget_ms=args.budget_ms, spec_formats=args.spec, spec_only=args.spec_only,
 
-    
+                             sprite_width=args.sprite_width)
+
+    except json.JSONDecodeError:
 
-    if 'bubble_chart' in input_data:
+        print("Error: Invalid JSON input", file=sys.stderr)
 
-        bubble_path = os.path.join(args.output_dir, 'bubble_chart.png')
+        sys.exit(1)
 
-        draw_bubble_chart(input_data['bubble_chart'], bubble_path)
+    finally:
 
-        results['bubble_chart'] = 'bubble_chart.png'
+        sink.shutdown()
 
-        print("Ã¢Å“â€¦ Bubble chart generated", file=sys.stderr)
+        if db:
 
-    
+            db.close()
 
-    if 'technical_synthesis' in input_data:
 
-        synthesis_path = os.path.join(args.output_dir, 'technical_synthesis.png')
 
-        draw_technical_synthesis(input_data['technical_synthesis'], synthesis_path)
+    if args.stream:
 
-        results['technical_synthesis'] = 'technical_synthesis.png'
+        emit_record({'type': 'summary', **results})
 
-        print("Technical synthesis table generated", file=sys.stderr)
+    else:
 
+        print(json.dumps(finite_json(results), allow_nan=False))
 
 
-    print(json.dumps(results))
 
 
 
@@ -0,0 +1,606 @@
+"""
+Streaming parser for bibliographic exports (RIS, BibTeX, CSV, PubMed nbib, Web of Science ciw).
+
+Reads the export from a file path (or stdin) line by line, so memory does not grow
+with the file: only the record being read and the current batch are held. Records
+are normalized to the objects ImportReferencesUseCase builds (parseRIS, parseBibTeX,
+parseCSV/normalizeCSVFields) and written to stdout as NDJSON:
+    {"type": "batch", "records": [...]}                 every --batch-size records
+    {"type": "error", "record": n, "line": l, "error": "..."}   a record that could not be used
+    {"type": "stats", "format", "records", "errors", "bytes", "seconds", "recordsPerSecond", "mbPerSecond"}
+The reader waits on stdout while Node stores a batch, so a slow database slows the
+parse down instead of piling records up.
+
+nbib (MEDLINE) and ciw (Web of Science plain text) have their own tag sets and
+record separators; the Node use case reads them as RIS, which loses year, journal
+and DOI on those exports.
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import time
+
+FORMATS = ('ris', 'bib', 'csv', 'nbib', 'ciw')
+# File extensions handled like one of FORMATS (as in ImportReferencesUseCase)
+FORMAT_ALIASES = {'txt': 'ris'}
+DEFAULT_BATCH_SIZE = 500
+
+csv.field_size_limit(2 ** 31 - 1)
+
+
+class ParseError(Exception):
+    """A record that cannot be turned into a reference."""
+
+
+def parse_int(value):
+    """Leading integer of value, like JavaScript parseInt; None when there is none."""
+    match = re.match(r'\s*([+-]?\d+)', str(value))
+    return int(match.group(1)) if match else None
+
+
+class CountingReader(io.RawIOBase):
+    """Binary stream wrapper that counts the bytes read (pipes cannot tell())."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(len(buffer))
+        self.bytes_read += len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+# --------------------------------------------------------------------------- RIS
+
+RIS_TAG = re.compile(r'^([A-Z0-9]{2})\s*-?\s*(.*)$')
+RIS_END = re.compile(r'^ER\s*-?\s*$')
+
+RIS_TYPES = {
+    'JOUR': 'article', 'CONF': 'conference', 'BOOK': 'book', 'CHAP': 'chapter',
+    'THES': 'thesis', 'RPRT': 'report', 'GEN': 'generic',
+}
+
+
+def new_ris_reference():
+    return {
+        'title': '', 'authors': [], 'year': None, 'journal': '', 'volume': '', 'issue': '',
+        'pages': '', 'doi': '', 'abstract': '', 'keywords': [], 'url': '', 'type': 'article',
+        'database': None, 'externalId': None,
+    }
+
+
+def ris_tag(ref, tag, value):
+    """processRISTag of the Node use case."""
+    value = value.strip()
+    if not value:
+        return
+    if tag in ('TI', 'T1', 'CT'):
+        ref['title'] = ref['title'] or value
+    elif tag in ('AU', 'A1', 'A2'):
+        ref['authors'].append(value)
+    elif tag in ('PY', 'Y1'):
+        year = parse_int(value)
+        if year is not None and 1900 < year < 2100:
+            ref['year'] = year
+    elif tag in ('JO', 'JF', 'JA', 'T2'):
+        ref['journal'] = ref['journal'] or value
+    elif tag in ('VL', 'VO'):
+        ref['volume'] = value
+    elif tag == 'IS':
+        ref['issue'] = value
+    elif tag == 'SP':
+        ref['pages'] = value
+    elif tag == 'EP':
+        ref['pages'] = f"{ref['pages']}-{value}" if ref['pages'] else value
+    elif tag == 'DO':
+        ref['doi'] = value
+    elif tag in ('AB', 'N2'):
+        ref['abstract'] = ref['abstract'] or value
+    elif tag == 'KW':
+        ref['keywords'].append(value)
+    elif tag in ('UR', 'L1', 'L2', 'L3'):
+        ref['url'] = ref['url'] or value
+    elif tag == 'TY':
+        ref['type'] = RIS_TYPES.get(value, 'article')
+    elif tag == 'DB':
+        ref['database'] = value
+    elif tag in ('AN', 'ID'):
+        ref['externalId'] = ref['externalId'] or value
+
+
+def finish_tagged(ref):
+    if not ref['title']:
+        raise ParseError('missing title')
+    return {**ref, 'authors': '; '.join(ref['authors']), 'keywords': '; '.join(ref['keywords'])}
+
+
+def ris_records(lines):
+    """(first line, record) for each RIS record: tags up to an ER line."""
+    ref, tag, value, start = None, None, '', None
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\n')
+        if RIS_END.match(line):
+            if tag and value:
+                ris_tag(ref, tag, value)
+            if ref is not None:
+                yield start, ref
+            ref, tag, value, start = None, None, '', None
+            continue
+        match = RIS_TAG.match(line)
+        if match:
+            if ref is None:
+                ref, start = new_ris_reference(), number
+            elif tag and value:
+                ris_tag(ref, tag, value)
+            tag, value = match.groups()
+        elif tag and line.strip():
+            value += ' ' + line.strip()
+    if ref is not None:
+        if tag and value:
+            ris_tag(ref, tag, value)
+        yield start, ref
+
+
+# ------------------------------------------------------------ MEDLINE (nbib)
+
+MEDLINE_TAG = re.compile(r'^([A-Z]{2,4})\s*- (.*)$')
+
+
+def medline_tag(ref, tag, value):
+    value = value.strip()
+    if not value:
+        return
+    if tag == 'TI':
+        ref['title'] = ref['title'] or value
+    elif tag == 'AU':
+        ref['authors'].append(value)
+    elif tag == 'DP':
+        year = parse_int(value)
+        if year is not None and 1900 < year < 2100:
+            ref['year'] = year
+    elif tag in ('JT', 'TA'):
+        # Full journal title first, abbreviation as fallback
+        if tag == 'JT' or not ref['journal']:
+            ref['journal'] = value
+    elif tag == 'VI':
+        ref['volume'] = value
+    elif tag == 'IP':
+        ref['issue'] = value
+    elif tag == 'PG':
+        ref['pages'] = value
+    elif tag in ('AID', 'LID') and value.endswith('[doi]'):
+        ref['doi'] = ref['doi'] or value[:-len('[doi]')].strip()
+    elif tag == 'AB':
+        ref['abstract'] = ref['abstract'] or value
+    elif tag in ('OT', 'MH'):
+        ref['keywords'].append(value)
+    elif tag == 'PMID':
+        ref['externalId'] = value
+        ref['url'] = ref['url'] or f'https://pubmed.ncbi.nlm.nih.gov/{value}/'
+
+
+def medline_records(lines):
+    """MEDLINE records: "TAG - value" lines, continuations indented, records split by blank lines."""
+    ref, tag, value, start = None, None, '', None
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\n')
+        if not line.strip():
+            if ref is not None:
+                if tag:
+                    medline_tag(ref, tag, value)
+                yield start, ref
+            ref, tag, value, start = None, None, '', None
+            continue
+        match = MEDLINE_TAG.match(line)
+        if match:
+            if ref is None:
+                ref, start = new_ris_reference(), number
+                ref['database'] = 'PubMed'
+            elif tag:
+                medline_tag(ref, tag, value)
+            tag, value = match.groups()
+        elif tag:
+            value += ' ' + line.strip()
+    if ref is not None:
+        if tag:
+            medline_tag(ref, tag, value)
+        yield start, ref
+
+
+# ---------------------------------------------------- Web of Science (ciw)
+
+WOS_TYPES = {'J': 'article', 'C': 'conference', 'B': 'book', 'S': 'chapter', 'P': 'generic'}
+
+
+def wos_tag(ref, tag, values):
+    """values: the lines of the field (AU/AF/CR keep one item per line)."""
+    value = ' '.join(v.strip() for v in values).strip()
+    if not value:
+        return
+    if tag == 'TI':
+        ref['title'] = value
+    elif tag == 'AU':
+        ref['authors'].extend(v.strip() for v in values if v.strip())
+    elif tag == 'PY':
+        year = parse_int(value)
+        if year is not None and 1900 < year < 2100:
+            ref['year'] = year
+    elif tag == 'SO':
+        ref['journal'] = value
+    elif tag == 'VL':
+        ref['volume'] = value
+    elif tag == 'IS':
+        ref['issue'] = value
+    elif tag == 'BP':
+        ref['pages'] = value
+    elif tag == 'EP':
+        ref['pages'] = f"{ref['pages']}-{value}" if ref['pages'] else value
+    elif tag == 'DI':
+        ref['doi'] = value
+    elif tag == 'AB':
+        ref['abstract'] = value
+    elif tag in ('DE', 'ID'):
+        ref['keywords'].extend(k.strip() for k in value.split(';') if k.strip())
+    elif tag == 'UT':
+        ref['externalId'] = value
+    elif tag == 'PT':
+        ref['type'] = WOS_TYPES.get(value, 'article')
+
+
+def wos_records(lines):
+    """Web of Science plain text: "TAG value" lines, continuations indented by 3 spaces, ER ends a record."""
+    ref, tag, values, start = None, None, [], None
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\n')
+        head = line[:2]
+        if line.startswith('   ') and tag:
+            values.append(line[3:])
+            continue
+        if head in ('FN', 'VR', 'EF') or not line.strip():
+            continue
+        if head == 'ER':
+            if ref is not None:
+                if tag:
+                    wos_tag(ref, tag, values)
+                yield start, ref
+            ref, tag, values, start = None, None, [], None
+            continue
+        if ref is None:
+            ref, start = new_ris_reference(), number
+            ref['database'] = 'Web of Science'
+        elif tag:
+            wos_tag(ref, tag, values)
+        tag, values = head, [line[3:]]
+    if ref is not None:
+        if tag:
+            wos_tag(ref, tag, values)
+        yield start, ref
+
+
+# ---------------------------------------------------------------- BibTeX
+
+BIB_ENTRY = re.compile(r'^@(\w+)\s*\{\s*([^,\s]+)\s*,', re.S)
+BIB_KEY = re.compile(r'\s*(\w+)\s*=')
+
+# Entries that are not references
+BIB_SKIPPED = ('comment', 'preamble', 'string')
+
+BIB_TYPES = {
+    'article': 'article', 'inproceedings': 'conference', 'conference': 'conference',
+    'book': 'book', 'incollection': 'chapter', 'phdthesis': 'thesis',
+    'mastersthesis': 'thesis', 'techreport': 'report', 'misc': 'generic',
+}
+
+
+def bib_fields(content):
+    """extractBibTeXFields of the Node use case: key = {value} | "value" | value."""
+    fields = {}
+    content = content.strip()
+    if content.endswith('}'):
+        content = content[:-1]
+    pos, n = 0, len(content)
+    while pos < n:
+        match = BIB_KEY.match(content, pos)
+        if not match:
+            break
+        key = match.group(1)
+        pos = match.end()
+        while pos < n and content[pos].isspace():
+            pos += 1
+        if pos >= n:
+            break
+        delimiter = content[pos]
+        if delimiter == '{':
+            depth, pos = 1, pos + 1
+            start = pos
+            while pos < n and depth > 0:
+                if content[pos] == '\\' and pos + 1 < n:
+                    pos += 2
+                    continue
+                if content[pos] == '{':
+                    depth += 1
+                elif content[pos] == '}':
+                    depth -= 1
+                if depth > 0:
+                    pos += 1
+            value = content[start:pos]
+            pos += 1
+        elif delimiter == '"':
+            pos += 1
+            start = pos
+            while pos < n and content[pos] != '"':
+                pos += 2 if content[pos] == '\\' and pos + 1 < n else 1
+            value = content[start:pos]
+            pos += 1
+        else:
+            start = pos
+            while pos < n and content[pos] not in ',}\n':
+                pos += 1
+            value = content[start:pos].strip()
+        if value.strip():
+            fields[key] = value
+        while pos < n and (content[pos] == ',' or content[pos].isspace()):
+            pos += 1
+    return fields
+
+
+def bib_reference(entry):
+    if entry[1:].lower().startswith(BIB_SKIPPED):
+        return None
+    match = BIB_ENTRY.match(entry)
+    if not match:
+        raise ParseError('no citation key')
+    entry_type, key = match.groups()
+    ref = {
+        'type': BIB_TYPES.get(entry_type.lower(), 'article'), 'citationKey': key.strip(),
+        'title': '', 'authors': '', 'year': None, 'journal': '', 'volume': '', 'issue': '',
+        'pages': '', 'doi': '', 'abstract': '', 'keywords': '', 'url': '', 'database': None,
+        'externalId': None,
+    }
+    for name, value in bib_fields(entry[match.end():]).items():
+        value = value.strip()
+        name = name.lower()
+        if name == 'title':
+            ref['title'] = value
+        elif name == 'author':
+            ref['authors'] = value.replace(' and ', '; ')
+        elif name == 'year':
+            year = parse_int(value)
+            if year is not None and 1900 < year < 2100:
+                ref['year'] = year
+        elif name in ('journal', 'booktitle'):
+            ref['journal'] = ref['journal'] or value
+        elif name == 'volume':
+            ref['volume'] = value
+        elif name in ('number', 'issue'):
+            ref['issue'] = value
+        elif name in ('pages', 'doi', 'abstract', 'keywords'):
+            ref[name] = value
+        elif name in ('url', 'link'):
+            ref['url'] = ref['url'] or value
+        elif name in ('database', 'source'):
+            ref['database'] = value
+        elif name in ('eprint', 'id', 'articleid'):
+            ref['externalId'] = ref['externalId'] or value
+    if not ref['title']:
+        raise ParseError('missing title')
+    return ref
+
+
+def bib_records(lines):
+    """Entries start with "@" at the start of a line and run until the next one."""
+    entry, start = [], None
+    for number, line in enumerate(lines, 1):
+        # Entries glued together ("}@article{...") as the Node parser splits them
+        for k, part in enumerate(line.replace('}@', '}\n@').split('\n')):
+            if k and not part:
+                continue
+            if part.startswith('@'):
+                if entry:
+                    yield start, ''.join(entry)
+                entry, start = [], number
+            if start is not None:
+                entry.append(part + '\n')
+    if entry:
+        yield start, ''.join(entry)
+
+
+# ------------------------------------------------------------------- CSV
+
+CSV_FIELDS = {
+    'title': ['title', 'article title', 'document title', 'item title', 'publication title',
+              'article name', 'paper title', 'ti', 'bt'],
+    'abstract': ['abstract', 'summary', 'description', 'ab', 'abstract note'],
+    'authors': ['authors', 'author', 'author names', 'creators', 'au', 'a1', 'author full names', 'inventor'],
+    'year': ['year', 'publication year', 'date', 'year published', 'py', 'yr', 'date added to xplore',
+             'online date', 'issue date', 'cover date'],
+    'journal': ['publication title', 'journal', 'source', 'publication name', 'source title',
+                'journal title', 'jo', 'jf', 'ja', 'booktitle', 'proceedings'],
+    'doi': ['doi', 'digital object identifier', 'do'],
+    'keywords': ['author keywords', 'keywords', 'index terms', 'ieee terms', 'mesh_terms', 'kw',
+                 'subject', 'descriptors'],
+    'externalId': ['eid', 'scopus id', 'pubmed id', 'pmid', 'wos id', 'accession number',
+                   'document identifier', 'id', 'an'],
+    'url': ['url', 'pdf link', 'link', 'ur', 'article url', 'online link'],
+    'citationCount': ['article citation count', 'times cited', 'cited by', 'citations', 'citation count'],
+}
+
+
+def first_value(raw, field):
+    for name in CSV_FIELDS[field]:
+        value = raw.get(name, '').strip()
+        if value:
+            return value
+    return ''
+
+
+def split_list(value):
+    for separator in (';', '|'):
+        if separator in value:
+            return [part.strip() for part in value.split(separator) if part.strip()]
+    return None
+
+
+def normalize_csv(raw):
+    """normalizeCSVFields of the Node use case."""
+    ref = {
+        'title': first_value(raw, 'title'), 'abstract': first_value(raw, 'abstract'), 'authors': [],
+        'year': None, 'journal': first_value(raw, 'journal'), 'doi': '', 'keywords': [],
+        'database': 'CSV Import', 'externalId': first_value(raw, 'externalId') or None,
+        'url': first_value(raw, 'url'), 'citationCount': 0,
+    }
+
+    authors = first_value(raw, 'authors')
+    if authors:
+        ref['authors'] = split_list(authors)
+        if ref['authors'] is None:
+            parts = authors.split(',')
+            if len(parts) > 2:
+                # "Last1, First1, Last2, First2"
+                ref['authors'] = [f'{parts[i].strip()}, {parts[i + 1].strip()}'
+                                  for i in range(0, len(parts) - 1, 2) if parts[i] and parts[i + 1]]
+            else:
+                ref['authors'] = [authors]
+
+    for name in CSV_FIELDS['year']:
+        match = re.search(r'\d{4}', raw.get(name, ''))
+        if match:
+            ref['year'] = int(match.group())
+            break
+
+    doi = first_value(raw, 'doi')
+    ref['doi'] = doi.replace('https://doi.org/', '', 1).replace('http://dx.doi.org/', '', 1)
+
+    keywords = first_value(raw, 'keywords')
+    if keywords:
+        ref['keywords'] = split_list(keywords)
+        if ref['keywords'] is None:
+            ref['keywords'] = [k.strip() for k in keywords.split(',') if k.strip()]
+
+    for name in CSV_FIELDS['citationCount']:
+        count = parse_int(raw[name]) if raw.get(name) else None
+        if count is not None:
+            ref['citationCount'] = count
+            break
+
+    if raw.get('document identifier') or raw.get('ieee terms'):
+        ref['database'] = 'IEEE Xplore'
+    elif raw.get('eid') or raw.get('scopus id'):
+        ref['database'] = 'Scopus'
+    elif raw.get('pmid') or raw.get('mesh_terms'):
+        ref['database'] = 'PubMed'
+    elif raw.get('wos id') or raw.get('times cited'):
+        ref['database'] = 'Web of Science'
+    elif raw.get('database'):
+        ref['database'] = raw['database'].strip()
+    elif raw.get('source database'):
+        ref['database'] = raw['source database'].strip()
+
+    if not ref['title']:
+        raise ParseError('missing title')
+    return ref
+
+
+def csv_records(lines):
+    """Rows as {lowercase header: value}; quoted fields may span lines."""
+    reader = csv.reader(lines)
+    headers = None
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        if headers is None:
+            headers = [h.strip().lower() for h in row]
+            continue
+        yield reader.line_num, dict(zip(headers, (value.strip() for value in row)))
+
+
+# ------------------------------------------------------------------ driver
+
+READERS = {
+    'ris': (ris_records, finish_tagged),
+    'nbib': (medline_records, finish_tagged),
+    'ciw': (wos_records, finish_tagged),
+    'bib': (bib_records, bib_reference),
+    'csv': (csv_records, normalize_csv),
+}
+
+
+def parse_records(lines, fmt):
+    """Yield (line, reference) or (line, ParseError) for each record of the export."""
+    records, normalize = READERS[fmt]
+    for line, record in records(lines):
+        try:
+            reference = normalize(record)
+        except (ParseError, ValueError, KeyError, IndexError) as e:
+            yield line, e
+            continue
+        if reference is not None:
+            yield line, reference
+
+
+def stream(source, fmt, out, batch_size=DEFAULT_BATCH_SIZE):
+    """Parse the binary stream source, writing NDJSON batches, errors and stats to out."""
+    counter = CountingReader(source)
+    # newline='' keeps line breaks inside quoted CSV fields; other formats get universal newlines
+    text = io.TextIOWrapper(io.BufferedReader(counter), encoding='utf-8-sig', errors='replace',
+                            newline='' if fmt == 'csv' else None)
+    started = time.perf_counter()
+    batch, parsed, errors = [], 0, 0
+    for index, (line, result) in enumerate(parse_records(text, fmt)):
+        if isinstance(result, Exception):
+            errors += 1
+            out.write(json.dumps({'type': 'error', 'record': index + 1, 'line': line, 'error': str(result)}) + '\n')
+            continue
+        batch.append(result)
+        parsed += 1
+        if len(batch) >= batch_size:
+            out.write(json.dumps({'type': 'batch', 'records': batch}) + '\n')
+            out.flush()
+            batch = []
+    if batch:
+        out.write(json.dumps({'type': 'batch', 'records': batch}) + '\n')
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'type': 'stats',
+        'format': fmt,
+        'records': parsed,
+        'errors': errors,
+        'bytes': counter.bytes_read,
+        'seconds': round(seconds, 3),
+        'recordsPerSecond': round(parsed / seconds) if seconds else parsed,
+        'mbPerSecond': round(counter.bytes_read / 1e6 / seconds, 2) if seconds else 0,
+    }
+    out.write(json.dumps(stats) + '\n')
+    out.flush()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream bibliographic exports as NDJSON reference batches')
+    parser.add_argument('path', nargs='?', help='Export file (default: stdin)')
+    parser.add_argument('--format', required=True, choices=FORMATS + tuple(FORMAT_ALIASES))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = FORMAT_ALIASES.get(args.format, args.format)
+    if args.path:
+        with open(args.path, 'rb', buffering=0) as source:
+            stats = stream(source, fmt, sys.stdout, args.batch_size)
+    else:
+        stats = stream(sys.stdin.buffer, fmt, sys.stdout, args.batch_size)
+    print(f"{stats['records']} records, {stats['errors']} errors, "
+          f"{stats['recordsPerSecond']} records/s ({stats['mbPerSecond']} MB/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
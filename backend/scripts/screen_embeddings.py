@@ -0,0 +1,144 @@
+"""
+Batched cosine-similarity scoring for embeddings screening.
+
+Reads from stdin
+    {"categories": [[...], ...],            # protocol/category embeddings ("category": [...] for one)
+     "references": [{"id", "embedding"}, ...],
+     "threshold": 0.7}
+and writes {"results": [...], "summary": {...}} to stdout, one result per reference:
+    {"referenceId", "similarity", "recommendation", "confidence"[, "category"]}
+
+Every vector is normalized once and the similarities come from one float32 matrix
+product per block of CHUNK_ROWS references, so memory stays bounded by the block
+and not by the whole (references x categories) computation. With several
+categories a reference gets its best one (its index is returned as "category").
+With --store DIR the references only carry their ids and the embeddings are read
+from an EmbeddingStore (embedding_store.py) as a memmap, without going through JSON,
+under a shared lock so a concurrent put/compact cannot rewrite the file mid-read.
+Recommendation and confidence follow ScreenReferencesWithEmbeddingsUseCase:
+include when similarity >= threshold, confidence measured as the distance to the
+threshold relative to the room on that side of it.
+"""
+
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, locked
+
+CHUNK_ROWS = 4096
+DEFAULT_THRESHOLD = 0.7
+
+
+def normalize_rows(matrix):
+    """Rows of matrix scaled to unit length, in place; zero rows stay zero (similarity 0)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return matrix
+
+
+def cosine_scores(references, categories, chunk_rows=CHUNK_ROWS):
+    """
+    Best cosine similarity of each reference row against the category rows.
+
+    references: (n, d) array, may be a read-only memmap (blocks are copied as float32)
+    categories: (k, d) array
+    Returns (similarity float32 (n,), category index int (n,)).
+    """
+    categories = normalize_rows(np.array(categories, dtype=np.float32, ndmin=2))
+    n = len(references)
+    if n and references.shape[1] != categories.shape[1]:
+        raise ValueError(f"Embedding size mismatch: references have {references.shape[1]} "
+                         f"dimensions, categories {categories.shape[1]}")
+    similarity = np.empty(n, dtype=np.float32)
+    best = np.empty(n, dtype=np.intp)
+    category_t = np.ascontiguousarray(categories.T)
+    for start in range(0, n, chunk_rows):
+        block = normalize_rows(np.array(references[start:start + chunk_rows], dtype=np.float32))
+        scores = block @ category_t
+        best[start:start + len(block)] = scores.argmax(axis=1)
+        similarity[start:start + len(block)] = scores.max(axis=1)
+    return similarity, best
+
+
+def recommendations(similarity, threshold):
+    """(include mask, confidence) with the threshold semantics of the Node use case."""
+    similarity = similarity.astype(np.float64)
+    include = similarity >= threshold
+    eps = np.finfo(np.float32).eps
+    confidence = np.where(include,
+                          (similarity - threshold) / max(1 - threshold, eps),
+                          (threshold - similarity) / max(threshold, eps))
+    return include, confidence
+
+
+def screen(payload, chunk_rows=CHUNK_ROWS, store=None):
+    threshold = float(payload.get('threshold', DEFAULT_THRESHOLD))
+    categories = payload.get('categories') or [payload['category']]
+    entries = payload.get('references', [])
+    if store is not None:
+        references = store.vectors([entry['id'] for entry in entries])
+    elif entries:
+        references = np.array([entry['embedding'] for entry in entries], dtype=np.float32)
+        if references.ndim != 2:
+            raise ValueError("All reference embeddings must have the same length")
+    else:
+        references = np.empty((0, len(categories[0])), dtype=np.float32)
+
+    similarity, best = cosine_scores(references, categories, chunk_rows)
+    include, confidence = recommendations(similarity, threshold)
+
+    several = len(categories) > 1
+    results = []
+    for entry, sim, inc, conf, cat in zip(entries, similarity.tolist(), include.tolist(),
+                                          confidence.tolist(), best.tolist()):
+        result = {
+            'referenceId': entry['id'],
+            'similarity': round(sim, 4),
+            'recommendation': 'include' if inc else 'exclude',
+            'confidence': round(conf, 3),
+        }
+        if several:
+            result['category'] = cat
+        results.append(result)
+
+    to_include = int(include.sum())
+    return {
+        'results': results,
+        'summary': {
+            'total': len(results),
+            'toInclude': to_include,
+            'toExclude': len(results) - to_include,
+            'avgSimilarity': round(float(similarity.mean()), 4) if len(results) else 0,
+            'threshold': threshold,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched cosine-similarity screening')
+    parser.add_argument('--store', help='Read the reference embeddings from this embedding store')
+    args = parser.parse_args()
+
+    try:
+        payload = json.loads(sys.stdin.read())
+    except json.JSONDecodeError:
+        print("Error: Invalid JSON input", file=sys.stderr)
+        sys.exit(1)
+    try:
+        with locked(args.store, shared=True) if args.store else nullcontext():
+            result = screen(payload, store=EmbeddingStore(args.store) if args.store else None)
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{result['summary']['toInclude']} of {result['summary']['total']} references "
+          f"above the {result['summary']['threshold']} threshold", file=sys.stderr)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
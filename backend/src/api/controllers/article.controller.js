@@ -715,7 +715,7 @@ class ArticleController {
       }
 
       const chartFiles = fs.readdirSync(chartsDir).filter(file => 
-        file.endsWith('.png') || file.endsWith('.pdf') || file.endsWith('.eps')
+        file.endsWith('.png') || file.endsWith('.pdf') || file.endsWith('.eps') || file.endsWith('.tex')
       );
 
       if (chartFiles.length === 0) {
@@ -738,7 +738,7 @@ class ArticleController {
       chartFiles.forEach(file => {
         const filePath = path.join(chartsDir, file);
         const ext = path.extname(file).toLowerCase();
-        const subfolder = ext === '.pdf' ? 'vector/' : ext === '.eps' ? 'vector/' : 'raster/';
+        const subfolder = ext === '.pdf' ? 'vector/' : ext === '.eps' ? 'vector/' : ext === '.tex' ? 'tikz/' : 'raster/';
         archive.file(filePath, { name: `${subfolder}${file}` });
       });
 
@@ -789,8 +789,9 @@ class ArticleController {
 
       archive.pipe(res);
 
-      // 1. Script principal
+      // 1. Script principal y sus módulos auxiliares (scripts/chart_*.py)
       archive.file(pythonScriptPath, { name: 'generate_charts.py' });
+      this.chartScriptModules(pythonScriptPath).forEach(({ filePath, name }) => archive.file(filePath, { name }));
 
       // 2. Requirements
       const requirementsContent = `# Python dependencies for chart generation
@@ -940,12 +941,13 @@ You can modify:
       const chartsDir = path.join(__dirname, '../../../uploads/charts');
       if (fs.existsSync(chartsDir)) {
         const chartFiles = fs.readdirSync(chartsDir).filter(file => 
-          file.endsWith('.png') || file.endsWith('.pdf') || file.endsWith('.eps')
+          file.endsWith('.png') || file.endsWith('.pdf') || file.endsWith('.eps') || file.endsWith('.tex')
         );
         chartFiles.forEach(file => {
           const filePath = path.join(chartsDir, file);
           const ext = path.extname(file).toLowerCase();
-          const subfolder = ext === '.pdf' || ext === '.eps' ? 'charts/vector/' : 'charts/raster/';
+          // charts/tikz/: código TikZ/pgfplots que article.tex usa en lugar de las imágenes
+          const subfolder = ext === '.tex' ? 'charts/tikz/' : ext === '.pdf' || ext === '.eps' ? 'charts/vector/' : 'charts/raster/';
           archive.file(filePath, { name: `${subfolder}${file}` });
         });
       }
@@ -954,6 +956,7 @@ You can modify:
       const pythonScriptPath = path.join(__dirname, '../../../scripts/generate_charts.py');
       if (fs.existsSync(pythonScriptPath)) {
         archive.file(pythonScriptPath, { name: 'generate_charts.py' });
+        this.chartScriptModules(pythonScriptPath).forEach(({ filePath, name }) => archive.file(filePath, { name }));
       }
 
       // 6. README con instrucciones
@@ -1033,6 +1036,16 @@ You can modify:
     return csv;
   }
 
+  /**
+   * Módulos que generate_charts.py importa (scripts/chart_*.py); van junto al script en los ZIP
+   */
+  chartScriptModules(pythonScriptPath) {
+    const scriptsDir = path.dirname(pythonScriptPath);
+    return fs.readdirSync(scriptsDir)
+      .filter(file => file.startsWith('chart_') && file.endsWith('.py'))
+      .map(file => ({ filePath: path.join(scriptsDir, file), name: file }));
+  }
+
   /**
    * Escapar valores CSV
    */
@@ -1058,7 +1071,8 @@ You can modify:
 3. **rqs_data.csv** - Research Question Schema data (importable to Excel/R/Python)
 4. **charts/raster/** - All generated charts in PNG format (300 DPI)
 5. **charts/vector/** - All generated charts in PDF vector format (required by high-impact journals)
-6. **generate_charts.py** - Python script to regenerate/customize charts
+6. **charts/tikz/** - Native TikZ/pgfplots code of the PRISMA, scree, temporal, quality and keyword charts
+7. **generate_charts.py** - Python script to regenerate/customize charts
 
 ## Compilation Instructions
 
@@ -1084,6 +1098,11 @@ High-impact journals (IEEE, Elsevier, Springer, MDPI) require vector graphics (P
 Use the files in \`charts/vector/\` for submission. The PDF files can be included directly
 in LaTeX with \\includegraphics{}.
 
+article.tex typesets the charts that have a \`charts/tikz/\` file from that code instead
+(pgfplots, in the document's own fonts), so they can be edited like any other LaTeX source.
+Regenerate only the LaTeX code, without rendering images, with:
+\`python generate_charts.py --output-dir charts/tikz --spec tikz --spec-only < data.json\`
+
 ## Article Metadata
 
 - **Title**: ${article.title}
@@ -23,10 +23,13 @@ const {
 const { authMiddleware } = require('../../infrastructure/middlewares/auth.middleware');
 
 // Configurar multer para subida de archivos bibliográficos
+// En disco (directorio temporal): el parser en streaming los lee sin cargarlos en memoria
 const upload = multer({
-  storage: multer.memoryStorage(),
+  storage: multer.diskStorage({
+    destination: require('os').tmpdir()
+  }),
   limits: {
-    fileSize: 10 * 1024 * 1024, // 10MB max
+    fileSize: Number(process.env.REFERENCES_UPLOAD_MAX_MB || 10) * 1024 * 1024, // 10MB por defecto
   },
   fileFilter: (req, file, cb) => {
     const allowedExtensions = ['.bib', '.ris', '.csv', '.txt', '.nbib', '.ciw'];
@@ -1,4 +1,5 @@
 const ReferenceRepository = require('../../infrastructure/repositories/reference.repository');
+const PythonDuplicatesService = require('../../infrastructure/services/python-duplicates.service');
 
 /**
  * Caso de uso para detectar referencias duplicadas
@@ -7,6 +8,7 @@ const ReferenceRepository = require('../../infrastructure/repositories/reference
 class DetectDuplicatesUseCase {
   constructor() {
     this.referenceRepository = new ReferenceRepository();
+    this.pythonDuplicatesService = new PythonDuplicatesService();
   }
 
   /**
@@ -30,65 +32,86 @@ class DetectDuplicatesUseCase {
         };
       }
 
-      const duplicateGroups = [];
-      const processedIds = new Set();
-
-      // Comparar cada referencia con las demás
-      for (let i = 0; i < references.length; i++) {
-        if (processedIds.has(references[i].id)) continue;
-
-        const group = [references[i]];
-        
-        for (let j = i + 1; j < references.length; j++) {
-          if (processedIds.has(references[j].id)) continue;
-
-          if (this._areDuplicates(references[i], references[j])) {
-            group.push(references[j]);
-            processedIds.add(references[j].id);
-          }
-        }
-
-        if (group.length > 1) {
-          duplicateGroups.push({
-            originalId: group[0].id,
-            originalTitle: group[0].title,
-            duplicates: group.slice(1).map(ref => ({
-              id: ref.id,
-              title: ref.title,
-              authors: ref.authors,
-              year: ref.year,
-              doi: ref.doi,
-              source: ref.source || ref.database,
-              similarity: this._calculateSimilarity(group[0].title, ref.title)
-            })),
-            count: group.length
-          });
-          processedIds.add(references[i].id);
+      let result = null;
+      if (process.env.DUPLICATES_ENGINE !== 'node') {
+        try {
+          // Motor de Python: solo compara pares candidatos (mismo DOI o título parecido según MinHash/LSH)
+          result = await this.pythonDuplicatesService.detect(references);
+        } catch (engineError) {
+          console.warn('⚠️ Motor de duplicados de Python no disponible, comparando en Node:', engineError.message);
         }
       }
+      if (!result) {
+        result = this._compareAll(references);
+      }
 
       // Marcar duplicados en la base de datos
-      const duplicateIds = duplicateGroups.flatMap(g => g.duplicates.map(d => d.id));
-      if (duplicateIds.length > 0) {
-        await this._markAsDuplicates(duplicateIds);
+      if (result.duplicates.length > 0) {
+        await this._markAsDuplicates(result.duplicates);
       }
 
-      return {
-        duplicates: duplicateIds,
-        groups: duplicateGroups,
-        stats: {
-          total: references.length,
-          unique: references.length - duplicateIds.length,
-          duplicates: duplicateIds.length,
-          duplicateGroups: duplicateGroups.length
-        }
-      };
+      return result;
     } catch (error) {
       console.error('Error detectando duplicados:', error);
       throw error;
     }
   }
 
+  /**
+   * Compara cada referencia con todas las demás (O(n²)); respaldo del motor de Python
+   */
+  _compareAll(references) {
+    const duplicateGroups = [];
+    const processedIds = new Set();
+
+    // Comparar cada referencia con las demás
+    for (let i = 0; i < references.length; i++) {
+      if (processedIds.has(references[i].id)) continue;
+
+      const group = [references[i]];
+      
+      for (let j = i + 1; j < references.length; j++) {
+        if (processedIds.has(references[j].id)) continue;
+
+        if (this._areDuplicates(references[i], references[j])) {
+          group.push(references[j]);
+          processedIds.add(references[j].id);
+        }
+      }
+
+      if (group.length > 1) {
+        duplicateGroups.push({
+          originalId: group[0].id,
+          originalTitle: group[0].title,
+          duplicates: group.slice(1).map(ref => ({
+            id: ref.id,
+            title: ref.title,
+            authors: ref.authors,
+            year: ref.year,
+            doi: ref.doi,
+            source: ref.source || ref.database,
+            similarity: this._calculateSimilarity(group[0].title, ref.title)
+          })),
+          count: group.length
+        });
+        processedIds.add(references[i].id);
+      }
+    }
+
+    const duplicateIds = duplicateGroups.flatMap(g => g.duplicates.map(d => d.id));
+
+    return {
+      duplicates: duplicateIds,
+      groups: duplicateGroups,
+      stats: {
+        total: references.length,
+        unique: references.length - duplicateIds.length,
+        duplicates: duplicateIds.length,
+        duplicateGroups: duplicateGroups.length
+      }
+    };
+  }
+
   /**
    * Determina si dos referencias son duplicadas
    */
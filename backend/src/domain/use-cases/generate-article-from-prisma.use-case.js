@@ -465,11 +465,13 @@ ${text}`;
       let chartPaths = {};
       try {
         if (this.pythonGraphService && this.screeningRecordRepository) {
+          // Con CHARTS_READ_FROM_DB=true Python lee los scores de la base y no se consultan aquí
+          const scoresFromDatabase = this.pythonGraphService.readsFromDatabase();
           // Intentar obtener scores de ambas fases (title_abstract tiene prioridad)
-          let scores = await this.screeningRecordRepository.getAllScores(projectId, 'title_abstract');
+          let scores = scoresFromDatabase ? [] : await this.screeningRecordRepository.getAllScores(projectId, 'title_abstract');
           
           // Si no hay scores en title_abstract, intentar fulltext
-          if (!scores || scores.length === 0) {
+          if (!scoresFromDatabase && (!scores || scores.length === 0)) {
             scores = await this.screeningRecordRepository.getAllScores(projectId, 'fulltext');
           }
           
@@ -499,7 +501,8 @@ ${text}`;
             screeningDataForCharts, 
             scores, 
             searchData,
-            enhancedChartData // ← Nuevos datos estadísticos
+            enhancedChartData, // ← Nuevos datos estadísticos
+            { projectId }
           );
         }
       } catch (err) {
@@ -1,3 +1,9 @@
+const fs = require('fs');
+const PythonReferencesParserService = require('../../infrastructure/services/python-references-parser.service');
+
+// Formatos que se parsean en streaming con Python (JSON se sigue leyendo en Node)
+const STREAMING_FORMATS = ['csv', 'ris', 'txt', 'bib', 'nbib', 'ciw'];
+
 /**
  * Caso de uso: Importar referencias desde archivos
  * Versión simplificada - parsea formatos básicos
@@ -5,6 +11,7 @@
 class ImportReferencesUseCase {
   constructor({ referenceRepository }) {
     this.referenceRepository = referenceRepository;
+    this.referencesParser = new PythonReferencesParserService();
   }
 
   /**
@@ -87,9 +94,14 @@ class ImportReferencesUseCase {
         const fileExtension = file.originalname.split('.').pop().toLowerCase();
         console.log(`Procesando archivo: ${file.originalname}`);
         console.log(`   Extensión: ${fileExtension}`);
-        console.log(`   Tamaño: ${file.buffer ? file.buffer.length : 0} bytes`);
-        
-        const content = file.buffer.toString('utf-8');
+        console.log(`   Tamaño: ${file.size || (file.buffer ? file.buffer.length : 0)} bytes`);
+
+        if (STREAMING_FORMATS.includes(fileExtension) && process.env.REFERENCES_PARSER !== 'node') {
+          const imported = await this.importStreaming(projectId, file, fileExtension, results);
+          if (imported) continue;
+        }
+
+        const content = file.buffer ? file.buffer.toString('utf-8') : fs.readFileSync(file.path, 'utf-8');
         console.log(`   Primeros 200 caracteres:`, content.substring(0, 200));
         
         let parsedReferences = [];
@@ -126,121 +138,18 @@ class ImportReferencesUseCase {
         console.log(`Parseadas ${parsedReferences.length} referencias del archivo`);
 
         // Detectar la fuente del archivo para estadísticas
-        const fileSource = this.detectDatabaseSource(file.originalname, parsedReferences[0] || {});
-        if (!results.bySource[fileSource]) {
-          results.bySource[fileSource] = {
-            fileName: file.originalname,
-            parsed: 0,
-            imported: 0,
-            duplicates: 0
-          };
-        }
-        results.bySource[fileSource].parsed = parsedReferences.length;
-
-        // ═══ VALIDACIÓN DE DATOS MÍNIMOS ═══
-        console.log(`Validando ${parsedReferences.length} referencias...`);
-        const validatedReferences = [];
-        
-        for (const refData of parsedReferences) {
-          const validation = this.validateMinimumFields(refData);
-          
-          if (!validation.isValid) {
-            // Referencia rechazada: le faltan campos obligatorios
-            const titlePreview = refData.title ? refData.title.substring(0, 60) : 'SIN TÍTULO';
-            console.log(`   ✗ Rechazada: ${titlePreview} - Faltan: ${validation.missingRequired.join(', ')}`);
-            results.skippedValidation++;
-            
-            // Registrar en detalle qué campo falta para cada referencia rechazada
-            results.validationDetails.rejected.push({
-              title: refData.title || 'Sin título',
-              missingFields: validation.missingRequired
-            });
-            
-            // También registrar cada campo faltante individualmente para el reporte
-            for (const field of validation.missingRequired) {
-              if (field === 'autores') {
-                results.validationDetails.missingAuthors.push(refData.title || 'Sin título');
-              } else if (field === 'año') {
-                results.validationDetails.missingYear.push(refData.title || 'Sin título');
-              } else if (field === 'DOI') {
-                results.validationDetails.missingDoi.push(refData.title || 'Sin título');
-              } else if (field === 'revista/conferencia') {
-                results.validationDetails.missingJournal.push(refData.title || 'Sin título');
-              }
-            }
-            continue;
-          }
-          
-          // Registrar warnings por campos no bloqueantes (abstract)
-          if (validation.warnings.length > 0) {
-            for (const warn of validation.warnings) {
-              if (warn.field === 'abstract') {
-                results.validationDetails.missingAbstract.push(refData.title || 'Sin título');
-              }
-            }
-          }
-          
-          validatedReferences.push(refData);
-        }
-        
-        console.log(`Validación: ${validatedReferences.length} válidas, ${results.skippedValidation} rechazadas`);
-
-        // Guardar referencias VALIDADAS en la base de datos
-        console.log(`Guardando ${validatedReferences.length} referencias en BD...`);
-        
-        for (const refData of validatedReferences) {
-          try {
-            console.log(`   Procesando: ${refData.title || 'Sin título'}`);
-            
-            // Verificar si ya existe (por DOI o título)
-            const existing = refData.doi || refData.title ? 
-              await this.referenceRepository.findByDoiOrTitle(
-                projectId,
-                refData.doi,
-                refData.title
-              ) : null;
-
-            if (existing) {
-              console.log(`   Duplicado: ${refData.title}`);
-              results.duplicates++;
-              results.bySource[fileSource].duplicates++;
-              continue;
-            }
-
-            // Crear la referencia
-            console.log(`   Insertando en BD...`);
-            
-            // Detectar database source
-            const detectedSource = this.detectDatabaseSource(file.originalname, refData);
-            console.log(`   Detected source: ${detectedSource || 'Unknown'}`);
-            
-            const reference = await this.referenceRepository.create({
-              ...refData,
-              projectId: projectId,
-              source: detectedSource || refData.database || refData.source || null,  // Map database → source
-              screeningStatus: refData.screeningStatus || 'pending',
-              importedFrom: file.originalname,
-              importedAt: new Date()
-            });
-
-            console.log(`   Insertado ID: ${reference.id}`);
-            results.references.push(reference);
-            results.success++;
-            results.bySource[fileSource].imported++;
-          } catch (error) {
-            console.log(`   Error insertando: ${error.message}`);
-            results.failed++;
-            results.errors.push({
-              title: refData.title || 'Unknown',
-              error: error.message
-            });
-          }
-        }
+        const fileSource = this.registerFileSource(file, parsedReferences[0], results);
+        await this.importBatch(projectId, file, fileSource, parsedReferences, results);
       } catch (error) {
         results.errors.push({
           file: file.originalname,
           error: error.message
         });
+      } finally {
+        // Archivo temporal de la subida (multer en disco)
+        if (file.path) {
+          fs.promises.unlink(file.path).catch(() => {});
+        }
       }
     }
 
@@ -317,6 +226,186 @@ class ImportReferencesUseCase {
     return results;
   }
 
+  /**
+   * Importa un archivo con el parser en streaming de Python: las referencias llegan por
+   * lotes y cada lote se valida y se guarda antes de leer el siguiente.
+   * @returns {Promise<boolean>} false si Python no pudo leer el archivo antes de entregar
+   *   ningún lote (se parsea entonces en Node)
+   */
+  async importStreaming(projectId, file, fileExtension, results) {
+    let fileSource;
+    let batches = 0;
+    let stats;
+    try {
+      stats = await this.referencesParser.parse(
+        file,
+        fileExtension,
+        async (records) => {
+          if (fileSource === undefined) {
+            fileSource = this.registerFileSource(file, records[0], results);
+          }
+          batches++;
+          await this.importBatch(projectId, file, fileSource, records, results);
+        },
+        (parseError) => {
+          results.errors.push({
+            file: file.originalname,
+            line: parseError.line,
+            error: `Registro ${parseError.record} (línea ${parseError.line}): ${parseError.error}`
+          });
+        }
+      );
+    } catch (error) {
+      if (batches > 0) throw error;
+      console.warn('⚠️ Parser de Python no disponible, parseando en Node:', error.message);
+      return false;
+    }
+
+    if (fileSource === undefined) {
+      this.registerFileSource(file, {}, results);
+    }
+    console.log(`Parseadas ${stats.records} referencias en ${stats.seconds}s (${stats.recordsPerSecond} refs/s, ${stats.mbPerSecond} MB/s), ${stats.errors} registros con errores`);
+    results.parseStats = results.parseStats || [];
+    const { type, ...parseStats } = stats;
+    results.parseStats.push({ file: file.originalname, ...parseStats });
+    return true;
+  }
+
+  /**
+   * Registra la base de datos de origen de un archivo en las estadísticas por fuente
+   * @returns {string} - Fuente detectada
+   */
+  registerFileSource(file, firstReference, results) {
+    const fileSource = this.detectDatabaseSource(file.originalname, firstReference || {});
+    if (!results.bySource[fileSource]) {
+      results.bySource[fileSource] = {
+        fileName: file.originalname,
+        parsed: 0,
+        imported: 0,
+        duplicates: 0
+      };
+    }
+    return fileSource;
+  }
+
+  /**
+   * Valida un lote de referencias parseadas y guarda las válidas que no estén duplicadas
+   */
+  async importBatch(projectId, file, fileSource, parsedReferences, results) {
+    results.bySource[fileSource].parsed += parsedReferences.length;
+
+    // ═══ VALIDACIÓN DE DATOS MÍNIMOS ═══
+    console.log(`Validando ${parsedReferences.length} referencias...`);
+    const validatedReferences = [];
+    
+    for (const refData of parsedReferences) {
+      const validation = this.validateMinimumFields(refData);
+      
+      if (!validation.isValid) {
+        // Referencia rechazada: le faltan campos obligatorios
+        const titlePreview = refData.title ? refData.title.substring(0, 60) : 'SIN TÍTULO';
+        console.log(`   ✗ Rechazada: ${titlePreview} - Faltan: ${validation.missingRequired.join(', ')}`);
+        results.skippedValidation++;
+        
+        // Registrar en detalle qué campo falta para cada referencia rechazada
+        results.validationDetails.rejected.push({
+          title: refData.title || 'Sin título',
+          missingFields: validation.missingRequired
+        });
+        
+        // También registrar cada campo faltante individualmente para el reporte
+        for (const field of validation.missingRequired) {
+          if (field === 'autores') {
+            results.validationDetails.missingAuthors.push(refData.title || 'Sin título');
+          } else if (field === 'año') {
+            results.validationDetails.missingYear.push(refData.title || 'Sin título');
+          } else if (field === 'DOI') {
+            results.validationDetails.missingDoi.push(refData.title || 'Sin título');
+          } else if (field === 'revista/conferencia') {
+            results.validationDetails.missingJournal.push(refData.title || 'Sin título');
+          }
+        }
+        continue;
+      }
+      
+      // Registrar warnings por campos no bloqueantes (abstract)
+      if (validation.warnings.length > 0) {
+        for (const warn of validation.warnings) {
+          if (warn.field === 'abstract') {
+            results.validationDetails.missingAbstract.push(refData.title || 'Sin título');
+          }
+        }
+      }
+      
+      validatedReferences.push(refData);
+    }
+    
+    console.log(`Validación: ${validatedReferences.length} válidas, ${results.skippedValidation} rechazadas`);
+
+    // Guardar referencias VALIDADAS en la base de datos
+    console.log(`Guardando ${validatedReferences.length} referencias en BD...`);
+    if (validatedReferences.length === 0) return;
+
+    // Verificar cuáles ya existen (por DOI o título) con una sola consulta por lote
+    const existing = await this.referenceRepository.findExistingKeys(
+      projectId,
+      validatedReferences.map(refData => refData.doi),
+      validatedReferences.map(refData => refData.title)
+    );
+
+    const toCreate = [];
+    for (const refData of validatedReferences) {
+      const titleKey = refData.title ? refData.title.toLowerCase() : null;
+      if ((refData.doi && existing.dois.has(refData.doi)) || (titleKey && existing.titles.has(titleKey))) {
+        console.log(`   Duplicado: ${refData.title}`);
+        results.duplicates++;
+        results.bySource[fileSource].duplicates++;
+        continue;
+      }
+      // Duplicados dentro del mismo archivo
+      if (refData.doi) existing.dois.add(refData.doi);
+      if (titleKey) existing.titles.add(titleKey);
+
+      // Detectar database source
+      const detectedSource = this.detectDatabaseSource(file.originalname, refData);
+      toCreate.push({
+        ...refData,
+        projectId: projectId,
+        source: detectedSource || refData.database || refData.source || null,  // Map database → source
+        screeningStatus: refData.screeningStatus || 'pending',
+        importedFrom: file.originalname,
+        importedAt: new Date()
+      });
+    }
+
+    try {
+      // Inserción del lote completo en una transacción
+      const created = await this.referenceRepository.bulkCreate(toCreate);
+      results.references.push(...created);
+      results.success += created.length;
+      results.bySource[fileSource].imported += created.length;
+      console.log(`   Insertadas ${created.length} referencias`);
+    } catch (bulkError) {
+      // Si el lote falla, insertar una a una para saber cuáles fallan
+      console.log(`   Error insertando el lote (${bulkError.message}), insertando una a una...`);
+      for (const referenceData of toCreate) {
+        try {
+          const reference = await this.referenceRepository.create(referenceData);
+          results.references.push(reference);
+          results.success++;
+          results.bySource[fileSource].imported++;
+        } catch (error) {
+          console.log(`   Error insertando: ${error.message}`);
+          results.failed++;
+          results.errors.push({
+            title: referenceData.title || 'Unknown',
+            error: error.message
+          });
+        }
+      }
+    }
+  }
+
   /**
    * Valida que una referencia tenga los datos mínimos obligatorios
    * Para que una referencia sea válida en el Diagrama PRISMA necesita:
@@ -1,4 +1,5 @@
 const { pipeline } = require('@xenova/transformers');
+const PythonEmbeddingsService = require('../../infrastructure/services/python-embeddings.service');
 
 /**
  * Use Case: Cribado de Referencias con Embeddings Semánticos
@@ -10,6 +11,7 @@ class ScreenReferencesWithEmbeddingsUseCase {
   constructor() {
     this.model = null;
     this.modelName = 'Xenova/all-MiniLM-L6-v2';
+    this.pythonEmbeddingsService = new PythonEmbeddingsService();
   }
 
   /**
@@ -69,6 +71,105 @@ class ScreenReferencesWithEmbeddingsUseCase {
     return similarity;
   }
 
+  /**
+   * Prepara los embeddings de las referencias. Con almacén (EMBEDDING_STORE_DIR) solo se generan
+   * los de referencias nuevas o cuyo texto cambió; el resto se lee del almacén al puntuar.
+   * @returns {Promise<Object>} { items: [{ id, text, embedding? }], failed: Map(id → error), storeDir }
+   */
+  async prepareEmbeddings(references) {
+    const items = references.map(reference => ({ id: reference.id, text: this.buildReferenceText(reference) }));
+    const failed = new Map();
+
+    const projectId = references[0]?.projectId || references[0]?.project_id;
+    let storeDir = process.env.EMBEDDINGS_SCORING_ENGINE !== 'node'
+      ? this.pythonEmbeddingsService.storeDir(projectId, this.modelName)
+      : null;
+    let toEmbed = items;
+    if (storeDir) {
+      try {
+        const { missing } = await this.pythonEmbeddingsService.missing(storeDir, this.modelName, items);
+        const missingIds = new Set(missing);
+        toEmbed = items.filter(item => missingIds.has(item.id));
+        console.log(`💾 ${items.length - toEmbed.length} embeddings reutilizados del almacén, ${toEmbed.length} por generar`);
+      } catch (storeError) {
+        console.warn('⚠️ Almacén de embeddings no disponible:', storeError.message);
+        storeDir = null;
+      }
+    }
+
+    console.log(`🔄 Procesando ${toEmbed.length} referencias...`);
+    for (let i = 0; i < toEmbed.length; i++) {
+      const item = toEmbed[i];
+      try {
+        // Log cada 10 referencias para no saturar
+        if (i % 10 === 0 || i === toEmbed.length - 1) {
+          console.log(`   [${i + 1}/${toEmbed.length}] Procesando embeddings...`);
+        }
+        item.embedding = await this.generateEmbedding(item.text);
+      } catch (error) {
+        console.error(`❌ Error procesando referencia ${item.id}:`, error);
+        failed.set(item.id, error.message);
+      }
+    }
+
+    if (storeDir) {
+      try {
+        await this.pythonEmbeddingsService.put(storeDir, this.modelName, toEmbed.filter(item => item.embedding));
+      } catch (storeError) {
+        console.warn('⚠️ No se pudieron guardar los embeddings:', storeError.message);
+        storeDir = null;
+      }
+    }
+
+    return { items: items.filter(item => !failed.has(item.id)), failed, storeDir };
+  }
+
+  /**
+   * Genera los embeddings que falten (los que se iban a leer de un almacén que no se pudo usar)
+   */
+  async ensureEmbeddings(items) {
+    for (const item of items) {
+      if (!item.embedding) {
+        item.embedding = await this.generateEmbedding(item.text);
+      }
+    }
+  }
+
+  /**
+   * Puntúa un conjunto de embeddings contra el del protocolo.
+   * Usa el motor de NumPy (una multiplicación de matrices por bloques, leyendo del almacén
+   * si se indica storeDir) salvo que EMBEDDINGS_SCORING_ENGINE=node o que Python falle;
+   * en ese caso compara vector a vector.
+   * @returns {Promise<Array<Object>>} { referenceId, similarity, recommendation, confidence } en el orden de items
+   */
+  async scoreEmbeddings(categoryEmbedding, items, threshold = 0.7, storeDir = null) {
+    if (items.length === 0) return [];
+
+    if (process.env.EMBEDDINGS_SCORING_ENGINE !== 'node') {
+      try {
+        if (!storeDir) await this.ensureEmbeddings(items);
+        const { results } = await this.pythonEmbeddingsService.score([categoryEmbedding], items, threshold, storeDir);
+        return results;
+      } catch (engineError) {
+        console.warn('⚠️ Motor de similitud de Python no disponible, calculando en Node:', engineError.message);
+      }
+    }
+
+    await this.ensureEmbeddings(items);
+    return items.map(({ id, embedding }) => {
+      const similarity = this.cosineSimilarity(categoryEmbedding, embedding);
+      const confidence = similarity >= threshold
+        ? (similarity - threshold) / (1 - threshold)
+        : (threshold - similarity) / threshold;
+      return {
+        referenceId: id,
+        similarity: parseFloat(similarity.toFixed(4)),
+        recommendation: similarity >= threshold ? 'include' : 'exclude',
+        confidence: parseFloat(confidence.toFixed(3))
+      };
+    });
+  }
+
   /**
    * Construye el texto del protocolo para generar embedding
    */
@@ -181,56 +282,48 @@ Palabras clave: ${keywordsArray.join(', ')}
       const categoryEmbedding = await this.generateEmbedding(categoryText);
       console.log(`✅ Embedding del protocolo generado (dimensión: ${categoryEmbedding.length})`);
 
+      const { items, failed, storeDir } = await this.prepareEmbeddings(references);
+
+      // Calcular todas las similitudes de una vez
+      const scores = new Map(
+        (await this.scoreEmbeddings(categoryEmbedding, items, threshold, storeDir)).map(score => [score.referenceId, score])
+      );
+
       const results = [];
       let toInclude = 0;
       let toExclude = 0;
       let totalSimilarity = 0;
 
-      // Procesar cada referencia
-      console.log(`🔄 Procesando ${references.length} referencias...`);
-      for (let i = 0; i < references.length; i++) {
-        const reference = references[i];
-        try {
-          // Log cada 10 referencias para no saturar
-          if (i % 10 === 0 || i === references.length - 1) {
-            console.log(`   [${i + 1}/${references.length}] Procesando embeddings...`);
-          }
-          
-          const referenceText = this.buildReferenceText(reference);
-          const referenceEmbedding = await this.generateEmbedding(referenceText);
-          const similarity = this.cosineSimilarity(categoryEmbedding, referenceEmbedding);
-          const recommendation = similarity >= threshold ? 'include' : 'exclude';
-          const confidence = similarity >= threshold 
-            ? (similarity - threshold) / (1 - threshold)
-            : (threshold - similarity) / threshold;
-
-          const reasoning = `Similitud: ${(similarity * 100).toFixed(2)}%. ${
-            similarity >= threshold ? 'INCLUIR' : 'EXCLUIR'
-          } (umbral: ${(threshold * 100).toFixed(0)}%)`;
-
-          results.push({
-            success: true,
-            referenceId: reference.id,
-            similarity: parseFloat(similarity.toFixed(4)),
-            threshold,
-            recommendation,
-            confidence: parseFloat(confidence.toFixed(3)),
-            reasoning,
-            model: this.modelName
-          });
-
-          totalSimilarity += similarity;
-          if (recommendation === 'include') toInclude++;
-          else toExclude++;
-
-        } catch (error) {
-          console.error(`❌ Error procesando referencia ${reference.id}:`, error);
+      for (const reference of references) {
+        const score = scores.get(reference.id);
+        if (!score) {
           results.push({
             success: false,
             referenceId: reference.id,
-            error: error.message
+            error: failed.get(reference.id)
           });
+          continue;
         }
+
+        const { similarity, recommendation } = score;
+        const reasoning = `Similitud: ${(similarity * 100).toFixed(2)}%. ${
+          recommendation === 'include' ? 'INCLUIR' : 'EXCLUIR'
+        } (umbral: ${(threshold * 100).toFixed(0)}%)`;
+
+        results.push({
+          success: true,
+          referenceId: reference.id,
+          similarity,
+          threshold,
+          recommendation,
+          confidence: score.confidence,
+          reasoning,
+          model: this.modelName
+        });
+
+        totalSimilarity += similarity;
+        if (recommendation === 'include') toInclude++;
+        else toExclude++;
       }
 
       const duration = Date.now() - startTime;
@@ -270,23 +363,21 @@ Palabras clave: ${keywordsArray.join(', ')}
       const categoryText = this.buildCategoryText(protocol);
       const categoryEmbedding = await this.generateEmbedding(categoryText);
 
-      const rankings = [];
-
-      for (const reference of references) {
-        const referenceText = this.buildReferenceText(reference);
-        const referenceEmbedding = await this.generateEmbedding(referenceText);
-        const similarity = this.cosineSimilarity(categoryEmbedding, referenceEmbedding);
-
-        rankings.push({
-          referenceId: reference.id,
-          referenceTitle: reference.title,
-          avgSimilarity: parseFloat(similarity.toFixed(4)),
-          rankings: [{
-            model: this.modelName,
-            similarity: parseFloat(similarity.toFixed(4))
-          }]
-        });
+      const { items, failed, storeDir } = await this.prepareEmbeddings(references);
+      if (failed.size > 0) {
+        throw new Error(failed.values().next().value);
       }
+      const scored = await this.scoreEmbeddings(categoryEmbedding, items, undefined, storeDir);
+
+      const rankings = references.map((reference, i) => ({
+        referenceId: reference.id,
+        referenceTitle: reference.title,
+        avgSimilarity: scored[i].similarity,
+        rankings: [{
+          model: this.modelName,
+          similarity: scored[i].similarity
+        }]
+      }));
 
       // Ordenar por similitud descendente
       rankings.sort((a, b) => b.avgSimilarity - a.avgSimilarity);
@@ -315,19 +406,17 @@ Palabras clave: ${keywordsArray.join(', ')}
       const categoryText = this.buildCategoryText(protocol);
       const categoryEmbedding = await this.generateEmbedding(categoryText);
 
-      const similarities = [];
-
-      for (const reference of references) {
-        const referenceText = this.buildReferenceText(reference);
-        const referenceEmbedding = await this.generateEmbedding(referenceText);
-        const similarity = this.cosineSimilarity(categoryEmbedding, referenceEmbedding);
-        
-        similarities.push({
-          referenceId: reference.id,
-          title: reference.title,
-          similarity: parseFloat(similarity.toFixed(4))
-        });
+      const { items, failed, storeDir } = await this.prepareEmbeddings(references);
+      if (failed.size > 0) {
+        throw new Error(failed.values().next().value);
       }
+      const scored = await this.scoreEmbeddings(categoryEmbedding, items, undefined, storeDir);
+
+      const similarities = references.map((reference, i) => ({
+        referenceId: reference.id,
+        title: reference.title,
+        similarity: scored[i].similarity
+      }));
 
       // Ordenar por similitud descendente
       similarities.sort((a, b) => b.similarity - a.similarity);
@@ -213,36 +213,49 @@ class ReferenceRepository {
     return Number.parseInt(result.rows[0].total);
   }
 
+  /**
+   * Inserta varias referencias en una sola transacción, con un INSERT de varias filas
+   * por bloque de BULK_INSERT_ROWS (en vez de un INSERT por referencia)
+   */
   async bulkCreate(references) {
+    const BULK_INSERT_ROWS = 1000;
     const client = await database.getPool().connect();
     try {
       await client.query('BEGIN');
       const created = [];
 
-      for (const refData of references) {
-        const reference = new Reference(refData);
+      for (let start = 0; start < references.length; start += BULK_INSERT_ROWS) {
+        const rows = [];
+        const values = [];
+
+        for (const refData of references.slice(start, start + BULK_INSERT_ROWS)) {
+          const reference = new Reference(refData);
+          reference.validate();
+
+          // Convertir array de autores a string separado por comas
+          const authorsStr = Array.isArray(reference.authors) 
+            ? reference.authors.join(', ') 
+            : reference.authors;
+
+          const offset = values.length;
+          rows.push(`(${Array.from({ length: 11 }, (_, i) => `$${offset + i + 1}`).join(', ')})`);
+          values.push(
+            reference.projectId, reference.title, authorsStr,
+            reference.year, reference.journal, reference.doi, reference.abstract,
+            reference.keywords, reference.url, reference.screeningStatus, reference.source
+          );
+        }
+
         const query = `
           INSERT INTO "references" (
             project_id, title, authors, year, journal, doi, abstract,
             keywords, url, screening_status, source
           )
-          VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+          VALUES ${rows.join(', ')}
           RETURNING *
         `;
-
-        // Convertir array de autores a string separado por comas
-        const authorsStr = Array.isArray(reference.authors) 
-          ? reference.authors.join(', ') 
-          : reference.authors;
-
-        const values = [
-          reference.projectId, reference.title, authorsStr,
-          reference.year, reference.journal, reference.doi, reference.abstract,
-          reference.keywords, reference.url, reference.screeningStatus, reference.source
-        ];
-
         const result = await client.query(query, values);
-        created.push(new Reference(result.rows[0]));
+        created.push(...result.rows.map(row => new Reference(row)));
       }
 
       await client.query('COMMIT');
@@ -302,6 +315,27 @@ class ReferenceRepository {
     return result.rows[0] ? new Reference(result.rows[0]) : null;
   }
 
+  /**
+   * DOIs y títulos (en minúsculas) que ya existen en el proyecto, entre los indicados.
+   * Detecta duplicados de un lote de importación con una sola consulta.
+   * @returns {Promise<Object>} { dois: Set, titles: Set }
+   */
+  async findExistingKeys(projectId, dois, titles) {
+    const query = `
+      SELECT doi, LOWER(title) AS title FROM "references"
+      WHERE project_id = $1 AND (doi = ANY($2::text[]) OR LOWER(title) = ANY($3::text[]))
+    `;
+    const result = await database.query(query, [
+      projectId,
+      dois.filter(Boolean),
+      titles.filter(Boolean).map(title => title.toLowerCase())
+    ]);
+    return {
+      dois: new Set(result.rows.map(row => row.doi).filter(Boolean)),
+      titles: new Set(result.rows.map(row => row.title).filter(Boolean))
+    };
+  }
+
   /**
    * Obtener referencias pendientes de un proyecto
    */
@@ -0,0 +1,65 @@
+const { spawn } = require('child_process');
+const path = require('path');
+
+class PythonDuplicatesService {
+    constructor() {
+        this.scriptPath = path.join(__dirname, '../../../scripts/detect_duplicates.py');
+    }
+
+    /**
+     * Detecta duplicados con el motor de Python (bloqueo por DOI + MinHash/LSH sobre los títulos),
+     * casi lineal en vez de comparar cada par de referencias
+     * @param {Array<Object>} references - Referencias del proyecto (id, title, authors, year, doi, source)
+     * @returns {Promise<Object>} { duplicates, groups, stats } con la misma forma que DetectDuplicatesUseCase
+     */
+    async detect(references) {
+        return new Promise((resolve, reject) => {
+            const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
+            const pythonProcess = spawn(pythonCommand, [this.scriptPath], {
+                timeout: Number(process.env.DUPLICATES_PROCESS_TIMEOUT_MS || 120000)
+            });
+
+            let stdout = '';
+            let stderr = '';
+
+            pythonProcess.stdout.on('data', (data) => {
+                stdout += data.toString();
+            });
+
+            pythonProcess.stderr.on('data', (data) => {
+                stderr += data.toString();
+            });
+
+            pythonProcess.on('error', reject);
+
+            pythonProcess.on('close', (code) => {
+                if (stderr.trim()) {
+                    console.log('🐍 Python stderr output:', stderr);
+                }
+                if (code !== 0) {
+                    reject(new Error(`detect_duplicates.py terminó con código ${code}: ${stderr}`));
+                    return;
+                }
+                try {
+                    resolve(JSON.parse(stdout));
+                } catch (e) {
+                    reject(new Error(`Salida de detect_duplicates.py no válida: ${e.message}`));
+                }
+            });
+
+            // Solo los campos que usa la comparación y el resultado
+            const payload = references.map((ref) => ({
+                id: ref.id,
+                title: ref.title,
+                authors: ref.authors,
+                year: ref.year,
+                doi: ref.doi,
+                source: ref.source || ref.database
+            }));
+            pythonProcess.stdin.write(JSON.stringify({ references: payload }));
+            pythonProcess.stdin.end();
+        });
+    }
+}
+
+module.exports = PythonDuplicatesService;
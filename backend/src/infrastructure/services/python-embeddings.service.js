@@ -0,0 +1,97 @@
+const { spawn } = require('child_process');
+const path = require('path');
+
+class PythonEmbeddingsService {
+    constructor() {
+        this.scriptPath = path.join(__dirname, '../../../scripts/screen_embeddings.py');
+        this.storeScriptPath = path.join(__dirname, '../../../scripts/embedding_store.py');
+        // Directorio raíz de los almacenes de embeddings (uno por proyecto y modelo); sin él no se guardan
+        this.storeRoot = process.env.EMBEDDING_STORE_DIR || null;
+        // float32 (por defecto) o float16, que ocupa la mitad con ~1e-4 de precisión
+        this.storeDtype = process.env.EMBEDDING_STORE_DTYPE || null;
+    }
+
+    /**
+     * Directorio del almacén de embeddings de un proyecto para un modelo, o null si no hay almacén
+     */
+    storeDir(projectId, modelName) {
+        if (!this.storeRoot || !projectId) return null;
+        return path.join(this.storeRoot, String(projectId), modelName.replace(/[^\w.-]+/g, '_'));
+    }
+
+    /**
+     * Puntúa todas las referencias de una vez con NumPy: normaliza cada vector una sola vez
+     * y calcula las similitudes de coseno con un producto de matrices float32 por bloques
+     * @param {Array<Array<number>>} categoryEmbeddings - Embeddings del protocolo/categorías
+     * @param {Array<Object>} items - { id, embedding } por referencia; solo { id } si se lee del almacén
+     * @param {number} threshold - Umbral de inclusión
+     * @param {string|null} storeDir - Almacén del que leer los embeddings de las referencias
+     * @returns {Promise<Object>} { results: [{ referenceId, similarity, recommendation, confidence }], summary }
+     */
+    async score(categoryEmbeddings, items, threshold, storeDir = null) {
+        return this._run(this.scriptPath, storeDir ? ['--store', storeDir] : [], {
+            categories: categoryEmbeddings,
+            references: items.map(({ id, embedding }) => (storeDir ? { id } : { id, embedding })),
+            threshold
+        });
+    }
+
+    /**
+     * Ids de las referencias sin embedding guardado para su texto actual (nuevas o modificadas)
+     * @param {Array<Object>} items - { id, text } por referencia
+     * @returns {Promise<Object>} { missing: [id], stored }
+     */
+    async missing(storeDir, model, items) {
+        return this._run(this.storeScriptPath, ['missing', '--store', storeDir], { model, references: items });
+    }
+
+    /**
+     * Guarda los embeddings nuevos en el almacén
+     * @param {Array<Object>} items - { id, text, embedding } por referencia
+     * @returns {Promise<Object>} { appended, rows, live }
+     */
+    async put(storeDir, model, items) {
+        const args = ['put', '--store', storeDir, ...(this.storeDtype ? ['--dtype', this.storeDtype] : [])];
+        return this._run(this.storeScriptPath, args, { model, references: items });
+    }
+
+    _run(scriptPath, args, payload) {
+        const scriptName = path.basename(scriptPath);
+        return new Promise((resolve, reject) => {
+            const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
+            const pythonProcess = spawn(pythonCommand, [scriptPath, ...args], {
+                timeout: Number(process.env.EMBEDDINGS_PROCESS_TIMEOUT_MS || 60000)
+            });
+
+            let stdout = '';
+            let stderr = '';
+
+            pythonProcess.stdout.on('data', (data) => {
+                stdout += data.toString();
+            });
+
+            pythonProcess.stderr.on('data', (data) => {
+                stderr += data.toString();
+            });
+
+            pythonProcess.on('error', reject);
+
+            pythonProcess.on('close', (code) => {
+                if (code !== 0) {
+                    reject(new Error(`${scriptName} terminó con código ${code}: ${stderr}`));
+                    return;
+                }
+                try {
+                    resolve(JSON.parse(stdout));
+                } catch (e) {
+                    reject(new Error(`Salida de ${scriptName} no válida: ${e.message}`));
+                }
+            });
+
+            pythonProcess.stdin.write(JSON.stringify(payload));
+            pythonProcess.stdin.end();
+        });
+    }
+}
+
+module.exports = PythonEmbeddingsService;
@@ -13,15 +13,48 @@ class PythonGraphService {
         }
     }
 
+    /**
+     * URL absoluta de un gráfico, versionada por el hash SHA-256 de su contenido: solo cambia
+     * si cambia el gráfico, así el navegador/CDN pueden cachearla (timestamp solo como respaldo)
+     * @param {string} filename - Archivo generado por Python
+     * @param {Object} fileHashes - Hashes por archivo devueltos por Python ({ 'prisma_flow.png': '...' })
+     * @param {Object} fileKeys - Claves de objeto por archivo cuando Python publica en S3 (CHART_SINK=s3://bucket/prefijo)
+     * @returns {string}
+     */
+    buildChartUrl(filename, fileHashes = {}, fileKeys = {}) {
+        const hash = fileHashes[filename];
+        const version = hash ? hash.substring(0, 16) : Date.now();
+        // Con almacenamiento S3/MinIO los gráficos se sirven desde el bucket y sobreviven a redeploys
+        const publicBaseUrl = process.env.CHARTS_PUBLIC_BASE_URL;
+        if (publicBaseUrl && fileKeys[filename]) {
+            return `${publicBaseUrl.replace(/\/$/, '')}/${fileKeys[filename]}?v=${version}`;
+        }
+        const backendUrl = process.env.BACKEND_URL || 'https://tesis-rsl-backend.onrender.com';
+        return `${backendUrl}/uploads/charts/${filename}?v=${version}`;
+    }
+
+    /**
+     * Con CHARTS_READ_FROM_DB=true, Python lee los puntajes del scree directamente de la base
+     * (DATABASE_URL) en lotes, y Node no carga ni serializa ese arreglo. Años y keywords siguen
+     * llegando en el payload: Node aplica el filtro de incluidos y el tope PRISMA includedFinal
+     * @returns {boolean}
+     */
+    readsFromDatabase() {
+        return process.env.CHARTS_READ_FROM_DB === 'true' && Boolean(process.env.DATABASE_URL);
+    }
+
     /**
      * Genera gráficos PRISMA y Scree Plot usando Python
      * @param {Object} prismaData - Datos de cribado PRISMA
      * @param {Array<number>} screeScores - Lista de puntajes de cribado
      * @param {Array<Object>} searchStrategy - Datos de estrategia de búsqueda (Source, Hits, Query)
      * @param {Object} enhancedChartData - Datos para 4 nuevos gráficos académicos (distribución temporal, calidad, bubble, síntesis)
+     * @param {Object} options
+     * @param {Function} options.onChart - (name, url) => void, llamado apenas cada gráfico está guardado
+     * @param {string} options.projectId - Proyecto cuyos datos lee Python de la base (ver readsFromDatabase)
      * @returns {Promise<Object>} Rutas de las imágenes generadas
      */
-    async generateCharts(prismaData, screeScores, searchStrategy, enhancedChartData = null) {
+    async generateCharts(prismaData, screeScores, searchStrategy, enhancedChartData = null, options = {}) {
         return new Promise((resolve, reject) => {
             // Build databases list: prioritize referencesBySource (real imported refs), fallback to searchStrategy
             let databases = [];
@@ -104,13 +137,69 @@ class PythonGraphService {
 
             // Usar python3 para compatibilidad con entornos Linux/Render
             const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
-            const pythonProcess = spawn(pythonCommand, [this.scriptPath, '--output-dir', this.outputDir]);
+            // --layout fixed: márgenes precalculados, sin pasadas extra de tight_layout/bbox_inches
+            // Cada gráfico tiene su propio límite de tiempo en Python (--chart-timeout); el timeout del
+            // proceso es solo una red de seguridad para no esperar indefinidamente
+            const chartTimeoutSec = Number(process.env.CHART_TIMEOUT || 60);
+            // --spec tikz: junto a cada imagen se escribe su código TikZ/pgfplots (.tex) para el paquete LaTeX;
+            // CHART_SPEC agrega otros formatos (vega-lite, json)
+            const specFormats = [...new Set(['tikz', ...(process.env.CHART_SPEC || '').split(',').filter(Boolean)])];
+            const args = [this.scriptPath, '--output-dir', this.outputDir, '--layout', 'fixed', '--chart-timeout', String(chartTimeoutSec), '--stream', '--input-format', 'framed', '--spec', specFormats.join(',')];
+            // Límites por gráfico (rlimits en su proceso hijo): un payload desmedido falla solo en ese gráfico,
+            // con status 'limit', sin quitarle memoria ni CPU al servidor. 0 desactiva cada límite
+            args.push(
+                '--chart-memory-mb', String(process.env.CHART_MEMORY_MB || 1536),
+                '--chart-cpu-seconds', String(process.env.CHART_CPU_SECONDS || chartTimeoutSec),
+                '--chart-output-mb', String(process.env.CHART_OUTPUT_MB || 100)
+            );
+            // Los puntajes leídos de la base reemplazan a los del payload. La URL (con credenciales) va
+            // por el entorno (CHART_DB_URL) y no en argv, donde la verían ps y /proc/<pid>/cmdline
+            const env = { ...process.env };
+            if (this.readsFromDatabase() && options.projectId) {
+                env.CHART_DB_URL = process.env.DATABASE_URL;
+                args.push('--project-id', String(options.projectId));
+            }
+            const pythonProcess = spawn(
+                pythonCommand,
+                args,
+                { env, timeout: Number(process.env.CHARTS_PROCESS_TIMEOUT_MS || chartTimeoutSec * 1000 * 4) }
+            );
 
             let stdout = '';
             let stderr = '';
+            // --stream: Python emite un registro NDJSON por gráfico apenas se guarda y un resumen final
+            let pendingLine = '';
+            let summary = null;
+            // Con un sink remoto (CHART_SINK=s3://...) el gráfico está disponible cuando termina su subida
+            const remoteSink = (process.env.CHART_SINK || 'local') !== 'local';
+            const chartHashes = {};
+
+            const handleRecord = (line) => {
+                if (!line.trim()) return;
+                try {
+                    const record = JSON.parse(line);
+                    if (record.type === 'summary') {
+                        summary = record;
+                    } else if (record.type === 'chart' && record.status === 'ok') {
+                        chartHashes[record.name] = record.hashes;
+                        if (!remoteSink && options.onChart) {
+                            options.onChart(record.name, this.buildChartUrl(record.file, record.hashes));
+                        }
+                    } else if (record.type === 'upload' && !record.error && remoteSink && options.onChart) {
+                        const filename = Object.keys(record.keys).find((file) => file.endsWith('.png'));
+                        options.onChart(record.name, this.buildChartUrl(filename, chartHashes[record.name], record.keys));
+                    }
+                } catch (e) {
+                    console.error('⚠️ Línea de salida de Python no válida:', line);
+                }
+            };
 
             pythonProcess.stdout.on('data', (data) => {
-                stdout += data.toString();
+                const chunk = data.toString();
+                stdout += chunk;
+                const lines = (pendingLine + chunk).split('\n');
+                pendingLine = lines.pop();
+                lines.forEach(handleRecord);
             });
 
             pythonProcess.stderr.on('data', (data) => {
@@ -135,36 +224,33 @@ class PythonGraphService {
                 console.log('🐍 Python output (raw):', stdout);
                 
                 try {
-                    const results = JSON.parse(stdout);
+                    handleRecord(pendingLine);
+                    const results = summary || JSON.parse(stdout);
                     console.log('📊 Resultados parseados:', results);
                     
-                    // Convertir a URLs absolutas apuntando al backend
-                    const backendUrl = process.env.BACKEND_URL || 'https://tesis-rsl-backend.onrender.com';
+                    // Gráficos fallidos o con timeout: el resto del artículo sigue con los que sí se generaron
+                    Object.entries(results.charts || {})
+                        .filter(([, chart]) => chart.status !== 'ok')
+                        .forEach(([name, chart]) => console.warn(`⚠️ Gráfico ${name}: ${chart.status}${chart.limit ? ` (${chart.limit})` : ''} (${chart.duration_ms} ms) - ${chart.error}`));
                     
-                    // Cache-busting: agregar timestamp para evitar que el navegador use versiones antiguas
-                    const timestamp = Date.now();
+                    // Convertir a URLs absolutas apuntando al backend, versionadas por hash
+                    const hashes = results.hashes || {};
+                    const keys = results.keys || {};
+                    const chartUrl = (key) => this.buildChartUrl(results[key], hashes[key], keys[key]);
                     
                     const urls = {};
                     // Gráficos originales
-                    if (results.prisma) urls.prisma = `${backendUrl}/uploads/charts/${results.prisma}?t=${timestamp}`;
-                    if (results.scree) urls.scree = `${backendUrl}/uploads/charts/${results.scree}?t=${timestamp}`;
-                    if (results.chart1) urls.chart1 = `${backendUrl}/uploads/charts/${results.chart1}?t=${timestamp}`;
+                    if (results.prisma) urls.prisma = chartUrl('prisma');
+                    if (results.scree) urls.scree = chartUrl('scree');
+                    if (results.chart1) urls.chart1 = chartUrl('chart1');
                     
                     // 4 Nuevos gráficos académicos
-                    if (results.temporal_distribution) {
-                        urls.temporal_distribution = `${backendUrl}/uploads/charts/${results.temporal_distribution}?t=${timestamp}`;
-                    }
-                    if (results.quality_assessment) {
-                        urls.quality_assessment = `${backendUrl}/uploads/charts/${results.quality_assessment}?t=${timestamp}`;
-                    }
-                    if (results.bubble_chart) {
-                        urls.bubble_chart = `${backendUrl}/uploads/charts/${results.bubble_chart}?t=${timestamp}`;
-                    }
-                    if (results.technical_synthesis) {
-                        urls.technical_synthesis = `${backendUrl}/uploads/charts/${results.technical_synthesis}?t=${timestamp}`;
-                    }
+                    if (results.temporal_distribution) urls.temporal_distribution = chartUrl('temporal_distribution');
+                    if (results.quality_assessment) urls.quality_assessment = chartUrl('quality_assessment');
+                    if (results.bubble_chart) urls.bubble_chart = chartUrl('bubble_chart');
+                    if (results.technical_synthesis) urls.technical_synthesis = chartUrl('technical_synthesis');
 
-                    console.log('✅ URLs finales de gráficos (con cache-busting):', urls);
+                    console.log('✅ URLs finales de gráficos (versionadas por hash):', urls);
                     resolve(urls);
                 } catch (e) {
                     console.error('❌ Error parseando output de Python:', e);
@@ -173,7 +259,13 @@ class PythonGraphService {
                 }
             });
 
-            pythonProcess.stdin.write(JSON.stringify(inputData));
+            // Una línea por sección ({ section, data }), de menor a mayor tamaño: Python empieza a dibujar
+            // PRISMA y los gráficos pequeños mientras todavía recibe los scores y la síntesis técnica
+            Object.entries(inputData)
+                .filter(([, data]) => data !== undefined)
+                .map(([section, data]) => JSON.stringify({ section, data }))
+                .sort((a, b) => a.length - b.length)
+                .forEach((frame) => pythonProcess.stdin.write(frame + '\n'));
             pythonProcess.stdin.end();
         });
     }
@@ -0,0 +1,96 @@
+const { spawn } = require('child_process');
+const path = require('path');
+
+class PythonReferencesParserService {
+    constructor() {
+        this.scriptPath = path.join(__dirname, '../../../scripts/parse_references.py');
+        this.batchSize = Number(process.env.IMPORT_BATCH_SIZE || 500);
+    }
+
+    /**
+     * Parsea un archivo bibliográfico en streaming y entrega las referencias por lotes.
+     * Python lee el archivo línea a línea (memoria constante) y espera a que se procese
+     * cada lote antes de seguir, así la base de datos marca el ritmo.
+     * @param {Object} file - Archivo de multer (path en disco o buffer en memoria)
+     * @param {string} format - ris, bib, csv, nbib, ciw o txt
+     * @param {Function} onBatch - async (records) => void, llamado por cada lote
+     * @param {Function} onError - (error) => void por cada registro que no se pudo parsear ({ record, line, error })
+     * @returns {Promise<Object>} Estadísticas: { records, errors, bytes, seconds, recordsPerSecond, mbPerSecond }
+     */
+    async parse(file, format, onBatch, onError = () => {}) {
+        return new Promise((resolve, reject) => {
+            const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
+            const args = [this.scriptPath, '--format', format, '--batch-size', String(this.batchSize)];
+            if (file.path) args.push(file.path);
+            const pythonProcess = spawn(pythonCommand, args);
+
+            let stderr = '';
+            let pendingLine = '';
+            let stats = null;
+            let failure = null;
+            // Los lotes se procesan de uno en uno y en orden
+            let queue = Promise.resolve();
+
+            const handleRecord = async (line) => {
+                if (!line.trim()) return;
+                const record = JSON.parse(line);
+                if (record.type === 'batch') {
+                    await onBatch(record.records);
+                } else if (record.type === 'error') {
+                    onError(record);
+                } else if (record.type === 'stats') {
+                    stats = record;
+                }
+            };
+
+            pythonProcess.stdout.on('data', (data) => {
+                const lines = (pendingLine + data.toString()).split('\n');
+                pendingLine = lines.pop();
+                // Pausar la lectura (y con ella a Python) mientras se guardan los lotes recibidos
+                pythonProcess.stdout.pause();
+                queue = queue
+                    .then(async () => {
+                        for (const line of lines) {
+                            await handleRecord(line);
+                        }
+                        pythonProcess.stdout.resume();
+                    })
+                    .catch((error) => {
+                        failure = failure || error;
+                        pythonProcess.kill();
+                    });
+            });
+
+            pythonProcess.stderr.on('data', (data) => {
+                stderr += data.toString();
+            });
+
+            pythonProcess.on('error', reject);
+
+            pythonProcess.on('close', (code) => {
+                queue.then(async () => {
+                    if (!failure && pendingLine) {
+                        await handleRecord(pendingLine).catch((error) => { failure = error; });
+                    }
+                    if (stderr.trim()) {
+                        console.log('🐍 Python stderr output:', stderr.trim());
+                    }
+                    if (failure) {
+                        reject(failure);
+                    } else if (code !== 0 || !stats) {
+                        reject(new Error(`parse_references.py terminó con código ${code}: ${stderr}`));
+                    } else {
+                        resolve(stats);
+                    }
+                });
+            });
+
+            if (!file.path) {
+                pythonProcess.stdin.write(file.buffer);
+            }
+            pythonProcess.stdin.end();
+        });
+    }
+}
+
+module.exports = PythonReferencesParserService;
@@ -56,6 +56,18 @@ function generate(articleData, userProfile = null) {
 \\usepackage{caption}
 \\usepackage{geometry}
 \\usepackage{setspace}
+\\usepackage{pgfplots}
+\\pgfplotsset{compat=1.17}
+\\usetikzlibrary{positioning,fit,arrows.meta}
+
+% -------------------- GRÁFICOS --------------------
+% Con el paquete completo, cada gráfico usa su código TikZ/pgfplots nativo (charts/tikz/);
+% si no existe, se incluye la imagen exportada (PDF vectorial o PNG)
+\\graphicspath{{charts/vector/}{charts/raster/}}
+\\newcommand{\\chartfigure}[2]{%
+  \\IfFileExists{charts/tikz/#2.tex}%
+    {\\begin{minipage}{#1}\\input{charts/tikz/#2.tex}\\end{minipage}}%
+    {\\includegraphics[width=#1]{#2}}}
 
 \\geometry{margin=1in}
 \\onehalfspacing
@@ -296,7 +308,7 @@ Se utilizó un enfoque híbrido de cribado asistido por IA. Las referencias desc
 
 \\begin{figure}[H]
 \\centering
-\\includegraphics[width=\\columnwidth]{scree_plot}
+\\chartfigure{\\columnwidth}{scree_plot}
 \\caption{Distribución visual de puntajes de relevancia ordenados de mayor a menor. La línea vertical indica el punto de inflexión utilizado como criterio de corte para priorizar la revisión manual.}
 \\label{fig:codo}
 \\end{figure}
@@ -342,7 +354,7 @@ La Figura~\\ref{fig:codo} presenta la distribución de estos puntajes ordenados
 
 \\begin{figure}[H]
 \\centering
-\\includegraphics[width=0.85\\textwidth]{scree_plot}
+\\chartfigure{0.85\\textwidth}{scree_plot}
 \\caption{Scree plot: distribución de puntajes de relevancia semántica ordenados decrecientemente. La línea vertical roja señala el punto de inflexión utilizado como umbral de corte para priorizar la revisión manual.}
 \\label{fig:codo}
 \\end{figure}
@@ -399,7 +411,7 @@ El proceso completo de identificación, cribado y selección de estudios se resu
 
 \\begin{figure}[H]
 \\centering
-\\includegraphics[width=0.95\\textwidth]{prisma_diagram}
+\\chartfigure{0.95\\textwidth}{prisma_flow}
 \\caption{Diagrama de flujo PRISMA 2020 del proceso de revisión sistemática. Muestra las fases de identificación, cribado, elegibilidad e inclusión final, así como las razones específicas de exclusión en cada etapa.}
 \\label{fig:prisma}
 \\end{figure}
@@ -419,7 +431,7 @@ El proceso completo de identificación, cribado y selección de estudios se resu
 
 \\begin{figure}[H]
 \\centering
-\\includegraphics[width=0.95\\textwidth]{prisma_diagram}
+\\chartfigure{0.95\\textwidth}{prisma_flow}
 \\caption{Diagrama de flujo PRISMA 2020 del proceso de revisión sistemática. Muestra las fases de identificación, cribado, elegibilidad e inclusión final de estudios, con desglose detallado por base de datos académica y razones específicas de exclusión en cada etapa.}
 \\label{fig:prisma}
 \\end{figure}
@@ -0,0 +1,74 @@
+"""
+Tests for scripts/detect_duplicates.py
+Run with: python -m pytest backend/tests/scripts
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'detect_duplicates.py')
+
+WORDS = ('automated software testing machine learning regression oracle mutation fuzzing neural '
+         'network graph model code review defect prediction transfer language large generation '
+         'continuous integration flaky tests coverage search based repair program synthesis').split()
+
+
+def run_script(references):
+    proc = subprocess.run([sys.executable, SCRIPT], input=json.dumps({'references': references}),
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def pairs(result):
+    return {(group['originalId'], dup['id']) for group in result['groups'] for dup in group['duplicates']}
+
+
+def test_applies_the_node_duplicate_rules():
+    references = [
+        {'id': 'a', 'title': 'Deep Learning for Test Oracle Generation', 'authors': 'Smith, J.', 'year': 2021,
+         'doi': '10.1000/xyz'},
+        # Same DOI behind a resolver URL, unrelated title
+        {'id': 'b', 'title': 'Something else entirely', 'authors': 'Lee, K.', 'year': 2019,
+         'doi': 'https://doi.org/10.1000/XYZ'},
+        # Accents and punctuation are normalized away
+        {'id': 'c', 'title': 'Análisis de Pruebas: Automatización', 'authors': 'García, M.', 'year': 2020, 'doi': ''},
+        {'id': 'd', 'title': 'analisis de pruebas automatizacion', 'authors': 'Other', 'year': 2022, 'doi': None},
+        # 83% similar: a duplicate only when the year (or the authors) match
+        {'id': 'e', 'title': 'Mutation testing of neural networks', 'authors': 'Kim, H.', 'year': 2018},
+        {'id': 'f', 'title': 'Mutation testing for neural nets', 'authors': 'Park, S.', 'year': 2019},
+        {'id': 'g', 'title': 'Mutation testing for neural nets', 'authors': 'Park, S.', 'year': 2018},
+    ]
+    result = run_script(references)
+    # g joins e's group first, so f (identical to g) is left without one, as in the Node loop
+    assert pairs(result) == {('a', 'b'), ('c', 'd'), ('e', 'g')}
+    assert result['duplicates'] == ['b', 'd', 'g']
+    by_original = {group['originalId']: group for group in result['groups']}
+    assert by_original['c']['duplicates'][0]['similarity'] == 100
+    assert by_original['e']['duplicates'][0]['similarity'] == 83
+    assert result['stats'] == {'total': 7, 'unique': 4, 'duplicates': 3, 'duplicateGroups': 3}
+
+
+def test_lsh_candidates_find_near_duplicates_in_large_imports():
+    rng = random.Random(7)
+    references = []
+    for i in range(1500):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))) + f' {i}'
+        references.append({'id': f'r{i}', 'title': title, 'authors': 'Author', 'year': 2000 + i % 20})
+    expected = set()
+    # More references than EXHAUSTIVE_MAX: candidates come from DOI/title blocks and LSH
+    for k, i in enumerate(rng.sample(range(1500), 100)):
+        title = list(references[i]['title'])
+        # A few typos, as between two databases' exports of the same record
+        for _ in range(2):
+            position = rng.randrange(len(title))
+            title[position] = 'x'
+        references.append({'id': f'd{k}', 'title': ''.join(title).upper(), 'authors': 'Author',
+                           'year': references[i]['year']})
+        expected.add((f'r{i}', f'd{k}'))
+
+    result = run_script(references)
+    assert expected <= pairs(result)
+    assert result['stats']['total'] == 1600
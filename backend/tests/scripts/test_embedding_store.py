@@ -0,0 +1,53 @@
+"""
+Tests for scripts/embedding_store.py
+Run with: python -m pytest backend/tests/scripts
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts')
+STORE_SCRIPT = os.path.join(SCRIPTS, 'embedding_store.py')
+SCREEN_SCRIPT = os.path.join(SCRIPTS, 'screen_embeddings.py')
+
+
+def run(script, *args, payload=None):
+    proc = subprocess.run([sys.executable, script, *args], input=json.dumps(payload or {}),
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def test_only_new_or_changed_references_are_missing(tmp_path):
+    store = str(tmp_path / 'store')
+    rng = np.random.default_rng(5)
+    refs = [{'id': f'r{i}', 'text': f'title {i}', 'embedding': row} for i, row in enumerate(rng.normal(size=(4, 6)).tolist())]
+
+    assert run(STORE_SCRIPT, 'missing', '--store', store, payload={'model': 'm', 'references': refs})['missing'] == \
+        ['r0', 'r1', 'r2', 'r3']
+    assert run(STORE_SCRIPT, 'put', '--store', store, payload={'model': 'm', 'references': refs}) == \
+        {'appended': 4, 'rows': 4, 'live': 4}
+
+    refs[2]['text'] = 'title 2, corrected'
+    refs.append({'id': 'r4', 'text': 'title 4', 'embedding': rng.normal(size=6).tolist()})
+    missing = run(STORE_SCRIPT, 'missing', '--store', store, payload={'model': 'm', 'references': refs})['missing']
+    assert missing == ['r2', 'r4']
+    # Another model's embeddings are never reused
+    assert len(run(STORE_SCRIPT, 'missing', '--store', store, payload={'model': 'other', 'references': refs})['missing']) == 5
+
+    refs[2]['embedding'] = rng.normal(size=6).tolist()
+    changed = [ref for ref in refs if ref['id'] in missing]
+    assert run(STORE_SCRIPT, 'put', '--store', store, payload={'model': 'm', 'references': changed}) == \
+        {'appended': 2, 'rows': 6, 'live': 5}
+    assert run(STORE_SCRIPT, 'compact', '--store', store) == {'rows': 5, 'live': 5}
+    assert os.path.getsize(os.path.join(store, 'vectors.bin')) == 5 * 6 * 4
+
+    # Scores read from the store match the ones computed from the embeddings in the payload
+    category = rng.normal(size=6).tolist()
+    from_store = run(SCREEN_SCRIPT, '--store', store,
+                     payload={'category': category, 'references': [{'id': ref['id']} for ref in refs]})
+    inline = run(SCREEN_SCRIPT, payload={'category': category, 'references': refs})
+    assert from_store['results'] == inline['results']
@@ -0,0 +1,371 @@
+"""
+Tests for scripts/generate_charts.py
+Run with: python -m pytest backend/tests/scripts
+"""
+
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import matplotlib.image as mpimg
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'generate_charts.py')
+
+PAYLOAD = {
+    'prisma': {
+        'identified': 320, 'duplicates': 40, 'screened': 280, 'excluded': 200,
+        'retrieved': 80, 'not_retrieved': 0, 'assessed': 80, 'excluded_fulltext': 50,
+        'included': 30,
+        'databases': [{'name': 'Scopus', 'hits': 150}, {'name': 'IEEE Xplore', 'hits': 90},
+                      {'name': 'Web of Science', 'hits': 80}],
+        'excluded_reasons': {'Wrong population': 20, 'Wrong outcome': 30},
+        'screening_exclusion_reasons': {'Off-topic': 150, 'Not peer reviewed': 50},
+    },
+    'scree': {'scores': [0.95, 0.91, 0.88, 0.8, 0.75, 0.7, 0.62, 0.5, 0.44, 0.4,
+                         0.33, 0.3, 0.28, 0.25, 0.2, 0.18, 0.15, 0.12, 0.1, 0.05]},
+    'search_strategy': [
+        {'name': 'Scopus', 'hits': 150,
+         'searchString': 'TITLE-ABS-KEY(("machine learning" OR "deep learning") AND '
+                         '("software testing" OR "test generation" OR "test oracle"))'},
+        {'name': 'IEEE Xplore', 'hits': 90, 'searchString': '("machine learning") AND ("testing")'},
+    ],
+    'temporal_distribution': {'years': {'2019': 2, '2020': 5, '2021': 8, '2022': 6, '2023': 9}},
+    'quality_assessment': {'questions': ['Q1', 'Q2', 'Q3', 'Q4'], 'yes': [20, 15, 10, 25],
+                           'no': [5, 5, 10, 2], 'partial': [5, 10, 10, 3]},
+    'bubble_chart': {'entries': [{'keyword': 'machine learning', 'count': 12},
+                                 {'keyword': 'software testing automation', 'count': 9},
+                                 {'keyword': 'llm', 'count': 4}]},
+    'technical_synthesis': {'studies': [
+        {'study': 'Smith 2021', 'tool': 'Selenium', 'accuracy': '0.91', 'precision': '0.88'},
+        {'study': 'Lee 2022', 'tool': 'Cypress', 'accuracy': '0.85', 'precision': ''},
+    ]},
+}
+
+
+def run_script(output_dir, *args, payload=PAYLOAD, stdin=None):
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(output_dir), *args],
+                          input=json.dumps(payload) if stdin is None else stdin,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def content_box(path):
+    """(image width, image height, left, right, top, bottom) of the non-white pixels."""
+    pixels = mpimg.imread(path)[..., :3]
+    ys, xs = np.where((pixels < 0.97).any(axis=2))
+    height, width = pixels.shape[:2]
+    return width, height, xs.min(), xs.max(), ys.min(), ys.max()
+
+
+@pytest.fixture(scope='module')
+def rendered(tmp_path_factory):
+    tight_dir = tmp_path_factory.mktemp('tight')
+    fixed_dir = tmp_path_factory.mktemp('fixed')
+    return (tight_dir, run_script(tight_dir, '--layout', 'tight'),
+            fixed_dir, run_script(fixed_dir, '--layout', 'fixed'))
+
+
+def test_fixed_layout_renders_every_chart(rendered):
+    _, tight_results, _, fixed_results = rendered
+    assert set(fixed_results) == set(tight_results)
+
+
+@pytest.mark.parametrize('key', ['prisma', 'scree', 'chart1', 'temporal_distribution',
+                                 'quality_assessment', 'bubble_chart', 'technical_synthesis'])
+def test_fixed_layout_matches_tight_layout(rendered, key):
+    tight_dir, tight_results, fixed_dir, fixed_results = rendered
+    _, _, tx0, tx1, ty0, ty1 = content_box(os.path.join(tight_dir, tight_results[key]))
+    width, height, fx0, fx1, fy0, fy1 = content_box(os.path.join(fixed_dir, fixed_results[key]))
+
+    # Nothing clipped: the precomputed margins keep content off the canvas edges
+    assert fx0 > 0 and fy0 > 0 and fx1 < width - 1 and fy1 < height - 1
+
+    # Same drawing: content extent within 15% of the tight-layout output
+    assert abs((fx1 - fx0) - (tx1 - tx0)) <= 0.15 * (tx1 - tx0)
+    assert abs((fy1 - fy0) - (ty1 - ty0)) <= 0.15 * (ty1 - ty0)
+
+
+def test_outputs_are_byte_stable(tmp_path, rendered):
+    _, _, _, fixed_results = rendered
+    again = run_script(tmp_path, '--layout', 'fixed')
+    assert again['hashes'] == fixed_results['hashes']
+
+
+def test_framed_input_matches_whole_payload(tmp_path, rendered):
+    _, _, _, fixed_results = rendered
+    frames = [json.dumps({'section': key, 'data': data}) for key, data in PAYLOAD.items()]
+    # A malformed frame is reported and skipped; the other sections still render
+    frames.insert(1, '{"section": "scree"')
+    summary = run_script(tmp_path, '--layout', 'fixed', '--input-format', 'framed', '--stream',
+                         stdin='\n'.join(frames) + '\n')
+    assert summary['type'] == 'summary'
+    assert summary['hashes'] == fixed_results['hashes']
+
+
+def test_placeholders_are_shared_assets(tmp_path):
+    assets = tmp_path / 'assets'
+    empty = {'temporal_distribution': {'years': {}}}
+    first = run_script(tmp_path / 'a', '--asset-dir', str(assets), payload=empty)
+    second = run_script(tmp_path / 'b', '--asset-dir', str(assets), payload=empty)
+    assert first['hashes'] == second['hashes']
+    chart = tmp_path / 'b' / 'temporal_distribution.png'
+    assert os.stat(chart).st_nlink == 3
+
+    # Rendering real data over a linked placeholder must leave the shared asset intact
+    run_script(tmp_path / 'b', '--asset-dir', str(assets),
+               payload={'temporal_distribution': PAYLOAD['temporal_distribution']})
+    assert os.stat(chart).st_nlink == 1
+    again = run_script(tmp_path / 'c', '--asset-dir', str(assets), payload=empty)
+    assert again['hashes'] == first['hashes']
+
+
+def test_worker_reuses_pooled_figures(tmp_path, rendered):
+    _, _, _, fixed_results = rendered
+    jobs = ''.join(json.dumps({'id': i, 'output_dir': str(tmp_path / str(i)), 'data': PAYLOAD}) + '\n'
+                   for i in range(2))
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(tmp_path), '--layout', 'fixed', '--worker'],
+                          input=jobs, capture_output=True, text=True, check=True)
+    first, second = [json.loads(line) for line in proc.stdout.strip().splitlines()]
+    assert [first['id'], second['id']] == [0, 1]
+    # Pooled figures render byte-identical charts and are reused by the second job
+    assert first['hashes'] == second['hashes'] == fixed_results['hashes']
+    assert second['pool']['hits'] > first['pool']['hits']
+
+
+def test_worker_updates_changed_artists_only(tmp_path):
+    sections = ('prisma', 'scree', 'temporal_distribution')
+    before = {key: PAYLOAD[key] for key in sections}
+    after = copy.deepcopy(before)
+    after['prisma']['included'] += 1
+    after['scree']['scores'].append(0.33)
+    after['temporal_distribution']['years']['2024'] = 3
+
+    fresh = run_script(tmp_path / 'fresh', '--layout', 'fixed', payload=after)
+    jobs = ''.join(json.dumps({'id': i, 'output_dir': str(tmp_path / 'warm'), 'data': data}) + '\n'
+                   for i, data in enumerate([before, after, after]))
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(tmp_path), '--layout', 'fixed', '--worker'],
+                          input=jobs, capture_output=True, text=True, check=True)
+    results = [json.loads(line) for line in proc.stdout.strip().splitlines()]
+
+    # Updating the kept figures gives the same bytes as drawing the new data from scratch
+    assert results[1]['hashes'] == results[2]['hashes'] == fresh['hashes']
+    assert results[1]['scenes']['prisma']['created'] == 0
+    assert results[1]['scenes']['prisma']['updated'] == 2
+
+
+def test_worker_answers_failed_jobs_and_keeps_serving(tmp_path):
+    (tmp_path / 'taken').write_text('not a directory')
+    jobs = [{'id': 1, 'data': [1, 2]},
+            {'id': 2, 'output_dir': str(tmp_path / 'taken' / 'charts'), 'data': {'prisma': PAYLOAD['prisma']}},
+            {'id': 3, 'output_dir': str(tmp_path / 'ok'), 'data': {'prisma': PAYLOAD['prisma'], 'scree': 5}}]
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(tmp_path), '--worker'],
+                          input=''.join(json.dumps(job) + '\n' for job in jobs),
+                          capture_output=True, text=True, check=True)
+    results = [json.loads(line) for line in proc.stdout.strip().splitlines()]
+    assert [result['id'] for result in results] == [1, 2, 3]
+    assert results[0]['error'].startswith('Invalid job')
+    assert results[1]['error'].startswith('Job failed')
+    assert results[2]['charts']['prisma']['status'] == 'ok'
+    assert results[2]['charts']['scree']['status'] == 'error'
+
+
+def test_dense_layers_are_rasterized_in_pdf(tmp_path):
+    scores = list(np.random.default_rng(0).random(5000))
+    payload = {'scree': {'scores': scores}}
+    run_script(tmp_path / 'mixed', '--layout', 'fixed', payload=payload)
+    run_script(tmp_path / 'vector', '--layout', 'fixed', '--rasterize-threshold', '0', payload=payload)
+    mixed = (tmp_path / 'mixed' / 'scree_plot.pdf').read_bytes()
+    vector = (tmp_path / 'vector' / 'scree_plot.pdf').read_bytes()
+
+    assert b'/Subtype /Image' in mixed and b'/Subtype /Image' not in vector
+    assert len(mixed) < len(vector)
+    # Axis labels and title stay vector text
+    assert mixed.count(b'/Font') == vector.count(b'/Font')
+
+
+def test_resource_limits_fail_only_the_chart_with_a_structured_error(tmp_path):
+    payload = {key: PAYLOAD[key] for key in ('scree', 'temporal_distribution')}
+    results = run_script(tmp_path / 'output', '--chart-output-mb', '0.01', payload=payload)
+    assert results['hashes'] == {}
+    assert {chart['status'] for chart in results['charts'].values()} == {'limit'}
+    assert results['charts']['scree']['limit'] == 'output'
+
+    results = run_script(tmp_path / 'memory', '--chart-memory-mb', '1', payload=payload)
+    assert results['charts']['scree']['limit'] == 'memory'
+    assert results['charts']['scree']['error'] == 'Exceeded memory limit of 1 MB'
+
+    results = run_script(tmp_path / 'roomy', '--chart-memory-mb', '1024', '--chart-cpu-seconds', '60', payload=payload)
+    assert set(results['hashes']) == {'scree', 'temporal_distribution'}
+
+
+def test_local_sink_reports_object_keys(rendered):
+    _, _, fixed_dir, fixed_results = rendered
+    assert set(fixed_results['keys']) == set(fixed_results['hashes'])
+    for chart, keys in fixed_results['keys'].items():
+        assert set(keys) == set(fixed_results['hashes'][chart])
+        assert all(os.path.exists(os.path.join(fixed_dir, key)) for key in keys.values())
+
+
+def test_unknown_sink_is_rejected(tmp_path):
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(tmp_path), '--sink', 'ftp://charts'],
+                          input=json.dumps(PAYLOAD), capture_output=True, text=True)
+    assert proc.returncode == 1
+    assert 'Unsupported output sink' in proc.stderr
+
+
+def test_budget_lowers_fidelity_and_records_decisions(tmp_path, rendered):
+    _, _, fixed_dir, fixed_results = rendered
+    results = run_script(tmp_path, '--layout', 'fixed', '--budget-ms', '1')
+    assert results['budget']['budget_ms'] == 1
+    assert set(results['fidelity']) == set(fixed_results['hashes'])
+    prisma = results['fidelity']['prisma']
+    assert prisma['level'] == 3 and prisma['formats'] == ['png']
+    assert not os.path.exists(tmp_path / 'prisma_flow.pdf')
+
+    full_width = mpimg.imread(os.path.join(fixed_dir, 'prisma_flow.png')).shape[1]
+    reduced_width = mpimg.imread(os.path.join(tmp_path, 'prisma_flow.png')).shape[1]
+    assert reduced_width == pytest.approx(full_width * prisma['dpi'] / 300, abs=1)
+
+
+def test_budget_tolerates_malformed_sections(tmp_path):
+    payload = {'prisma': PAYLOAD['prisma'], 'technical_synthesis': [{'study': 'Smith 2021'}]}
+    results = run_script(tmp_path, '--layout', 'fixed', '--budget-ms', '1000', payload=payload)
+    assert 'technical_synthesis' in results['fidelity']
+    assert results['charts']['prisma']['status'] == 'ok'
+
+
+def test_spec_only_exports_prepared_data_without_rasterizing(tmp_path):
+    results = run_script(tmp_path / 'vl', '--spec', 'vega-lite', '--spec-only')
+    assert results['hashes'] == {}
+    assert results['specs']['scree'] == {'vega-lite': 'scree_plot.vl.json'}
+    # Tables have no Vega-Lite form
+    assert results['specs']['technical_synthesis'] == {'vega-lite': 'technical_synthesis.spec.json'}
+    assert not any(name.endswith('.png') for name in os.listdir(tmp_path / 'vl'))
+    vega = json.loads((tmp_path / 'vl' / 'scree_plot.vl.json').read_text())
+    assert vega['$schema'].endswith('vega-lite/v5.json')
+    assert len(vega['data']['values']) == len(PAYLOAD['scree']['scores'])
+
+    results = run_script(tmp_path / 'json', '--spec', 'json', '--spec-only')
+    scree = json.loads((tmp_path / 'json' / results['specs']['scree']['json']).read_text())
+    assert scree['kind'] == 'line'
+    assert scree['data'][0] == {'rank': 1, 'score': 0.95}
+    assert any(o['label'].startswith('Cut-off point (elbow)') for o in scree['overlays'])
+    table = json.loads((tmp_path / 'json' / results['specs']['technical_synthesis']['json']).read_text())
+    assert table['columns'] == ['Study', 'Tool', 'Accuracy', 'Precision']
+
+
+def test_tikz_export_writes_latex_from_prepared_data(tmp_path):
+    payload = copy.deepcopy(PAYLOAD)
+    payload['prisma']['databases'][0]['name'] = 'Scopus & Co_1'
+    results = run_script(tmp_path, '--spec', 'tikz', '--spec-only', payload=payload)
+    assert set(results['specs']) == {'prisma', 'scree', 'temporal_distribution', 'quality_assessment', 'bubble_chart'}
+
+    prisma = (tmp_path / 'prisma_flow.tex').read_text()
+    assert prisma.count(r'\begin{tikzpicture}') == prisma.count(r'\end{tikzpicture}') == 1
+    assert r'Scopus \& Co\_1 (n = 150)' in prisma
+    assert '(n = 30)' in prisma
+    scree = (tmp_path / 'scree_plot.tex').read_text()
+    assert r'\begin{axis}' in scree and '(1,0.95)' in scree
+    assert 'Cut-off point (elbow)' in scree and r'Top 10\%' in scree
+    assert scree.count('{') == scree.count('}')
+
+
+def test_scree_cutoff_reports_bootstrap_interval(tmp_path):
+    scores = np.random.default_rng(7).beta(2, 5, 5000).tolist()
+    payload = {'scree': {'scores': scores}}
+    results = run_script(tmp_path / 'a', '--spec', 'json', payload=payload)
+    scree = results['analysis']['scree']
+    ci = scree['elbow_ci']
+    assert ci['confidence'] == 0.95 and ci['resamples'] > 0
+    assert ci['rank'][0] <= scree['elbow']['rank'] <= ci['rank'][1]
+    assert ci['score'][0] <= scree['elbow']['score'] <= ci['score'][1]
+    spec = json.loads((tmp_path / 'a' / results['specs']['scree']['json']).read_text())
+    assert [o['x'] for o in spec['overlays'] if o['type'] == 'band' and 'x' in o] == [ci['rank']]
+    # Fixed seed: same interval and same chart
+    again = run_script(tmp_path / 'b', payload=payload)
+    assert again['analysis'] == results['analysis']
+    assert again['hashes']['scree'] == results['hashes']['scree']
+    # The cut-off comes from the chart job, which also runs for spec-only exports
+    spec_only = run_script(tmp_path / 'c', '--spec', 'json', '--spec-only', payload=payload)
+    assert spec_only['analysis'] == results['analysis']
+
+
+def test_scree_drops_non_numeric_scores(tmp_path):
+    payload = {'prisma': PAYLOAD['prisma'], 'scree': {'scores': [0.9, 'abc', 0.3, None, 0.2, 'NaN', 0.1]}}
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(tmp_path)], input=json.dumps(payload),
+                          capture_output=True, text=True, check=True)
+    # Strict JSON, as Node's JSON.parse reads it
+    results = json.loads(proc.stdout.strip().splitlines()[-1], parse_constant=pytest.fail)
+    assert results['charts']['prisma']['status'] == 'ok'
+    assert results['charts']['scree']['status'] == 'ok'
+    assert results['analysis']['scree']['elbow']['score'] in (0.3, 0.2)
+
+
+def test_prebuilt_runtime_is_relocatable_and_renders_the_same(tmp_path):
+    runtime_script = os.path.join(os.path.dirname(SCRIPT), 'chart_runtime.py')
+    subprocess.run([sys.executable, runtime_script, 'build', '--output', str(tmp_path / 'built')],
+                   capture_output=True, text=True, check=True)
+    os.rename(tmp_path / 'built', tmp_path / 'moved')
+    env = {**os.environ, 'CHARTS_RUNTIME_DIR': str(tmp_path / 'moved')}
+    env.pop('MPLCONFIGDIR', None)
+    proc = subprocess.run([sys.executable, SCRIPT, '--output-dir', str(tmp_path / 'warm'), '--layout', 'fixed'],
+                          input=json.dumps(PAYLOAD), env=env, capture_output=True, text=True, check=True)
+    assert 'Chart runtime' not in proc.stderr
+    warm = json.loads(proc.stdout.strip().splitlines()[-1])
+    # The default bundle is matplotlib's own DejaVu Serif, which the fallback chain resolves to anyway
+    assert warm['hashes'] == run_script(tmp_path / 'plain', '--layout', 'fixed')['hashes']
+    assert os.listdir(tmp_path / 'moved' / 'mplconfig')
+
+
+def test_sprite_sheet_maps_every_rendered_chart(tmp_path):
+    results = run_script(tmp_path, '--layout', 'fixed', '--sprite-width', '160')
+    sprite = results['sprite']
+    assert set(sprite['charts']) == set(results['hashes'])
+
+    sheet = mpimg.imread(os.path.join(tmp_path, sprite['file']))
+    assert sheet.shape[:2] == (sprite['height'], sprite['width'])
+    for box in sprite['charts'].values():
+        assert box['width'] == 160
+        assert box['x'] + box['width'] <= sprite['width'] and box['y'] + box['height'] <= sprite['height']
+        # Every thumbnail has drawn content
+        assert (sheet[box['y']:box['y'] + box['height'], box['x']:box['x'] + box['width'], :3] < 0.9).any()
+
+
+def test_sections_read_from_database_match_payload(tmp_path, rendered):
+    import sqlite3
+    _, tight_results, _, _ = rendered
+    db_path = tmp_path / 'rsl.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript('''
+            CREATE TABLE "references" (project_id TEXT, keywords TEXT, screening_status TEXT,
+                                       manual_review_status TEXT, screening_score REAL);
+            CREATE TABLE screening_records (project_id TEXT, stage TEXT, total_score REAL);
+            CREATE TABLE rqs_entries (project_id TEXT, year INTEGER, technology TEXT);
+        ''')
+        scores = PAYLOAD['scree']['scores']
+        conn.executemany('INSERT INTO "references" VALUES (?, ?, ?, ?, ?)',
+                         [('p1', 'Machine Learning; LLM; the', 'included', None, s) for s in scores[::2]]
+                         + [('p1', 'machine learning', 'excluded', 'included', s) for s in scores[1::2]]
+                         + [('p2', 'other project', 'included', None, 0.99)])
+        conn.executemany('INSERT INTO rqs_entries VALUES (?, ?, ?)',
+                         [('p1', int(year), None) for year, n in PAYLOAD['temporal_distribution']['years'].items()
+                          for _ in range(n)])
+
+    payload = {'prisma': PAYLOAD['prisma'], 'scree': {'scores': [0.5]}}
+    # Only the scores by default: years and keywords keep the payload's (PRISMA-capped) counts
+    results = run_script(tmp_path / 'default', '--db-url', f'sqlite:///{db_path}', '--project-id', 'p1',
+                         payload=payload)
+    assert results['hashes']['scree'] == tight_results['hashes']['scree']
+    assert 'temporal_distribution' not in results['hashes'] and 'bubble_chart' not in results['hashes']
+
+    results = run_script(tmp_path / 'out', '--db-url', f'sqlite:///{db_path}', '--project-id', 'p1',
+                         '--db-sections', 'scree,temporal_distribution,bubble_chart',
+                         '--spec', 'json', payload=payload)
+    assert results['hashes']['scree'] == tight_results['hashes']['scree']
+    assert results['hashes']['temporal_distribution'] == tight_results['hashes']['temporal_distribution']
+    keywords = json.loads((tmp_path / 'out' / results['specs']['bubble_chart']['json']).read_text())
+    assert keywords['data'] == [{'keyword': 'Machine Learning', 'count': 20}, {'keyword': 'Llm', 'count': 10}]
@@ -0,0 +1,125 @@
+"""
+Tests for scripts/parse_references.py
+Run with: python -m pytest backend/tests/scripts
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'parse_references.py')
+
+RIS = """TY  - JOUR
+TI  - Deep learning for test
+  oracle generation
+AU  - Smith, J.
+AU  - Lee, K.
+PY  - 2021/05/01
+JO  - IEEE TSE
+DO  - 10.1109/x
+KW  - testing
+KW  - ml
+SP  - 1
+EP  - 10
+ER  - 
+
+TY  - CONF
+AU  - Nobody
+ER  - 
+"""
+
+BIB = """@comment{jabref-meta: x}
+@article{smith2021,
+  title = {Deep {Learning} for Test},
+  author = {Smith, J. and Lee, K.},
+  year = 2021,
+  journal = "IEEE TSE",
+  abstract = {Contact: someone@example.org}
+}@inproceedings{lee2019, title={Second}, year={2019}, booktitle={ICSE}}
+"""
+
+CSV = ('﻿Title,Authors,Publication Year,Source title,DOI,Author Keywords,EID,Cited by\n'
+       '"Deep, learning ""quoted""","Smith J.; Lee K.",2021,IEEE TSE,https://doi.org/10.1/x,"a; b",2-s2.0-1,5\n'
+       '"Multi\nline title","Lee, A, Kim, B",2020,J,10.2/y,"c,d",,\n')
+
+NBIB = """PMID- 12345678
+TI  - A long medline title that
+      continues here.
+AU  - Smith J
+AU  - Lee K
+DP  - 2020 Jan 5
+JT  - Journal of Tests
+LID - 10.1000/abc [doi]
+
+PMID- 22222222
+TI  - Second.
+DP  - 2018
+"""
+
+CIW = """FN Clarivate Analytics Web of Science
+VR 1.0
+PT J
+AU Smith, J
+   Lee, K
+TI Deep learning for
+   test oracles
+SO IEEE TSE
+DE testing; oracle;
+   ml
+PY 2021
+DI 10.1109/x
+UT WOS:0001
+ER
+
+EF
+"""
+
+
+def run_script(fmt, text, *args):
+    proc = subprocess.run([sys.executable, SCRIPT, '--format', fmt, *args], input=text.encode('utf-8'),
+                          capture_output=True, check=True)
+    return [json.loads(line) for line in proc.stdout.decode('utf-8').splitlines()]
+
+
+def records(output):
+    return [record for line in output if line['type'] == 'batch' for record in line['records']]
+
+
+def test_parses_every_format_like_the_node_parsers():
+    ris = run_script('ris', RIS)
+    (ref,) = records(ris)
+    assert ref['title'] == 'Deep learning for test oracle generation'
+    assert (ref['authors'], ref['year'], ref['pages'], ref['keywords']) == ('Smith, J.; Lee, K.', 2021, '1-10', 'testing; ml')
+    assert [line['line'] for line in ris if line['type'] == 'error'] == [15]
+
+    bib = records(run_script('bib', BIB))
+    assert [(r['citationKey'], r['type'], r['journal']) for r in bib] == \
+        [('smith2021', 'article', 'IEEE TSE'), ('lee2019', 'conference', 'ICSE')]
+    assert bib[0]['authors'] == 'Smith, J.; Lee, K.' and bib[0]['abstract'] == 'Contact: someone@example.org'
+
+    csv_refs = records(run_script('csv', CSV))
+    assert csv_refs[0]['title'] == 'Deep, learning "quoted"'
+    assert csv_refs[0]['doi'] == '10.1/x' and csv_refs[0]['database'] == 'Scopus' and csv_refs[0]['citationCount'] == 5
+    assert csv_refs[1]['title'] == 'Multi\nline title'
+    assert csv_refs[1]['authors'] == ['Lee, A', 'Kim, B'] and csv_refs[1]['keywords'] == ['c', 'd']
+
+    nbib = records(run_script('nbib', NBIB))
+    assert [(r['title'], r['year'], r['externalId']) for r in nbib] == \
+        [('A long medline title that continues here.', 2020, '12345678'), ('Second.', 2018, '22222222')]
+    assert nbib[0]['doi'] == '10.1000/abc' and nbib[0]['journal'] == 'Journal of Tests'
+
+    (wos,) = records(run_script('ciw', CIW))
+    assert wos['title'] == 'Deep learning for test oracles' and wos['authors'] == 'Smith, J; Lee, K'
+    assert wos['keywords'] == 'testing; oracle; ml' and wos['database'] == 'Web of Science'
+
+
+def test_streams_batches_and_reports_throughput():
+    entry = 'TY  - JOUR\nTI  - Title {0}\nPY  - 2020\nER  - \n\n'
+    text = ''.join(entry.format(i) for i in range(1050)) + 'TY  - JOUR\nER  - \n'
+    output = run_script('txt', text, '--batch-size', '500')
+    assert [len(line['records']) for line in output if line['type'] == 'batch'] == [500, 500, 50]
+    stats = output[-1]
+    assert stats['type'] == 'stats'
+    assert (stats['records'], stats['errors'], stats['bytes']) == (1050, 1, len(text.encode('utf-8')))
+    assert stats['recordsPerSecond'] > 0
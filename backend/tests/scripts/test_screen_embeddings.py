@@ -0,0 +1,53 @@
+"""
+Tests for scripts/screen_embeddings.py
+Run with: python -m pytest backend/tests/scripts
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'screen_embeddings.py')
+
+
+def run_script(payload):
+    proc = subprocess.run([sys.executable, SCRIPT], input=json.dumps(payload),
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+def test_matches_the_node_threshold_semantics():
+    category = [1.0, 0.0, 0.0]
+    references = [
+        {'id': 'same', 'embedding': [2.0, 0.0, 0.0]},  # not normalized: similarity 1
+        {'id': 'close', 'embedding': [0.8, 0.6, 0.0]},  # 0.8
+        {'id': 'far', 'embedding': [0.0, 0.0, 3.0]},  # 0
+        {'id': 'zero', 'embedding': [0.0, 0.0, 0.0]},
+    ]
+    result = run_script({'category': category, 'references': references, 'threshold': 0.7})
+    by_id = {r['referenceId']: r for r in result['results']}
+    assert [r['referenceId'] for r in result['results']] == ['same', 'close', 'far', 'zero']
+    assert by_id['same'] == {'referenceId': 'same', 'similarity': 1.0, 'recommendation': 'include', 'confidence': 1.0}
+    assert by_id['close']['similarity'] == 0.8
+    assert by_id['close']['confidence'] == round((0.8 - 0.7) / 0.3, 3)
+    assert by_id['far'] == {'referenceId': 'far', 'similarity': 0.0, 'recommendation': 'exclude', 'confidence': 1.0}
+    assert by_id['zero']['similarity'] == 0.0
+    assert result['summary']['toInclude'] == 2 and result['summary']['toExclude'] == 2
+
+
+def test_several_categories_across_chunks():
+    rng = np.random.default_rng(3)
+    refs = rng.normal(size=(5000, 32))
+    cats = rng.normal(size=(3, 32))
+    payload = {'categories': cats.tolist(), 'threshold': 0.2,
+               'references': [{'id': i, 'embedding': row} for i, row in enumerate(refs.tolist())]}
+    result = run_script(payload)
+
+    expected = (refs / np.linalg.norm(refs, axis=1, keepdims=True)) @ (cats / np.linalg.norm(cats, axis=1, keepdims=True)).T
+    similarity = np.array([r['similarity'] for r in result['results']])
+    assert np.allclose(similarity, expected.max(axis=1), atol=1e-4)
+    assert [r['category'] for r in result['results']] == expected.argmax(axis=1).tolist()
+    assert result['summary']['toInclude'] == int((expected.max(axis=1) >= 0.2).sum())